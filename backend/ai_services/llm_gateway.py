@@ -0,0 +1,105 @@
+"""
+Süreç genelinde paylaşılan OpenAI (LLM) ağ geçidi
+Tüm servisler tek bir bağlantı havuzunu (HTTP keep-alive), eşzamanlılık
+sınırını ve yeniden deneme politikasını paylaşır.
+"""
+
+import asyncio
+import threading
+import weakref
+from typing import Any, Dict, List
+
+import httpx
+import openai
+from django.conf import settings
+
+
+class LLMGateway:
+    """Paylaşılan senkron + asyncio OpenAI istemcisi"""
+
+    def __init__(self, api_key: str = None, base_url: str = None, max_concurrency: int = None,
+                 max_retries: int = None, timeout: float = None):
+        self.api_key = api_key if api_key is not None else settings.OPENAI_API_KEY
+        # Yerel sahte OpenAI uyumlu sunucuya yönlendirmek için (testler)
+        self.base_url = base_url if base_url is not None else settings.LLM_BASE_URL
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        # Yeniden denemeler istemcinin üstel geri çekilmesiyle yapılır (429, 5xx, bağlantı hataları)
+        self.max_retries = max_retries if max_retries is not None else settings.LLM_MAX_RETRIES
+        self.timeout = timeout or settings.LLM_TIMEOUT
+
+        self._client = None
+        self._client_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        # Async istemci ve semafor olay döngüsüne bağlıdır; döngü başına bir tane
+        self._async_resources = weakref.WeakKeyDictionary()
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_concurrency,
+            max_keepalive_connections=self.max_concurrency,
+            keepalive_expiry=settings.LLM_KEEPALIVE_SECONDS
+        )
+
+    @property
+    def client(self) -> openai.OpenAI:
+        """Paylaşılan senkron istemci (ilk kullanımda oluşturulur)"""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = openai.OpenAI(
+                        api_key=self.api_key,
+                        base_url=self.base_url,
+                        max_retries=self.max_retries,
+                        timeout=self.timeout,
+                        http_client=openai.DefaultHttpxClient(limits=self._limits())
+                    )
+        return self._client
+
+    def _async_state(self):
+        """Çalışan olay döngüsüne ait (istemci, semafor) çifti"""
+        loop = asyncio.get_running_loop()
+        state = self._async_resources.get(loop)
+        if state is None:
+            client = openai.AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=self.max_retries,
+                timeout=self.timeout,
+                http_client=openai.DefaultAsyncHttpxClient(limits=self._limits())
+            )
+            state = (client, asyncio.Semaphore(self.max_concurrency))
+            self._async_resources[loop] = state
+        return state
+
+    def chat_completion(self, messages: List[Dict[str, Any]], model: str = "gpt-3.5-turbo", **kwargs):
+        """Senkron chat completion (eşzamanlılık sınırı içinde)"""
+        with self._semaphore:
+            return self.client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+    async def achat_completion(self, messages: List[Dict[str, Any]], model: str = "gpt-3.5-turbo", **kwargs):
+        """asyncio chat completion (eşzamanlılık sınırı içinde)"""
+        client, semaphore = self._async_state()
+        async with semaphore:
+            return await client.chat.completions.create(model=model, messages=messages, **kwargs)
+
+    async def agather_chat_completions(self, requests: List[Dict[str, Any]],
+                                       return_exceptions: bool = True) -> List[Any]:
+        """Birden çok isteği eşzamanlı çalıştır; her biri achat_completion kwargs'ıdır"""
+        return await asyncio.gather(
+            *(self.achat_completion(**request) for request in requests),
+            return_exceptions=return_exceptions
+        )
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """Süreç genelindeki tek LLM ağ geçidini döndür"""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                _gateway = LLMGateway()
+    return _gateway
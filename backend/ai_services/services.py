@@ -2,10 +2,10 @@
 OpenAI GPT entegrasyonlu finans asistanı servisleri
 """
 
-import openai
-from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from .llm_gateway import get_llm_gateway
+
 User = get_user_model()
 
 
@@ -13,7 +13,7 @@ class FinancialAIService:
     """OpenAI GPT ile finansal AI servisi"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def process_message(self, message, user):
         """Kullanıcı mesajını GPT ile işler ve finansal tavsiye verir"""
@@ -25,7 +25,7 @@ class FinancialAIService:
             system_prompt = self._create_system_prompt(user_context)
             
             # GPT'ye gönder
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-4",
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -140,7 +140,7 @@ class CreditAnalysisService:
     """Kredi analiz servisi"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def analyze_credit_worthiness(self, user, monthly_income=None, monthly_expenses=None, existing_debts=0):
         """GPT ile kredi uygunluk analizi"""
@@ -166,7 +166,7 @@ Lütfen şunları analiz et:
 
 Türkçe ve detaylı bir analiz yap."""
 
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1000,
@@ -236,7 +236,7 @@ class StockAnalysisService:
     """Borsa analiz servisi"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def get_market_overview(self, user):
         """GPT ile güncel piyasa analizi"""
@@ -254,7 +254,7 @@ GÜNCEL PIYASA ANALİZİ GEREKLİ:
 Türkçe, emoji kullanarak ve güncel verilerle yanıt ver.
 Not: Gerçek güncel verileri kullan, varsayım yapma."""
 
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1200,
@@ -306,7 +306,7 @@ class BudgetOptimizationService:
     """Bütçe optimizasyon servisi"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def optimize_budget(self, user, financial_data=None):
         """GPT ile kişiselleştirilmiş bütçe optimizasyonu"""
@@ -338,7 +338,7 @@ Türkiye'deki yaşam koşulları ve ekonomik gerçekleri dikkate alarak:
 
 Türkiye şartlarına uygun, uygulanabilir tavsiyeler ver."""
 
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 max_tokens=1200,
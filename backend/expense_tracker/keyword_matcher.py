@@ -0,0 +1,127 @@
+"""
+Finobai - Derlenmiş Anahtar Kelime Eşleştirici
+Fallback kategorilendirme için tüm kategori anahtar kelimelerini tek bir
+Aho-Corasick otomatında toplar; bir açıklama tek geçişte taranır.
+"""
+
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Tuple, Union
+
+from .text_utils import turkish_casefold
+
+
+# Kategori → anahtar kelimeler; (kelime, ağırlık) verilmeyenlerin ağırlığı 1.0
+CATEGORY_KEYWORDS: Dict[str, List[Union[str, Tuple[str, float]]]] = {
+    'food': ['market', 'migros', 'carrefour', 'bim', 'şok', 'a101', 'restaurant', 'restoran',
+             'yemek', 'kahve', 'cafe', 'starbucks', 'mcdonalds', 'burger', 'pizza', 'lokanta',
+             'mutfak', 'gıda', 'food', 'grocery', 'süt', 'ekmek', ('et', 0.5), 'sebze', 'meyve'],
+    'transport': ['benzin', 'petrol', 'shell', 'bp', 'opet', 'lukoil', 'taksi', 'uber',
+                  'bitaksi', 'otobüs', 'metro', 'dolmuş', 'araç', 'transport', 'fuel',
+                  'garage', ('oto', 0.5), 'servis', 'lastik', 'yağ', 'akaryakıt'],
+    'entertainment': ['sinema', 'cinema', 'netflix', 'spotify', 'youtube', 'disney', 'amazon prime',
+                      'eglence', 'eğlence', 'oyun', 'game', 'konsol', 'ps5', 'xbox', 'steam', 'tiyatro',
+                      'konser', 'müzik', 'film', 'kitap', 'book'],
+    'bills': ['elektrik', ('su', 0.5), 'doğalgaz', 'internet', 'telefon', 'vodafone', 'turkcell',
+              'türk telekom', 'fatura', 'bill', 'abonelik', 'subscription', 'netflix',
+              'spotify', 'utilities', 'belediye', 'vergi', 'tax'],
+    'shopping': ['mağaza', 'store', 'shop', 'amazon', 'trendyol', 'hepsiburada', 'gittigidiyor',
+                 'zara', 'h&m', 'lcwaikiki', 'koton', 'defacto', 'mango', 'boyner',
+                 'giyim', 'ayakkabı', 'çanta', 'teknoloji', 'elektronik', 'telefon', 'laptop'],
+    'health': ['eczane', 'pharmacy', 'hastane', 'hospital', 'doktor', 'doctor', 'ilac', 'ilaç', 'medicine',
+               'sağlık', 'health', 'diş', 'dental', 'göz', 'eye', 'clinic', 'klinik', 'tedavi'],
+    'education': ['okul', 'school', 'kurs', 'course', 'eğitim', 'education', 'kitap', 'book',
+                  'kırtasiye', 'stationery', 'university', 'üniversite', 'özel ders', 'dershane'],
+    'housing': ['kira', 'rent', ('ev', 0.5), 'home', 'house', 'apartman', ('site', 0.5), 'housing',
+                'tamir', 'repair', 'boyama', 'paint', 'mobilya', 'furniture', 'ikea'],
+    'investment': ['yatırım', 'investment', 'hisse', 'stock', 'kripto', 'crypto', 'bitcoin',
+                   'borsa', 'exchange', 'fond', 'fund', 'altın', 'gold', 'döviz', 'forex']
+}
+
+# Bu uzunluktaki ve daha kısa kelimeler tam kelime olarak eşleşmeli ("et" ≠ "market")
+_SHORT_KEYWORD_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class KeywordMatch:
+    """Metinde bulunan bir anahtar kelime"""
+    keyword: str
+    category: str
+    weight: float
+    start: int
+
+
+class KeywordMatcher:
+    """Çok desenli (Aho-Corasick) anahtar kelime eşleştirici
+
+    Metin ve kelimeler Türkçe kurallarıyla küçük harfe çevrilir (I/ı/İ → i).
+    Kelimeler bir kelime başında eşleşmelidir; Türkçe ekler ("marketi",
+    "eczanesi") için uzun kelimelerin sonunda sınır aranmaz, kısa kelimeler
+    ise tam kelime olarak eşleşir.
+    """
+
+    def __init__(self, category_keywords: Dict[str, List[Union[str, Tuple[str, float]]]]):
+        # Düğüm başına: geçişler, hata bağlantısı, çıktılar (kelime, kategori, ağırlık)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._outputs: List[List[Tuple[str, str, float]]] = [[]]
+
+        for category, keywords in category_keywords.items():
+            for entry in keywords:
+                keyword, weight = entry if isinstance(entry, tuple) else (entry, 1.0)
+                self._add(turkish_casefold(keyword), category, weight)
+        self._build_failure_links()
+
+    def _add(self, keyword: str, category: str, weight: float):
+        node = 0
+        for ch in keyword:
+            next_node = self._goto[node].get(ch)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][ch] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._outputs.append([])
+            node = next_node
+        self._outputs[node].append((keyword, category, weight))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                # Sonek olan kelimelerin çıktıları da bu düğümde raporlanır
+                self._outputs[child] = self._outputs[child] + self._outputs[self._fail[child]]
+
+    def find(self, text: str) -> List[KeywordMatch]:
+        """Metindeki tüm anahtar kelimeleri tek geçişte bul"""
+        text = turkish_casefold(text)
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        matches = []
+        node = 0
+        for end, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for keyword, category, weight in outputs[node]:
+                start = end - len(keyword) + 1
+                if self._is_word_match(text, keyword, start, end):
+                    matches.append(KeywordMatch(keyword, category, weight, start))
+        return matches
+
+    @staticmethod
+    def _is_word_match(text: str, keyword: str, start: int, end: int) -> bool:
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if len(keyword) <= _SHORT_KEYWORD_LENGTH:
+            return end + 1 >= len(text) or not text[end + 1].isalnum()
+        return True
+
+
+# Modül yüklenirken bir kez derlenir
+keyword_matcher = KeywordMatcher(CATEGORY_KEYWORDS)
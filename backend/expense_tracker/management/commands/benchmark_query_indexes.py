@@ -0,0 +1,187 @@
+"""
+Sıcak tarih aralığı sorgularının sorgu planlarını ve sürelerini,
+bileşik indeksler varken ve kaldırılmışken karşılaştırır.
+
+Veri tek bir veritabanı işlemi içinde üretilir ve sonunda geri alınır;
+mevcut verilere dokunulmaz (SQLite ve PostgreSQL'de DDL işlem içindedir).
+
+    python manage.py benchmark_query_indexes --rows 20000
+"""
+
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from expense_tracker.models import CreditCardStatement, Expense, ExpenseCategory, StatementTransaction
+from goal_tracker.models import FinancialGoal, GoalContribution
+from stock_market.models import StockPrice, StockSymbol
+
+
+class BenchmarkRollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Bileşik indekslerin sorgu planına ve süresine etkisini ölçer (veriler geri alınır)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=20000, help='Tablo başına üretilecek satır sayısı')
+        parser.add_argument('--repeat', type=int, default=20, help='Sorgu başına tekrar sayısı')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        try:
+            with transaction.atomic():
+                self.stdout.write(f"Seeding {rows} rows per table ({connection.vendor})...")
+                queries = self._seed(rows)
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                with_indexes = self._measure(queries, repeat)
+                self._drop_indexes(queries)
+                without_indexes = self._measure(queries, repeat)
+
+                self._report(queries, with_indexes, without_indexes)
+                raise BenchmarkRollback()
+        except BenchmarkRollback:
+            self.stdout.write(self.style.SUCCESS('Benchmark verileri geri alındı.'))
+
+    def _seed(self, rows: int):
+        now = timezone.now()
+        rng = random.Random(42)
+
+        users = [User.objects.create(username=f'benchmark_user_{i}_{now.timestamp():.0f}') for i in range(20)]
+        user = users[0]
+        category, _ = ExpenseCategory.objects.get_or_create(name='food')
+
+        # Harcamalar: 20 kullanıcıya dağılmış, son 3 yıl
+        Expense.objects.bulk_create([
+            Expense(
+                user=users[i % len(users)],
+                category=category,
+                title=f'Harcama {i}',
+                amount=Decimal(rng.randint(10, 5000)),
+                expense_date=now - timedelta(days=rng.randint(0, 3 * 365), minutes=rng.randint(0, 1440)),
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        # Ekstre işlemleri: son 3 yıl
+        statement = CreditCardStatement.objects.create(
+            file_name='benchmark.csv', total_amount=0, transaction_count=rows, avg_transaction=0,
+            start_date=(now - timedelta(days=3 * 365)).date(), end_date=now.date(),
+            category_analysis={}, top_categories=[], insights=[]
+        )
+        categories = ['food', 'transport', 'bills', 'shopping', 'health', 'other']
+        StatementTransaction.objects.bulk_create([
+            StatementTransaction(
+                statement=statement,
+                date=(now - timedelta(days=rng.randint(0, 3 * 365))).date(),
+                description=f'ISLEM {i}',
+                amount=Decimal(rng.randint(10, 5000)),
+                category=rng.choice(categories),
+            )
+            for i in range(rows)
+        ], batch_size=1000)
+
+        # Fiyatlar: saatlik tikler (timestamp auto_now_add olduğu için tik başına güncellenir)
+        symbols = StockSymbol.objects.bulk_create([
+            StockSymbol(symbol=f'BNCH{i}', name=f'Benchmark {i}', market='BIST') for i in range(100)
+        ])
+        for tick in range(max(1, rows // len(symbols))):
+            prices = StockPrice.objects.bulk_create([
+                StockPrice(
+                    stock=symbol, open_price=10, current_price=10, high_price=10, low_price=10,
+                    change_percent=Decimal(rng.randint(-1000, 1000)) / 100
+                )
+                for symbol in symbols
+            ])
+            StockPrice.objects.filter(id__in=[p.id for p in prices]).update(timestamp=now - timedelta(hours=tick))
+
+        # Hedef katkıları: 50 hedef, günlük
+        goals = [
+            FinancialGoal.objects.create(
+                user=user, name=f'Hedef {i}', category='house', target_amount=100000,
+                target_date=(now + timedelta(days=365)).date(), monthly_contribution=1000
+            )
+            for i in range(50)
+        ]
+        per_goal = max(1, rows // len(goals))
+        for day in range(per_goal):
+            contributions = GoalContribution.objects.bulk_create([
+                GoalContribution(goal=goal, amount=Decimal(rng.randint(100, 2000))) for goal in goals
+            ])
+            GoalContribution.objects.filter(id__in=[c.id for c in contributions]).update(date=now - timedelta(days=day))
+
+        month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+        return [
+            (
+                'Expense(user, expense_date aralığı)',
+                Expense, 'expense_user_date_idx',
+                lambda: Expense.objects.filter(
+                    user=user, expense_date__year=now.year, expense_date__month=now.month
+                ).aggregate(total=Sum('amount')),
+                lambda: Expense.objects.filter(user=user, expense_date__year=now.year, expense_date__month=now.month),
+            ),
+            (
+                'StatementTransaction(date aralığı) GROUP BY category',
+                StatementTransaction, 'stmt_txn_date_cat_amt_idx',
+                lambda: list(self._monthly_statement_query(month_start)),
+                lambda: self._monthly_statement_query(month_start),
+            ),
+            (
+                'StockPrice(timestamp >= now-24h) ORDER BY change_percent',
+                StockPrice, 'stockprice_ts_change_idx',
+                lambda: list(self._trending_query(now)),
+                lambda: self._trending_query(now),
+            ),
+            (
+                'GoalContribution(goal, date aralığı)',
+                GoalContribution, 'goalcontrib_goal_date_idx',
+                lambda: list(GoalContribution.objects.filter(goal=goals[0], date__gte=now - timedelta(days=30))),
+                lambda: GoalContribution.objects.filter(goal=goals[0], date__gte=now - timedelta(days=30)),
+            ),
+        ]
+
+    def _monthly_statement_query(self, month_start):
+        return StatementTransaction.objects.filter(
+            date__gte=month_start.date(),
+            date__lt=(month_start + timedelta(days=32)).replace(day=1).date()
+        ).values('category').annotate(total=Sum('amount'), count=Count('id')).order_by()
+
+    def _trending_query(self, now):
+        return StockPrice.objects.filter(
+            timestamp__gte=now - timedelta(hours=24)
+        ).order_by('-change_percent')[:10]
+
+    def _measure(self, queries, repeat: int):
+        results = []
+        for name, model, index_name, run, queryset in queries:
+            run()  # Isınma
+            started = time.perf_counter()
+            for _ in range(repeat):
+                run()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            results.append((queryset().explain(), elapsed_ms))
+        return results
+
+    def _drop_indexes(self, queries):
+        with connection.cursor() as cursor:
+            for name, model, index_name, run, queryset in queries:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index_name)}')
+            cursor.execute('ANALYZE')
+
+    def _report(self, queries, with_indexes, without_indexes):
+        for (name, *_), (plan_with, ms_with), (plan_without, ms_without) in zip(queries, with_indexes, without_indexes):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}'))
+            self.stdout.write(f'  İndekssiz ({ms_without:.2f} ms):\n    ' + plan_without.replace('\n', '\n    '))
+            self.stdout.write(f'  İndeksli  ({ms_with:.2f} ms):\n    ' + plan_with.replace('\n', '\n    '))
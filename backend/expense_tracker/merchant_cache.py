@@ -0,0 +1,202 @@
+"""
+Finobai - İşyeri Kategori Önbelleği
+Ekstre açıklamalarını normalize ederek (terminal numarası, tarih, şehir eki
+temizlenir) aynı işyeri için LLM'e tekrar sorulmasını engeller. Kullanıcı
+düzeltmeleri AI sonuçlarının üzerine yazılmaz; kullanıcıya özel kayıtlar
+(MerchantCategoryOverride) genel kayıttan önce okunur.
+"""
+
+import re
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db.models import F
+from django.utils import timezone
+
+from .models import MerchantCategory, MerchantCategoryOverride
+from .text_utils import fold_turkish
+
+
+_DATE_RE = re.compile(r'\b\d{1,4}[./-]\d{1,2}(?:[./-]\d{2,4})?\b')
+_TIME_RE = re.compile(r'\b\d{1,2}:\d{2}(?::\d{2})?\b')
+_SEPARATOR_RE = re.compile(r'[^a-z0-9&]+')
+
+# Terminal/referans belirteçleri (ardından gelen numara ayrıca silinir)
+_REFERENCE_TOKENS = {'tid', 'mid', 'ref', 'no', 'term', 'terminal', 'pos', 'prov', 'provizyon'}
+
+# Açıklama sonuna eklenen şehir/ülke bilgisi (fold_turkish uygulanmış)
+_LOCATION_SUFFIXES = {
+    'tr', 'tur', 'turkey', 'turkiye',
+    'adana', 'adiyaman', 'afyon', 'afyonkarahisar', 'agri', 'aksaray', 'amasya', 'ankara',
+    'antalya', 'ardahan', 'artvin', 'aydin', 'balikesir', 'bartin', 'batman', 'bayburt',
+    'bilecik', 'bingol', 'bitlis', 'bolu', 'burdur', 'bursa', 'canakkale', 'cankiri',
+    'corum', 'denizli', 'diyarbakir', 'duzce', 'edirne', 'elazig', 'erzincan', 'erzurum',
+    'eskisehir', 'gaziantep', 'giresun', 'gumushane', 'hakkari', 'hatay', 'igdir', 'isparta',
+    'istanbul', 'ist', 'izmir', 'kahramanmaras', 'karabuk', 'karaman', 'kars', 'kastamonu',
+    'kayseri', 'kilis', 'kirikkale', 'kirklareli', 'kirsehir', 'kocaeli', 'izmit', 'konya',
+    'kutahya', 'malatya', 'manisa', 'mardin', 'mersin', 'mugla', 'mus', 'nevsehir', 'nigde',
+    'ordu', 'osmaniye', 'rize', 'sakarya', 'samsun', 'sanliurfa', 'siirt', 'sinop', 'sirnak',
+    'sivas', 'tekirdag', 'tokat', 'trabzon', 'tunceli', 'usak', 'van', 'yalova', 'yozgat',
+    'zonguldak',
+}
+
+
+def normalize_merchant(description: str) -> str:
+    """Ekstre açıklamasından işyeri anahtarı üret
+
+    "MIGROS 4521 KADIKOY ISTANBUL TR 12.03.2024" gibi bir açıklamadan tarih,
+    saat, terminal numarası ve sondaki şehir/ülke ekleri atılır.
+    """
+    text = fold_turkish(description or '')
+    text = _DATE_RE.sub(' ', text)
+    text = _TIME_RE.sub(' ', text)
+
+    tokens = []
+    for token in _SEPARATOR_RE.split(text):
+        if not token or token in _REFERENCE_TOKENS:
+            continue
+        digit_count = sum(ch.isdigit() for ch in token)
+        # Saf numaralar ve uzun numara içeren parçalar terminal/işlem kimliğidir ("A101" korunur)
+        if token.isdigit() or digit_count >= 4:
+            continue
+        tokens.append(token)
+
+    while len(tokens) > 1 and tokens[-1] in _LOCATION_SUFFIXES:
+        tokens.pop()
+
+    return ' '.join(tokens)[:255]
+
+
+class MerchantCategoryCache:
+    """MerchantCategory tablosu üzerinde toplu okuma/yazma
+
+    `user` verilirse o kullanıcının kendi kayıtları genel kayıtlara göre önceliklidir.
+    """
+
+    def __init__(self, user=None):
+        self.user = user if user is not None and user.is_authenticated else None
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, dict]:
+        """Normalize anahtarlar için kayıtlı kategorileri (kullanıcınınkiler önce) getir"""
+        keys = {key for key in keys if key}
+        if not keys:
+            return {}
+
+        results = {}
+        if self.user is not None:
+            overrides = MerchantCategoryOverride.objects.filter(user=self.user, normalized_name__in=keys)
+            results = {override.normalized_name: self._override_result(override) for override in overrides}
+            keys -= set(results)
+            if not keys:
+                return results
+
+        entries = list(MerchantCategory.objects.filter(normalized_name__in=keys))
+        if entries:
+            MerchantCategory.objects.filter(id__in=[entry.id for entry in entries]).update(
+                hit_count=F('hit_count') + 1
+            )
+        results.update({entry.normalized_name: self._to_result(entry) for entry in entries})
+        return results
+
+    def store(self, results: Dict[str, Tuple[str, dict]]):
+        """AI sonuçlarını kaydet: {anahtar: (örnek açıklama, sonuç)}
+
+        Yeni işyerleri toplu eklenir (çakışanlar atlanır); var olan kayıtlar
+        yalnızca source='ai' koşuluyla güncellenir. Koşul UPDATE içinde
+        olduğundan araya giren kullanıcı düzeltmesi de korunur.
+        """
+        keys = [key for key in results if key]
+        if not keys:
+            return
+
+        entries = {
+            key: MerchantCategory(
+                normalized_name=key,
+                sample_description=description[:255],
+                category=result['category'],
+                confidence=float(result.get('confidence', 0.5)),
+                is_necessary=bool(result.get('is_necessary', False)),
+                tags=list(result.get('tags') or [])[:3],
+                source='ai',
+            )
+            for key, (description, result) in results.items()
+            if key
+        }
+
+        try:
+            existing = set(
+                MerchantCategory.objects.filter(normalized_name__in=keys)
+                .values_list('normalized_name', flat=True)
+            )
+            MerchantCategory.objects.bulk_create(
+                [entry for key, entry in entries.items() if key not in existing],
+                batch_size=500,
+                ignore_conflicts=True,
+            )
+            # Önbellekte olmayanlar sorulduğundan burası yalnızca eşzamanlı yüklemelerde çalışır
+            now = timezone.now()
+            for key in existing:
+                entry = entries[key]
+                MerchantCategory.objects.filter(normalized_name=key, source='ai').update(
+                    sample_description=entry.sample_description,
+                    category=entry.category,
+                    confidence=entry.confidence,
+                    is_necessary=entry.is_necessary,
+                    tags=entry.tags,
+                    updated_at=now,
+                )
+        except Exception as e:
+            print(f"Merchant cache store error: {e}")
+
+    def correct(self, description: str, category: str, user=None) -> Optional[MerchantCategory]:
+        """Genel kayda düzeltme yaz (tüm kullanıcılarda AI yerine kullanılır; yalnızca yöneticiler)"""
+        key = normalize_merchant(description)
+        if not key:
+            return None
+
+        entry, _ = MerchantCategory.objects.update_or_create(
+            normalized_name=key,
+            defaults={
+                'sample_description': description[:255],
+                'category': category,
+                'confidence': 1.0,
+                'is_necessary': category in ('food', 'bills', 'health', 'housing', 'transport'),
+                'source': 'user',
+                'corrected_by': user if user is not None and user.is_authenticated else None,
+            }
+        )
+        return entry
+
+    def override(self, description: str, category: str, user) -> Optional[MerchantCategoryOverride]:
+        """Kullanıcının kendi düzeltmesini kaydet (yalnızca onun yüklemelerinde kullanılır)"""
+        key = normalize_merchant(description)
+        if not key:
+            return None
+
+        override, _ = MerchantCategoryOverride.objects.update_or_create(
+            user=user,
+            normalized_name=key,
+            defaults={
+                'sample_description': description[:255],
+                'category': category,
+                'is_necessary': category in ('food', 'bills', 'health', 'housing', 'transport'),
+            }
+        )
+        return override
+
+    def _override_result(self, override: MerchantCategoryOverride) -> dict:
+        return {
+            "category": override.category,
+            "confidence": 1.0,
+            "is_necessary": override.is_necessary,
+            "tags": [],
+            "analysis": "Kullanıcı düzeltmesi"
+        }
+
+    def _to_result(self, entry: MerchantCategory) -> dict:
+        return {
+            "category": entry.category,
+            "confidence": entry.confidence,
+            "is_necessary": entry.is_necessary,
+            "tags": entry.tags,
+            "analysis": "Kullanıcı düzeltmesi" if entry.source == 'user' else "İşyeri önbelleğinden"
+        }
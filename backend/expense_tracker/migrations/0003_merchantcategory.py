@@ -0,0 +1,38 @@
+# Generated by Django 5.2.5 on 2026-10-16 10:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_tracker', '0002_creditcardstatement_statementtransaction'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_name', models.CharField(max_length=255, unique=True)),
+                ('sample_description', models.CharField(max_length=255)),
+                ('category', models.CharField(choices=[('food', '🍽️ Gıda & İçecek'), ('transport', '🚗 Ulaşım'), ('entertainment', '🎬 Eğlence'), ('bills', '💡 Faturalar'), ('shopping', '🛍️ Alışveriş'), ('health', '🏥 Sağlık'), ('education', '📚 Eğitim'), ('investment', '📈 Yatırım'), ('housing', '🏠 Konut'), ('other', '📦 Diğer')], max_length=20)),
+                ('confidence', models.FloatField(default=0.5)),
+                ('is_necessary', models.BooleanField(default=False)),
+                ('tags', models.JSONField(blank=True, default=list)),
+                ('source', models.CharField(choices=[('ai', 'AI'), ('user', 'Kullanıcı Düzeltmesi')], default='ai', max_length=10)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('corrected_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='merchant_corrections', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'İşyeri Kategorisi',
+                'verbose_name_plural': 'İşyeri Kategorileri',
+                'ordering': ['normalized_name'],
+            },
+        ),
+    ]
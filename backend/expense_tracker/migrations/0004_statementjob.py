@@ -0,0 +1,39 @@
+# Generated by Django 5.2.5 on 2026-10-16 11:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_tracker', '0003_merchantcategory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatementJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('queued', 'Sırada'), ('running', 'İşleniyor'), ('completed', 'Tamamlandı'), ('failed', 'Başarısız')], default='queued', max_length=20)),
+                ('stage', models.CharField(blank=True, choices=[('parse', 'Ayrıştırma'), ('categorize', 'Kategorilendirme'), ('aggregate', 'Analiz'), ('persist', 'Kayıt')], max_length=20)),
+                ('processed_count', models.IntegerField(default=0)),
+                ('partial_result', models.JSONField(blank=True, default=dict)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('statement', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='expense_tracker.creditcardstatement')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='statement_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Ekstre İşi',
+                'verbose_name_plural': 'Ekstre İşleri',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
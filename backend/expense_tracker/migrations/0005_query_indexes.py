@@ -0,0 +1,21 @@
+# Generated by Django 5.2.5 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_tracker', '0004_statementjob'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'expense_date'], name='expense_user_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='statementtransaction',
+            index=models.Index(fields=['date', 'category', 'amount'], name='stmt_txn_date_cat_amt_idx'),
+        ),
+    ]
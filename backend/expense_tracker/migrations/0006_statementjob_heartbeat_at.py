@@ -0,0 +1,18 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_tracker', '0005_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='statementjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expense_tracker', '0006_statementjob_heartbeat_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MerchantCategoryOverride',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('normalized_name', models.CharField(max_length=255)),
+                ('sample_description', models.CharField(max_length=255)),
+                ('category', models.CharField(choices=[('food', '🍽️ Gıda & İçecek'), ('transport', '🚗 Ulaşım'), ('entertainment', '🎬 Eğlence'), ('bills', '💡 Faturalar'), ('shopping', '🛍️ Alışveriş'), ('health', '🏥 Sağlık'), ('education', '📚 Eğitim'), ('investment', '📈 Yatırım'), ('housing', '🏠 Konut'), ('other', '📦 Diğer')], max_length=20)),
+                ('is_necessary', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='merchant_overrides', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Kullanıcı İşyeri Kategorisi',
+                'verbose_name_plural': 'Kullanıcı İşyeri Kategorileri',
+                'ordering': ['normalized_name'],
+                'unique_together': {('user', 'normalized_name')},
+            },
+        ),
+    ]
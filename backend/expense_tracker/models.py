@@ -58,6 +58,10 @@ class Expense(models.Model):
         verbose_name = "Harcama"
         verbose_name_plural = "Harcamalar"
         ordering = ['-expense_date']
+        indexes = [
+            # Kullanıcının tarih aralığındaki harcamaları (aylık özet, öneriler)
+            models.Index(fields=['user', 'expense_date'], name='expense_user_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.user.username} - {self.title} - {self.amount}₺"
@@ -177,6 +181,110 @@ class StatementTransaction(models.Model):
         verbose_name = "Ekstre İşlemi"
         verbose_name_plural = "Ekstre İşlemleri"
         ordering = ['-date']
+        indexes = [
+            # Aylık özet: tarih aralığı + kategori bazında toplam (tablo okumadan)
+            models.Index(fields=['date', 'category', 'amount'], name='stmt_txn_date_cat_amt_idx'),
+        ]
     
     def __str__(self):
         return f"{self.description} - ₺{self.amount}"
+
+
+class StatementJob(models.Model):
+    """Arka planda işlenen ekstre yükleme işi"""
+    
+    STATUS_CHOICES = [
+        ('queued', 'Sırada'),
+        ('running', 'İşleniyor'),
+        ('completed', 'Tamamlandı'),
+        ('failed', 'Başarısız')
+    ]
+    
+    STAGE_CHOICES = [
+        ('parse', 'Ayrıştırma'),
+        ('categorize', 'Kategorilendirme'),
+        ('aggregate', 'Analiz'),
+        ('persist', 'Kayıt')
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='statement_jobs', null=True, blank=True)
+    file_name = models.CharField(max_length=255)
+    
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    stage = models.CharField(max_length=20, choices=STAGE_CHOICES, blank=True)
+    processed_count = models.IntegerField(default=0)
+    
+    # Kısmi (işlenen parçalara göre) ve nihai analiz
+    partial_result = models.JSONField(default=dict, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    statement = models.ForeignKey(CreditCardStatement, on_delete=models.SET_NULL, null=True, blank=True,
+                                  related_name='jobs')
+    error = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    # İşi kuyruğunda tutan sürecin son canlılık sinyali (süreç ölünce güncellenmez)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        verbose_name = "Ekstre İşi"
+        verbose_name_plural = "Ekstre İşleri"
+        ordering = ['-created_at']
+    
+    def __str__(self):
+        return f"{self.file_name} - {self.get_status_display()}"
+
+
+class MerchantCategory(models.Model):
+    """Normalize edilmiş işyeri açıklaması → kategori önbelleği"""
+    
+    SOURCE_CHOICES = [
+        ('ai', 'AI'),
+        ('user', 'Kullanıcı Düzeltmesi')
+    ]
+    
+    normalized_name = models.CharField(max_length=255, unique=True)
+    sample_description = models.CharField(max_length=255)
+    category = models.CharField(max_length=20, choices=ExpenseCategory.CATEGORY_CHOICES)
+    confidence = models.FloatField(default=0.5)
+    is_necessary = models.BooleanField(default=False)
+    tags = models.JSONField(default=list, blank=True)
+    
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES, default='ai')
+    corrected_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='merchant_corrections')
+    hit_count = models.IntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "İşyeri Kategorisi"
+        verbose_name_plural = "İşyeri Kategorileri"
+        ordering = ['normalized_name']
+    
+    def __str__(self):
+        return f"{self.normalized_name} → {self.category} ({self.get_source_display()})"
+
+
+class MerchantCategoryOverride(models.Model):
+    """Kullanıcının kendi işyeri kategorisi (genel önbellekten önce okunur)"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='merchant_overrides')
+    normalized_name = models.CharField(max_length=255)
+    sample_description = models.CharField(max_length=255)
+    category = models.CharField(max_length=20, choices=ExpenseCategory.CATEGORY_CHOICES)
+    is_necessary = models.BooleanField(default=False)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = "Kullanıcı İşyeri Kategorisi"
+        verbose_name_plural = "Kullanıcı İşyeri Kategorileri"
+        unique_together = ['user', 'normalized_name']
+        ordering = ['normalized_name']
+    
+    def __str__(self):
+        return f"{self.user.username}: {self.normalized_name} → {self.category}"
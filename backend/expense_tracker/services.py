@@ -1,30 +1,49 @@
 import json
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
 from django.db.models import Sum, Q
 from django.contrib.auth.models import User
 from decimal import Decimal
-import openai
 from django.conf import settings
 
+from ai_services.llm_gateway import get_llm_gateway
+
+from .keyword_matcher import CATEGORY_KEYWORDS, keyword_matcher
+from .merchant_cache import MerchantCategoryCache, normalize_merchant
 from .models import Expense, ExpenseCategory, Budget, ExpenseInsight
 
 
+EXPENSE_CATEGORY_CODES = (
+    'food', 'transport', 'entertainment', 'bills', 'shopping',
+    'health', 'education', 'investment', 'housing', 'other'
+)
+
+
 class ExpenseAnalysisService:
     """Harcama analizi ve AI önerileri servisi"""
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+    def __init__(self, user=None):
+        self.llm = get_llm_gateway()
+        # Kullanıcının kendi işyeri düzeltmeleri genel önbellekten önce okunur
+        self.merchant_cache = MerchantCategoryCache(user)
     
     def analyze_expense_text(self, expense_text: str, amount: float) -> dict:
         """
         Harcama metnini analiz ederek kategori ve etiketleri belirler
         """
         try:
+            # Bu işyeri daha önce kategorilendirildiyse LLM'e sorma
+            merchant_key = normalize_merchant(expense_text)
+            cached = self.merchant_cache.lookup([merchant_key]).get(merchant_key)
+            if cached:
+                return cached
+            
             # Önce basit keyword tabanlı kategorilendirme dene
             fallback_result = self._get_fallback_categorization(expense_text, amount)
             
             # OpenAI API ile analiz et
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
@@ -62,61 +81,153 @@ JSON formatında yanıt ver:
             )
             
             result = json.loads(response.choices[0].message.content)
+            if result.get('category') in EXPENSE_CATEGORY_CODES:
+                self.merchant_cache.store({merchant_key: (expense_text, result)})
             return result
             
         except Exception as e:
             print(f"OpenAI API error, using fallback: {e}")
             # OpenAI API'si çalışmıyorsa fallback kullan
             return self._get_fallback_categorization(expense_text, amount)
-    
+
+    def categorize_expenses_batch(self, items: List[Tuple[str, float]]) -> List[dict]:
+        """
+        Çok sayıda harcamayı toplu kategorilendirir (ekstre yüklemeleri için)
+
+        Önce işyeri önbelleğine bakılır; yalnızca bilinmeyen işyerleri (her biri
+        bir kez) parçalar halinde tek prompt'ta LLM'e gönderilir, parçalar sınırlı
+        eşzamanlılıkla çalışır. Sonuç listesi `items` ile aynı sıradadır; LLM'in
+        yanıtlamadığı satırlar keyword fallback ile doldurulur.
+        """
+        if not items:
+            return []
+
+        keys = [normalize_merchant(text) for text, _ in items]
+        known = self.merchant_cache.lookup(keys)
+
+        # Bilinmeyen her işyeri için ilk görülen açıklama sorulur
+        pending = {}
+        for (text, amount), key in zip(items, keys):
+            if key and key not in known and key not in pending:
+                pending[key] = (text.strip(), amount)
+
+        if pending:
+            llm_results = self._categorize_with_llm(list(pending.values()))
+            learned = {
+                key: (item[0], llm_results[item])
+                for key, item in pending.items()
+                if item in llm_results
+            }
+            self.merchant_cache.store(learned)
+            known.update({key: result for key, (_, result) in learned.items()})
+
+        categorized = []
+        for (text, amount), key in zip(items, keys):
+            result = known.get(key) if key else None
+            categorized.append(result or self._get_fallback_categorization(text, amount))
+        return categorized
+
+    def _categorize_with_llm(self, items: List[Tuple[str, float]]) -> Dict[Tuple[str, float], dict]:
+        """Harcamaları parçalar halinde, sınırlı eşzamanlılıkla LLM'e sor"""
+        batch_size = max(1, settings.EXPENSE_CATEGORIZATION_BATCH_SIZE)
+        chunks = [items[i:i + batch_size] for i in range(0, len(items), batch_size)]
+
+        results = {}
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(settings.EXPENSE_CATEGORIZATION_MAX_WORKERS, len(chunks))),
+            thread_name_prefix='expense-categorize'
+        )
+        try:
+            futures = {executor.submit(self._categorize_chunk, chunk): chunk for chunk in chunks}
+            done, not_done = wait(futures, timeout=settings.EXPENSE_CATEGORIZATION_TIMEOUT)
+            for future in done:
+                try:
+                    results.update(future.result())
+                except Exception as e:
+                    print(f"Batch categorization error, using fallback: {e}")
+            if not_done:
+                print(f"Batch categorization timed out for {len(not_done)} chunk(s), using fallback")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    def _categorize_chunk(self, chunk: List[Tuple[str, float]]) -> Dict[Tuple[str, float], dict]:
+        """Bir parça harcamayı tek LLM çağrısıyla kategorilendir"""
+        lines = '\n'.join(
+            f"{index}. {text} | {amount}₺" for index, (text, amount) in enumerate(chunk, start=1)
+        )
+        response = self.llm.chat_completion(
+            model="gpt-3.5-turbo",
+            messages=[
+                {
+                    "role": "system",
+                    "content": f"""Sen bir harcama analiz uzmanısın. Numaralı her harcama satırını ayrı ayrı kategorilendir.
+
+Kategoriler: {', '.join(EXPENSE_CATEGORY_CODES)}
+
+Sadece JSON formatında yanıt ver, her satır için bir sonuç:
+{{
+    "results": [
+        {{"index": 1, "category": "kategori_kodu", "confidence": 0.95, "is_necessary": true, "tags": ["etiket1", "etiket2"]}}
+    ]
+}}"""
+                },
+                {
+                    "role": "user",
+                    "content": lines
+                }
+            ],
+            # Satır başına ~50 token
+            max_tokens=100 + 50 * len(chunk),
+            temperature=0.2,
+            response_format={"type": "json_object"}
+        )
+
+        payload = json.loads(response.choices[0].message.content)
+        results = {}
+        for row in payload.get('results', []):
+            try:
+                index = int(row['index']) - 1
+            except (KeyError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(chunk) or row.get('category') not in EXPENSE_CATEGORY_CODES:
+                continue
+
+            text, amount = chunk[index]
+            try:
+                confidence = min(1.0, max(0.0, float(row.get('confidence', 0.5))))
+            except (TypeError, ValueError):
+                confidence = 0.5
+            results[(text, amount)] = {
+                "category": row['category'],
+                "confidence": confidence,
+                "is_necessary": bool(row.get('is_necessary', False)),
+                "tags": [str(tag) for tag in row.get('tags') or []][:3],
+                "analysis": "Toplu AI kategorilendirmesi"
+            }
+        return results
+
     def _get_fallback_categorization(self, expense_text: str, amount: float) -> dict:
         """Basit keyword tabanlı kategorilendirme (fallback)"""
-        text_lower = expense_text.lower()
+        # Tüm kategorilerin kelimeleri derlenmiş eşleştiriciyle tek geçişte taranır
+        scores = {}
+        category_matches = {}
+        for match in keyword_matcher.find(expense_text):
+            keywords = category_matches.setdefault(match.category, [])
+            if match.keyword not in keywords:
+                keywords.append(match.keyword)
+                scores[match.category] = scores.get(match.category, 0) + match.weight
         
-        # Keyword mapping
-        categories = {
-            'food': ['market', 'migros', 'carrefour', 'bim', 'şok', 'a101', 'restaurant', 'restoran', 
-                    'yemek', 'kahve', 'cafe', 'starbucks', 'mcdonalds', 'burger', 'pizza', 'lokanta',
-                    'mutfak', 'gıda', 'food', 'grocery', 'süt', 'ekmek', 'et', 'sebze', 'meyve'],
-            'transport': ['benzin', 'petrol', 'shell', 'bp', 'opet', 'lukoil', 'taksi', 'uber', 
-                         'bitaksi', 'otobüs', 'metro', 'dolmuş', 'araç', 'transport', 'fuel',
-                         'garage', 'oto', 'servis', 'lastik', 'yağ', 'akaryakıt'],
-            'entertainment': ['sinema', 'cinema', 'netflix', 'spotify', 'youtube', 'disney', 'amazon prime',
-                             'eglence', 'oyun', 'game', 'konsol', 'ps5', 'xbox', 'steam', 'tiyatro',
-                             'konser', 'müzik', 'film', 'kitap', 'book'],
-            'bills': ['elektrik', 'su', 'doğalgaz', 'internet', 'telefon', 'vodafone', 'turkcell', 
-                     'türk telekom', 'fatura', 'bill', 'abonelik', 'subscription', 'netflix',
-                     'spotify', 'utilities', 'belediye', 'vergi', 'tax'],
-            'shopping': ['mağaza', 'store', 'shop', 'amazon', 'trendyol', 'hepsiburada', 'gittigidiyor',
-                        'zara', 'h&m', 'lcwaikiki', 'koton', 'defacto', 'mango', 'boyner',
-                        'giyim', 'ayakkabı', 'çanta', 'teknoloji', 'elektronik', 'telefon', 'laptop'],
-            'health': ['eczane', 'pharmacy', 'hastane', 'hospital', 'doktor', 'doctor', 'ilac', 'medicine',
-                      'sağlık', 'health', 'diş', 'dental', 'göz', 'eye', 'clinic', 'klinik', 'tedavi'],
-            'education': ['okul', 'school', 'kurs', 'course', 'eğitim', 'education', 'kitap', 'book',
-                         'kırtasiye', 'stationery', 'university', 'üniversite', 'özel ders', 'dershane'],
-            'housing': ['kira', 'rent', 'ev', 'home', 'house', 'apartman', 'site', 'housing',
-                       'tamir', 'repair', 'boyama', 'paint', 'mobilya', 'furniture', 'ikea'],
-            'investment': ['yatırım', 'investment', 'hisse', 'stock', 'kripto', 'crypto', 'bitcoin',
-                          'borsa', 'exchange', 'fond', 'fund', 'altın', 'gold', 'döviz', 'forex']
-        }
-        
-        # En uygun kategoriyi bul
+        # En uygun kategoriyi bul (eşitlikte CATEGORY_KEYWORDS sırası)
         best_match = 'other'
         best_score = 0
         matched_keywords = []
         
-        for category, keywords in categories.items():
-            score = 0
-            category_matches = []
-            for keyword in keywords:
-                if keyword in text_lower:
-                    score += 1
-                    category_matches.append(keyword)
-            
-            if score > best_score:
-                best_score = score
+        for category in CATEGORY_KEYWORDS:
+            if scores.get(category, 0) > best_score:
+                best_score = scores[category]
                 best_match = category
-                matched_keywords = category_matches
+                matched_keywords = category_matches[category]
         
         # Güven skorunu hesapla
         confidence = min(0.85, 0.4 + (best_score * 0.15))
@@ -266,7 +377,7 @@ JSON formatında yanıt ver:
         """
         
         try:
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {
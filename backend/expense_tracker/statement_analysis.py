@@ -0,0 +1,300 @@
+"""
+Finobai - Kredi Kartı Ekstresi Analizi
+Kategorilendirilmiş işlemleri parça parça toplayarak ekstre özetini,
+kategori dağılımını ve içgörüleri üretir; ekstreyi veritabanına kaydeder.
+"""
+
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, List
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+
+from .models import CreditCardStatement, StatementTransaction
+from .services import ExpenseAnalysisService
+
+
+# Kategori → (ikon, ad, renk)
+CATEGORY_DISPLAY = {
+    'food': ('🍽️', 'Gıda & İçecek', '#ef4444'),
+    'transport': ('🚗', 'Ulaşım', '#3b82f6'),
+    'entertainment': ('🎬', 'Eğlence', '#8b5cf6'),
+    'bills': ('💡', 'Faturalar', '#f59e0b'),
+    'shopping': ('🛍️', 'Alışveriş', '#ec4899'),
+    'health': ('🏥', 'Sağlık', '#10b981'),
+    'education': ('📚', 'Eğitim', '#06b6d4'),
+    'investment': ('📈', 'Yatırım', '#84cc16'),
+    'housing': ('🏠', 'Konut', '#f97316'),
+    'other': ('📦', 'Diğer', '#6366f1')
+}
+
+
+class StatementAggregator:
+    """Kategorilendirilmiş işlemleri artımlı olarak toplar"""
+
+    def __init__(self):
+        self.total_amount = 0
+        self.transaction_count = 0
+        self.category_totals = {}
+        self.categorized_transactions = []
+        self.start_date = None
+        self.end_date = None
+
+    def add(self, categorized_transactions: Iterable[dict]):
+        """Bir parça işlemi toplamlara ekle"""
+        for transaction in categorized_transactions:
+            amount = transaction['amount']
+            category = transaction['category']
+            self.total_amount += amount
+            self.transaction_count += 1
+            self.categorized_transactions.append(transaction)
+
+            # Kategori toplamları
+            totals = self.category_totals.setdefault(category, {'amount': 0, 'count': 0})
+            totals['amount'] += amount
+            totals['count'] += 1
+
+            # ISO tarihler metin olarak sıralanabilir
+            if self.start_date is None or transaction['date'] < self.start_date:
+                self.start_date = transaction['date']
+            if self.end_date is None or transaction['date'] > self.end_date:
+                self.end_date = transaction['date']
+
+    @property
+    def avg_transaction(self) -> float:
+        return self.total_amount / self.transaction_count if self.transaction_count > 0 else 0
+
+    def category_analysis(self) -> dict:
+        """Kategori bilgilerini zenginleştir"""
+        category_analysis = {}
+        for category, data in self.category_totals.items():
+            icon, name, color = CATEGORY_DISPLAY.get(category, CATEGORY_DISPLAY['other'])
+            percentage = (data['amount'] / self.total_amount) * 100 if self.total_amount > 0 else 0
+
+            category_analysis[category] = {
+                'name': name,
+                'icon': icon,
+                'color': color,
+                'amount': data['amount'],
+                'count': data['count'],
+                'percentage': percentage,
+                'avg_amount': data['amount'] / data['count'] if data['count'] > 0 else 0
+            }
+        return category_analysis
+
+    def summary(self) -> dict:
+        return {
+            'total_amount': self.total_amount,
+            'transaction_count': self.transaction_count,
+            'avg_transaction': self.avg_transaction,
+            'date_range': {
+                'start': self.start_date,
+                'end': self.end_date
+            }
+        }
+
+
+class StatementAnalysisService:
+    """Kredi kartı ekstresi kategorilendirme, analiz ve kayıt servisi"""
+
+    def __init__(self, user=None):
+        self.expense_service = ExpenseAnalysisService(user)
+
+    def categorize(self, transactions: List[dict]) -> List[dict]:
+        """İşlemleri toplu AI kategorilendirmesiyle etiketle"""
+        ai_results = self.expense_service.categorize_expenses_batch(
+            [(t['description'], t['amount']) for t in transactions]
+        )
+        return [
+            {
+                **transaction,
+                'category': ai_analysis.get('category', 'other'),
+                'confidence': ai_analysis.get('confidence', 0.5),
+                'ai_tags': ai_analysis.get('tags', [])
+            }
+            for transaction, ai_analysis in zip(transactions, ai_results)
+        ]
+
+    def analyze(self, transactions: List[dict]) -> dict:
+        """Kredi kartı ekstresi AI analizi (tüm işlemler tek seferde)"""
+        aggregator = StatementAggregator()
+        aggregator.add(self.categorize(transactions))
+        return self.build_analysis(aggregator)
+
+    def build_analysis(self, aggregator: StatementAggregator) -> dict:
+        """Toplanmış işlemlerden ekstre analizini üret"""
+        category_analysis = aggregator.category_analysis()
+
+        # En büyük kategoriler
+        top_categories = sorted(category_analysis.items(),
+                                key=lambda x: x[1]['amount'], reverse=True)[:5]
+
+        # AI insights üret
+        insights = self._generate_spending_insights(
+            category_analysis, aggregator.categorized_transactions, aggregator.total_amount
+        )
+
+        return {
+            'summary': aggregator.summary(),
+            'category_analysis': category_analysis,
+            'top_categories': [
+                {
+                    'category': cat[0],
+                    'name': cat[1]['name'],
+                    'icon': cat[1]['icon'],
+                    'amount': cat[1]['amount'],
+                    'percentage': cat[1]['percentage']
+                } for cat in top_categories
+            ],
+            'insights': insights,
+            'categorized_transactions': aggregator.categorized_transactions
+        }
+
+    def _generate_spending_insights(self, category_analysis, transactions, total_amount):
+        """Harcama analizine dayalı AI insights üret"""
+        insights = []
+        
+        try:
+            # En yüksek harcama kategorisi
+            if category_analysis:
+                top_category = max(category_analysis.items(), key=lambda x: x[1]['amount'])
+                top_cat_name = top_category[1]['name']
+                top_cat_amount = top_category[1]['amount']
+                top_cat_percentage = top_category[1]['percentage']
+                
+                if top_cat_percentage > 40:
+                    insights.append({
+                        'type': 'warning',
+                        'icon': '⚠️',
+                        'title': f'{top_cat_name} Ağırlıklı Harcama',
+                        'message': f'Harcamalarınızın %{top_cat_percentage:.1f}\'i {top_cat_name} kategorisinde. Bu dengeyi gözden geçirmek isteyebilirsiniz.',
+                        'priority': 4,
+                        'amount': top_cat_amount
+                    })
+                elif top_cat_percentage > 25:
+                    insights.append({
+                        'type': 'info',
+                        'icon': '💡',
+                        'title': f'{top_cat_name} Odaklı Bütçe',
+                        'message': f'{top_cat_name} harcamalarınız toplam bütçenizin %{top_cat_percentage:.1f}\'ini oluşturuyor.',
+                        'priority': 2,
+                        'amount': top_cat_amount
+                    })
+            
+            # Ortalama işlem tutarı analizi
+            avg_transaction = total_amount / len(transactions) if transactions else 0
+            if avg_transaction > 500:
+                insights.append({
+                    'type': 'suggestion',
+                    'icon': '📊',
+                    'title': 'Yüksek Ortalama Harcama',
+                    'message': f'Ortalama işlem tutarınız ₺{avg_transaction:.2f}. Küçük harcamaları takip etmek tasarrufa yardımcı olabilir.',
+                    'priority': 3,
+                    'amount': avg_transaction
+                })
+            
+            # Gıda harcamaları özel analizi
+            if 'food' in category_analysis:
+                food_data = category_analysis['food']
+                food_avg = food_data['avg_amount']
+                food_count = food_data['count']
+                
+                if food_avg > 100:
+                    insights.append({
+                        'type': 'suggestion',
+                        'icon': '🍽️',
+                        'title': 'Yemek Harcama Optimizasyonu',
+                        'message': f'Ortalama yemek harcamanız ₺{food_avg:.2f}. Evde yemek yaparak aylık ₺{(food_avg * food_count * 0.3):.0f} tasarruf edebilirsiniz.',
+                        'priority': 3,
+                        'amount': food_avg * food_count * 0.3
+                    })
+            
+            # Eğlence harcamaları
+            if 'entertainment' in category_analysis:
+                ent_data = category_analysis['entertainment']
+                if ent_data['percentage'] > 20:
+                    insights.append({
+                        'type': 'info',
+                        'icon': '🎬',
+                        'title': 'Eğlence Bütçesi',
+                        'message': f'Eğlence harcamalarınız %{ent_data["percentage"]:.1f}. Bu oran dengeyi gösteriyor!',
+                        'priority': 1,
+                        'amount': ent_data['amount']
+                    })
+            
+            # Genel başarı mesajı
+            if len(insights) < 2:
+                insights.append({
+                    'type': 'achievement',
+                    'icon': '🎉',
+                    'title': 'Dengeli Harcama Profili',
+                    'message': f'{len(transactions)} işleminiz başarıyla analiz edildi. Harcama dağılımınız dengeli görünüyor!',
+                    'priority': 1,
+                    'amount': total_amount
+                })
+            
+            # Insights'ları önceliğe göre sırala
+            insights.sort(key=lambda x: x['priority'], reverse=True)
+            
+            return insights[:5]  # En fazla 5 insight
+            
+        except Exception as e:
+            print(f"Insights generation error: {e}")
+            return [{
+                'type': 'info',
+                'icon': '📊',
+                'title': 'Analiz Tamamlandı',
+                'message': f'{len(transactions)} işleminiz başarıyla kategorilere ayrıldı.',
+                'priority': 1,
+                'amount': total_amount
+            }]
+    
+    def save_statement(self, file_name, analysis, categorized_transactions, chunk_size=None, user=None):
+        """Ekstreyi ve işlemlerini tek veritabanı işleminde kaydet
+        
+        İşlemler `chunk_size`'lık parçalar halinde bulk_create ile yazılır;
+        `categorized_transactions` bir üreteç olabilir, bellekte en fazla bir
+        parça tutulur.
+        """
+        chunk_size = chunk_size or settings.STATEMENT_SAVE_CHUNK_SIZE
+        try:
+            with db_transaction.atomic():
+                # Ekstre kaydı oluştur
+                statement = CreditCardStatement.objects.create(
+                    user=user,
+                    file_name=file_name,
+                    total_amount=analysis['summary']['total_amount'],
+                    transaction_count=analysis['summary']['transaction_count'],
+                    avg_transaction=analysis['summary']['avg_transaction'],
+                    start_date=datetime.strptime(analysis['summary']['date_range']['start'], '%Y-%m-%d').date(),
+                    end_date=datetime.strptime(analysis['summary']['date_range']['end'], '%Y-%m-%d').date(),
+                    category_analysis=analysis['category_analysis'],
+                    top_categories=analysis['top_categories'],
+                    insights=analysis['insights']
+                )
+                
+                # İşlemleri parça parça kaydet
+                rows = (
+                    StatementTransaction(
+                        statement=statement,
+                        date=datetime.strptime(item['date'], '%Y-%m-%d').date(),
+                        description=item['description'],
+                        amount=item['amount'],
+                        category=item['category'],
+                        confidence=item.get('confidence', 85.0),
+                        ai_tags=item.get('ai_tags', [])
+                    )
+                    for item in categorized_transactions
+                )
+                while True:
+                    chunk = list(islice(rows, chunk_size))
+                    if not chunk:
+                        break
+                    StatementTransaction.objects.bulk_create(chunk, batch_size=chunk_size)
+            
+            return statement
+            
+        except Exception as e:
+            print(f"Error saving statement to DB: {e}")
+            return None
@@ -0,0 +1,206 @@
+"""
+Finobai - Ekstre İş Kuyruğu
+Yüklenen ekstreyi istekten bağımsız olarak yerel bir thread havuzunda işler:
+ayrıştırma → kategorilendirme → toplama → kayıt. Aşamalar parça parça
+ilerler; her parçadan sonra ilerleme ve kısmi sonuç StatementJob'a yazılır.
+Harici bir broker gerekmez; STATEMENT_JOBS_EAGER=True iken iş istek
+içinde çalışır (testler için). Süreç, kuyruğundaki işlere düzenli canlılık
+sinyali yazar; süreç sonlanınca sinyali kesilen işler durum sorgulanırken
+başarısız olarak işaretlenir.
+"""
+
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import StatementJob
+from .statement_analysis import StatementAggregator, StatementAnalysisService
+from .statement_parser import iter_statement_file
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+# Bu süreçte kuyrukta bekleyen veya çalışan işler (canlılık sinyali yazılır)
+_active_jobs = set()
+_heartbeat_thread = None
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.STATEMENT_JOB_MAX_WORKERS,
+                    thread_name_prefix='statement-job'
+                )
+    return _executor
+
+
+def submit_statement_job(uploaded_file, user=None) -> StatementJob:
+    """Yüklemeyi geçici dosyaya yaz ve işi kuyruğa al"""
+    suffix = os.path.splitext(uploaded_file.name)[1].lower()
+    with tempfile.NamedTemporaryFile(suffix=suffix, prefix='statement-', delete=False) as temp_file:
+        for chunk in uploaded_file.chunks():
+            temp_file.write(chunk)
+
+    job = StatementJob.objects.create(
+        user=user if user is not None and user.is_authenticated else None,
+        file_name=uploaded_file.name,
+        heartbeat_at=timezone.now()
+    )
+
+    if settings.STATEMENT_JOBS_EAGER:
+        run_statement_job(job.id, temp_file.name)
+    else:
+        with _executor_lock:
+            _active_jobs.add(job.id)
+        _ensure_heartbeat()
+        _get_executor().submit(run_statement_job, job.id, temp_file.name)
+    return job
+
+
+def _ensure_heartbeat():
+    global _heartbeat_thread
+    with _executor_lock:
+        if _heartbeat_thread is None:
+            _heartbeat_thread = threading.Thread(target=_heartbeat, name='statement-job-heartbeat', daemon=True)
+            _heartbeat_thread.start()
+
+
+def _heartbeat():
+    """Bu süreçteki işlerin canlılık sinyalini yenile; iş kalmayınca thread sonlanır"""
+    global _heartbeat_thread
+    while True:
+        with _executor_lock:
+            job_ids = list(_active_jobs)
+            if not job_ids:
+                _heartbeat_thread = None
+                return
+        try:
+            StatementJob.objects.filter(id__in=job_ids, status__in=('queued', 'running')).update(
+                heartbeat_at=timezone.now()
+            )
+        except Exception as e:
+            print(f"Statement job heartbeat error: {e}")
+        finally:
+            close_old_connections()
+        time.sleep(settings.STATEMENT_JOB_HEARTBEAT_SECONDS)
+
+
+def fail_stale_jobs() -> int:
+    """Sürecinden STATEMENT_JOB_STALE_MINUTES boyunca canlılık sinyali gelmeyen işleri başarısız işaretle
+
+    İşler süreç içi thread havuzunda çalışır; süreç sonlanınca kuyruktaki ve
+    çalışan işler sahipsiz kalır. Süreç yaşadıkça uzun kuyruk beklemesi veya
+    yavaş LLM parçası işi zaman aşımına uğratmaz.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=settings.STATEMENT_JOB_STALE_MINUTES)
+    return StatementJob.objects.filter(status__in=('queued', 'running'), heartbeat_at__lt=cutoff).update(
+        status='failed',
+        error='İş yarıda kaldı (sunucu yeniden başlatılmış olabilir), ekstreyi tekrar yükleyin',
+        finished_at=now,
+        updated_at=now
+    )
+
+
+def run_statement_job(job_id: int, path: str):
+    """İşi çalıştır; geçici dosya her durumda silinir"""
+    try:
+        StatementPipeline(job_id).run(path)
+    finally:
+        with _executor_lock:
+            _active_jobs.discard(job_id)
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        close_old_connections()
+
+
+class StatementPipeline:
+    """Tek bir ekstre işinin aşamaları"""
+
+    def __init__(self, job_id: int):
+        self.job = StatementJob.objects.get(id=job_id)
+        self.service = StatementAnalysisService(self.job.user)
+        self.aggregator = StatementAggregator()
+
+    def run(self, path: str):
+        # Kuyrukta beklerken zaman aşımına uğrayan iş çalıştırılmaz
+        started = StatementJob.objects.filter(id=self.job.id, status='queued').update(
+            status='running', stage='parse', updated_at=timezone.now()
+        )
+        if not started:
+            return
+
+        try:
+            with open(path, 'rb') as file:
+                transactions = iter_statement_file(self.job.file_name, file)
+                chunk_size = settings.STATEMENT_JOB_CHUNK_SIZE
+                while True:
+                    chunk = list(islice(transactions, chunk_size))
+                    if not chunk:
+                        break
+                    self._update(stage='categorize')
+                    self.aggregator.add(self.service.categorize(chunk))
+                    self._update(
+                        stage='aggregate',
+                        processed_count=self.aggregator.transaction_count,
+                        partial_result=self._partial_result()
+                    )
+
+            if self.aggregator.transaction_count == 0:
+                self._fail('Dosyada geçerli işlem bulunamadı')
+                return
+
+            analysis = self.service.build_analysis(self.aggregator)
+
+            self._update(stage='persist')
+            statement = self.service.save_statement(
+                self.job.file_name, analysis, analysis['categorized_transactions'], user=self.job.user
+            )
+            if statement is None:
+                self._fail('Ekstre kaydedilirken hata oluştu')
+                return
+
+            analysis['categorized_transactions'] = analysis['categorized_transactions'][:50]
+            self._update(
+                status='completed',
+                result=analysis,
+                statement=statement,
+                partial_result=self._partial_result(),
+                finished_at=timezone.now()
+            )
+
+        except Exception as e:
+            print(f"Statement job {self.job.id} error: {e}")
+            self._fail(str(e))
+
+    def _partial_result(self) -> dict:
+        return {
+            'summary': self.aggregator.summary(),
+            'category_analysis': self.aggregator.category_analysis()
+        }
+
+    def _fail(self, message: str):
+        self._update(status='failed', error=message, finished_at=timezone.now())
+
+    def _update(self, **fields):
+        """Çalışan iş kaydını güncelle (yalnızca değişen alanlar)
+
+        Zaman aşımıyla başarısız işaretlenmiş iş sonradan tamamlandı
+        olarak geri çevrilmez.
+        """
+        fields['updated_at'] = timezone.now()
+        StatementJob.objects.filter(id=self.job.id, status='running').update(**fields)
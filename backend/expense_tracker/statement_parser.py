@@ -0,0 +1,337 @@
+"""
+Finobai - Ekstre Ayrıştırıcı
+Banka ekstrelerini (CSV, XLSX) satır satır okuyarak işlem sözlükleri üretir.
+Sütunlar başlıktan otomatik bulunur, tarih formatı dosya başına bir kez
+belirlenir.
+"""
+
+import codecs
+import csv
+import logging
+import re
+from dataclasses import dataclass
+from datetime import date, datetime
+from itertools import chain, islice
+from typing import Iterable, Iterator, List, Optional, Sequence
+
+from .text_utils import fold_turkish
+
+logger = logging.getLogger(__name__)
+
+
+DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d.%m.%Y', '%d-%m-%Y', '%Y/%m/%d']
+
+# Tarih formatı bu kadar satırdan tespit edilir
+DATE_SAMPLE_ROWS = 20
+
+# Başlık satırı en fazla bu kadar satır içinde aranır (banka XLSX'lerinde üstte başlık/logo satırları olur)
+HEADER_SEARCH_ROWS = 30
+
+# Sütun adları fold_turkish ile karşılaştırılır ("AÇIKLAMA" → "aciklama")
+_DATE_HEADER_KEYWORDS = ['tarih', 'date', 'islem_tarihi']
+_DESCRIPTION_HEADER_KEYWORDS = ['aciklama', 'description', 'desc', 'merchant', 'is_yeri']
+_AMOUNT_HEADER_KEYWORDS = ['tutar', 'amount', 'miktar']
+
+# Harcama sayılmayan işlem tipleri
+NON_EXPENSE_TYPES = {'ödeme', 'iade', 'faiz', 'ucret'}
+
+_AMOUNT_CLEAN_RE = re.compile(r'[^\d,.-]')
+
+
+def _date_pattern(fmt: str) -> re.Pattern:
+    """strptime formatını eşdeğer bir regex'e derle (strptime satır başına çok yavaş)"""
+    pattern = re.escape(fmt)
+    pattern = pattern.replace('%Y', r'(?P<y>\d{4})').replace('%m', r'(?P<m>\d{1,2})').replace('%d', r'(?P<d>\d{1,2})')
+    return re.compile(pattern + r'(?:[ T].*)?$')
+
+
+_DATE_PATTERNS = {fmt: _date_pattern(fmt) for fmt in DATE_FORMATS}
+
+
+@dataclass
+class StatementColumns:
+    """Ekstre sütun indeksleri (-1: sütun yok)"""
+    date: int
+    description: int
+    amount: int
+    type: int = -1
+    merchant: int = -1
+
+    @property
+    def required_width(self) -> int:
+        return max(self.date, self.description, self.amount) + 1
+
+
+def _find_column(header: Sequence[str], keywords: Sequence[str], exclude: int = -1) -> int:
+    for i, col in enumerate(header):
+        if i != exclude and any(keyword in col for keyword in keywords):
+            return i
+    return -1
+
+
+def detect_columns(header: Sequence) -> StatementColumns:
+    """Başlık satırından sütunları bul (bulunamazsa varsayılan pozisyonlar)"""
+    header_lower = [fold_turkish(str(col or '')).strip() for col in header]
+
+    date_col = _find_column(header_lower, _DATE_HEADER_KEYWORDS)
+    desc_col = _find_column(header_lower, _DESCRIPTION_HEADER_KEYWORDS)
+    amount_col = _find_column(header_lower, _AMOUNT_HEADER_KEYWORDS)
+    type_col = _find_column(header_lower, ['islem_tipi', 'tip', 'type'])
+    # Açıklamadan ayrı bir iş yeri sütunu varsa açıklamanın başına eklenir
+    merchant_col = _find_column(header_lower, ['is_yeri', 'isyeri', 'merchant'], exclude=desc_col)
+
+    # Fallback: eğer sütun bulunamazsa varsayılan pozisyonları kullan
+    if date_col == -1:
+        date_col = 0
+    if desc_col == -1:
+        desc_col = 2 if len(header) > 2 else 1
+    if amount_col == -1:
+        amount_col = 5 if len(header) > 5 else (len(header) - 1)
+
+    columns = StatementColumns(date_col, desc_col, amount_col, type_col, merchant_col)
+    logger.debug("Statement columns: %s", columns)
+    return columns
+
+
+def _is_header_row(row: Sequence) -> bool:
+    """Satır tarih ve tutar sütun adlarını içeriyor mu"""
+    cells = [fold_turkish(cell).strip() for cell in row if isinstance(cell, str)]
+    return (_find_column(cells, _DATE_HEADER_KEYWORDS) != -1
+            and _find_column(cells, _AMOUNT_HEADER_KEYWORDS) != -1)
+
+
+def _match_date(value: str, fmt: str) -> Optional[date]:
+    match = _DATE_PATTERNS[fmt].match(value)
+    if not match:
+        return None
+    try:
+        return date(int(match['y']), int(match['m']), int(match['d']))
+    except ValueError:
+        return None
+
+
+def detect_date_format(samples: Iterable[str]) -> Optional[str]:
+    """Örnek tarihlerin tamamını (veya en çoğunu) ayrıştıran formatı bul"""
+    samples = [sample for sample in samples if sample]
+    best_format, best_hits = None, 0
+    for fmt in DATE_FORMATS:
+        hits = sum(1 for sample in samples if _match_date(sample, fmt))
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+            if hits == len(samples):
+                break
+    return best_format
+
+
+def parse_date(value, preferred_format: Optional[str]) -> Optional[date]:
+    """Önce dosyanın formatını, tutmazsa diğer formatları dene
+
+    XLSX hücrelerinden gelen datetime/date değerleri doğrudan kullanılır.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value or '').strip()
+    if preferred_format:
+        parsed = _match_date(value, preferred_format)
+        if parsed:
+            return parsed
+    for fmt in DATE_FORMATS:
+        if fmt != preferred_format:
+            parsed = _match_date(value, fmt)
+            if parsed:
+                return parsed
+    return None
+
+
+def parse_amount(value) -> Optional[float]:
+    """Türkiye (1.234,56) ve uluslararası (1,234.56) formatlı tutarı pozitif sayıya çevir"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return abs(float(value))
+    amount_str = _AMOUNT_CLEAN_RE.sub('', str(value or ''))
+    if not amount_str or amount_str in ('-', '.', ','):
+        return None
+
+    if ',' in amount_str and '.' in amount_str:
+        if amount_str.rfind(',') > amount_str.rfind('.'):
+            # Virgül daha sonda, TR format (1.234,56)
+            amount_str = amount_str.replace('.', '').replace(',', '.')
+        else:
+            # Nokta daha sonda, US format (1,234.56)
+            amount_str = amount_str.replace(',', '')
+    elif ',' in amount_str:
+        parts = amount_str.split(',')
+        if len(parts) == 2 and len(parts[1]) <= 2:
+            # Decimal separator olarak virgül
+            amount_str = amount_str.replace(',', '.')
+        else:
+            # Thousand separator olarak virgül
+            amount_str = amount_str.replace(',', '')
+
+    try:
+        # Negatif tutarları pozitif yap (harcama)
+        return abs(float(amount_str))
+    except ValueError:
+        return None
+
+
+def iter_statement_transactions(rows: Iterable[Sequence]) -> Iterator[dict]:
+    """Başlık + veri satırlarından işlem sözlükleri üret
+
+    `rows` herhangi bir satır iteratörü olabilir (csv.reader, openpyxl
+    iter_rows); yalnızca başlığı ve tarih formatını bulmak için ilk satırlar
+    tamponlanır.
+    """
+    rows = (row for row in rows if any(row))
+    header, rows = _split_header(rows)
+    if not header:
+        return
+
+    columns = detect_columns(header)
+    sample = list(islice(rows, DATE_SAMPLE_ROWS))
+    date_format = detect_date_format(
+        row[columns.date].strip() for row in sample
+        if len(row) > columns.date and isinstance(row[columns.date], str)
+    )
+    logger.debug("Statement date format: %s", date_format)
+
+    for row_number, row in enumerate(chain(sample, rows), start=1):
+        transaction = _parse_row(row, columns, date_format)
+        if transaction is None:
+            logger.debug("Skipping row %d: %r", row_number, row)
+            continue
+        yield transaction
+
+
+def _split_header(rows: Iterator[Sequence]):
+    """Başlık satırını bul; bulunamazsa ilk satır başlık kabul edilir
+
+    Döndürür: (başlık, kalan satırlar iteratörü)
+    """
+    buffer = list(islice(rows, HEADER_SEARCH_ROWS))
+    if not buffer:
+        return None, rows
+
+    for index, row in enumerate(buffer):
+        if _is_header_row(row):
+            return row, chain(buffer[index + 1:], rows)
+    return buffer[0], chain(buffer[1:], rows)
+
+
+def _parse_row(row: Sequence, columns: StatementColumns, date_format: Optional[str]) -> Optional[dict]:
+    if len(row) < columns.required_width:
+        return None
+
+    if columns.type != -1 and columns.type < len(row):
+        # Harcama olmayan işlemleri filtrele (ödeme, iade vs.)
+        if str(row[columns.type] or '').strip().lower() in NON_EXPENSE_TYPES:
+            return None
+
+    description = str(row[columns.description] or '').strip()
+    if columns.merchant != -1 and columns.merchant < len(row):
+        merchant = str(row[columns.merchant] or '').strip()
+        if merchant:
+            description = f"{merchant} - {description}"
+    if not description:
+        return None
+
+    transaction_date = parse_date(row[columns.date], date_format)
+    if transaction_date is None:
+        return None
+
+    amount = parse_amount(row[columns.amount])
+    if not amount:
+        return None
+
+    return {
+        'date': transaction_date.isoformat(),
+        'description': description[:100],  # Açıklamayı kısıtla
+        'amount': amount
+    }
+
+
+def iter_csv_transactions(file) -> Iterator[dict]:
+    """CSV yüklemesini tamamını belleğe almadan satır satır ayrıştır"""
+    lines = codecs.iterdecode(file, 'utf-8-sig')
+    return iter_statement_transactions(csv.reader(lines))
+
+
+def parse_csv_statement(file) -> List[dict]:
+    """CSV ekstresindeki tüm işlemler"""
+    transactions = list(iter_csv_transactions(file))
+    logger.debug("Total CSV transactions parsed: %d", len(transactions))
+    return transactions
+
+
+def iter_xlsx_transactions(file) -> Iterator[dict]:
+    """XLSX çalışma kitabının tüm sayfalarını salt okunur modda satır satır ayrıştır
+
+    Her sayfa kendi başlığıyla ayrı ayrı işlenir; bellekte sayfa başına
+    yalnızca tamponlanan ilk satırlar tutulur.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        for sheet in workbook.worksheets:
+            logger.debug("Parsing XLSX sheet: %s", sheet.title)
+            yield from iter_statement_transactions(sheet.iter_rows(values_only=True))
+    finally:
+        workbook.close()
+
+
+def parse_xlsx_statement(file) -> List[dict]:
+    """XLSX ekstresindeki tüm işlemler"""
+    transactions = list(iter_xlsx_transactions(file))
+    logger.debug("Total XLSX transactions parsed: %d", len(transactions))
+    return transactions
+
+
+# Format: "DD/MM/YYYY AÇIKLAMA TUTAR"
+_TXT_LINE_RE = re.compile(r'(\d{1,2}[/.]\d{1,2}[/.]\d{2,4})\s+(.+?)\s+(\d+[.,]\d{2})')
+
+
+def iter_txt_transactions(file) -> Iterator[dict]:
+    """Düz metin ekstreyi satır satır ayrıştır"""
+    for line in codecs.iterdecode(file, 'utf-8-sig'):
+        match = _TXT_LINE_RE.search(line.strip())
+        if not match:
+            continue
+
+        date_str = match.group(1).replace('.', '/')
+        try:
+            transaction_date = datetime.strptime(date_str, '%d/%m/%Y')
+        except ValueError:
+            try:
+                transaction_date = datetime.strptime(date_str, '%d/%m/%y')
+            except ValueError:
+                continue
+
+        amount = float(match.group(3).replace(',', '.'))
+        if amount > 0:
+            yield {
+                'date': transaction_date.strftime('%Y-%m-%d'),
+                'description': match.group(2).strip(),
+                'amount': amount
+            }
+
+
+def parse_txt_statement(file) -> List[dict]:
+    """TXT ekstresindeki tüm işlemler"""
+    return list(iter_txt_transactions(file))
+
+
+STATEMENT_PARSERS = {
+    '.csv': iter_csv_transactions,
+    '.txt': iter_txt_transactions,
+    '.xlsx': iter_xlsx_transactions,
+}
+
+
+def iter_statement_file(file_name: str, file) -> Iterator[dict]:
+    """Dosya uzantısına göre uygun ayrıştırıcıyla işlemleri üret"""
+    for extension, parser in STATEMENT_PARSERS.items():
+        if file_name.lower().endswith(extension):
+            return parser(file)
+    raise ValueError('Bu dosya formatı henüz desteklenmiyor')
@@ -0,0 +1,31 @@
+"""
+Finobai - Türkçe metin yardımcıları
+Ekstre açıklamaları için Türkçe'ye uygun büyük/küçük harf dönüşümü.
+"""
+
+# str.lower() 'I' harfini 'i'ye, 'İ' harfini 'i̇' (i + birleşik nokta) çevirir
+_TURKISH_LOWER_MAP = str.maketrans({'I': 'ı', 'İ': 'i'})
+_TURKISH_ASCII_MAP = str.maketrans('çğıöşüâîû', 'cgiosuaiu')
+
+
+def turkish_lower(text: str) -> str:
+    """Türkçe kurallarıyla küçük harfe çevir (I→ı, İ→i)"""
+    return text.translate(_TURKISH_LOWER_MAP).lower()
+
+
+def turkish_casefold(text: str) -> str:
+    """Büyük/küçük harf ve noktalı/noktasız i farkını yok say
+
+    Ekstreler çoğunlukla ASCII büyük harfle gelir ("MIGROS", "ISTANBUL");
+    I→ı dönüşümünden sonra ı da i'ye indirgenir. Diğer Türkçe harfler korunur.
+    """
+    return turkish_lower(text).replace('ı', 'i')
+
+
+def fold_turkish(text: str) -> str:
+    """Küçük harfe çevir ve Türkçe karakterleri ASCII karşılıklarına indir
+
+    Ekstrelerde aynı işyeri "ŞOK", "SOK" veya "Şok" olarak geçebildiği için
+    karşılaştırma anahtarları bu biçimde üretilir.
+    """
+    return turkish_lower(text).translate(_TURKISH_ASCII_MAP)
@@ -5,7 +5,9 @@ from .views import (
     ExpenseCategoriesView,
     CreditCardStatementUploadView,
     StatementListView,
-    StatementDetailView
+    StatementDetailView,
+    MerchantCategoryView,
+    StatementJobView
 )
 
 urlpatterns = [
@@ -15,4 +17,6 @@ urlpatterns = [
     path('upload-statement/', CreditCardStatementUploadView.as_view(), name='upload-statement'),
     path('statements/', StatementListView.as_view(), name='statement-list'),
     path('statements/<int:statement_id>/', StatementDetailView.as_view(), name='statement-detail'),
+    path('statements/jobs/<int:job_id>/', StatementJobView.as_view(), name='statement-job'),
+    path('merchant-categories/', MerchantCategoryView.as_view(), name='merchant-categories'),
 ]
@@ -5,14 +5,19 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.core.files.storage import default_storage
+from django.db.models import Count, Sum
 from datetime import datetime, timedelta
 import json
-import csv
-import io
-import re
 
-from .models import Expense, ExpenseCategory, Budget, ExpenseInsight, CreditCardStatement, StatementTransaction
-from .services import ExpenseAnalysisService
+from .merchant_cache import MerchantCategoryCache
+from .models import (
+    Expense, ExpenseCategory, Budget, ExpenseInsight, CreditCardStatement, StatementTransaction,
+    MerchantCategory, StatementJob
+)
+from .services import ExpenseAnalysisService, EXPENSE_CATEGORY_CODES
+from .statement_analysis import CATEGORY_DISPLAY, StatementAnalysisService
+from .statement_jobs import fail_stale_jobs, submit_statement_job
+from .statement_parser import parse_csv_statement, parse_txt_statement, parse_xlsx_statement
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -32,7 +37,7 @@ class ExpenseAnalysisView(APIView):
                 }, status=status.HTTP_400_BAD_REQUEST)
             
             # AI analiz servisi
-            analysis_service = ExpenseAnalysisService()
+            analysis_service = ExpenseAnalysisService(request.user)
             analysis = analysis_service.analyze_expense_text(expense_text, amount)
             
             # Kategori bilgisini ekle
@@ -190,8 +195,7 @@ class MonthlySummaryView(APIView):
     def _get_real_monthly_summary(self, month, year):
         """Gerçek ekstre verilerinden aylık özet oluştur"""
         try:
-            from datetime import datetime, date
-            from collections import defaultdict
+            from datetime import date
             
             # Belirtilen ay için ekstreleri filtrele
             start_date = date(year, month, 1)
@@ -200,50 +204,33 @@ class MonthlySummaryView(APIView):
             else:
                 end_date = date(year, month + 1, 1)
             
-            # Bu aya ait işlemleri bul
-            transactions = StatementTransaction.objects.filter(
-                date__gte=start_date,
-                date__lt=end_date
-            ).select_related('statement')
+            # Kategori toplamları tek sorguda (GROUP BY category)
+            category_rows = list(
+                StatementTransaction.objects.filter(
+                    date__gte=start_date,
+                    date__lt=end_date
+                ).values('category').annotate(
+                    total=Sum('amount'),
+                    count=Count('id')
+                ).order_by()
+            )
             
-            if not transactions.exists():
+            if not category_rows:
                 return None
             
-            # Kategori toplamları
-            category_totals = defaultdict(lambda: {'amount': 0, 'count': 0})
-            total_amount = 0
-            transaction_count = transactions.count()
-            
-            for transaction in transactions:
-                category = transaction.category
-                amount = float(transaction.amount)
-                
-                category_totals[category]['amount'] += amount
-                category_totals[category]['count'] += 1
-                total_amount += amount
+            total_amount = sum(float(row['total']) for row in category_rows)
+            transaction_count = sum(row['count'] for row in category_rows)
             
             # Kategori bilgilerini zenginleştir
-            category_mapping = {
-                'food': ('🍽️', 'Gıda & İçecek', '#ef4444'),
-                'transport': ('🚗', 'Ulaşım', '#3b82f6'),
-                'entertainment': ('🎬', 'Eğlence', '#8b5cf6'),
-                'bills': ('💡', 'Faturalar', '#f59e0b'),
-                'shopping': ('🛍️', 'Alışveriş', '#ec4899'),
-                'health': ('🏥', 'Sağlık', '#10b981'),
-                'education': ('📚', 'Eğitim', '#06b6d4'),
-                'investment': ('📈', 'Yatırım', '#84cc16'),
-                'housing': ('🏠', 'Konut', '#f97316'),
-                'other': ('📦', 'Diğer', '#6366f1')
-            }
-            
             category_summary = {}
-            for category, data in category_totals.items():
-                icon, name, color = category_mapping.get(category, category_mapping['other'])
-                percentage = (data['amount'] / total_amount) * 100 if total_amount > 0 else 0
+            for row in category_rows:
+                amount = float(row['total'])
+                icon, name, color = CATEGORY_DISPLAY.get(row['category'], CATEGORY_DISPLAY['other'])
+                percentage = (amount / total_amount) * 100 if total_amount > 0 else 0
                 
-                category_summary[category] = {
-                    'amount': data['amount'],
-                    'count': data['count'],
+                category_summary[row['category']] = {
+                    'amount': amount,
+                    'count': row['count'],
                     'icon': icon,
                     'color': color,
                     'name': name,
@@ -440,12 +427,25 @@ class CreditCardStatementUploadView(APIView):
                     'error': 'Dosya boyutu 5MB\'dan küçük olmalı'
                 }, status=status.HTTP_400_BAD_REQUEST)
             
+            # Varsayılan arka plan işi: hemen iş numarası döner, ilerleme jobs endpoint'inden izlenir
+            # (async=false ile istek içinde işlenir)
+            if str(request.data.get('async', 'true')).lower() not in ('0', 'false'):
+                job = submit_statement_job(file, request.user)
+                return Response({
+                    'success': True,
+                    'job_id': job.id,
+                    'status': job.status,
+                    'file_name': file.name
+                }, status=status.HTTP_202_ACCEPTED)
+            
             # Dosyayı oku ve parse et
             try:
                 if file.name.lower().endswith('.csv'):
                     transactions = self._parse_csv_statement(file)
                 elif file.name.lower().endswith('.txt'):
                     transactions = self._parse_txt_statement(file)
+                elif file.name.lower().endswith('.xlsx'):
+                    transactions = self._parse_xlsx_statement(file)
                 else:
                     return Response({
                         'error': 'Bu dosya formatı henüz desteklenmiyor'
@@ -457,10 +457,15 @@ class CreditCardStatementUploadView(APIView):
                     }, status=status.HTTP_400_BAD_REQUEST)
                 
                 # AI analizi yap
-                analysis = self._analyze_credit_card_statement(transactions)
+                statement_service = StatementAnalysisService(request.user)
+                analysis = statement_service.analyze(transactions)
                 
-                # Ekstreyi veritabanına kaydet
-                statement = self._save_statement_to_db(file.name, analysis, transactions)
+                # Ekstreyi veritabanına kaydet (tüm işlemler), yanıtta ilk 50 işlem döner
+                statement = statement_service.save_statement(
+                    file.name, analysis, analysis['categorized_transactions'],
+                    user=request.user if request.user.is_authenticated else None
+                )
+                analysis['categorized_transactions'] = analysis['categorized_transactions'][:50]
                 
                 return Response({
                     'success': True,
@@ -484,487 +489,27 @@ class CreditCardStatementUploadView(APIView):
     
     def _parse_csv_statement(self, file):
         """CSV formatındaki ekstre dosyasını parse et"""
-        transactions = []
         try:
-            # Dosyayı string olarak oku
-            content = file.read().decode('utf-8-sig')
-            csv_reader = csv.reader(io.StringIO(content))
-            
-            # Header'ı oku
-            header = next(csv_reader, None)
-            print(f"CSV Header: {header}")
-            
-            if not header:
-                return []
-            
-            # Header sütunlarının indekslerini bul
-            date_col = -1
-            desc_col = -1  
-            amount_col = -1
-            type_col = -1
-            
-            # Yaygın sütun adlarını ara
-            header_lower = [col.lower() for col in header]
-            
-            # Tarih sütunu
-            for i, col in enumerate(header_lower):
-                if any(keyword in col for keyword in ['tarih', 'date', 'islem_tarihi']):
-                    date_col = i
-                    break
-            
-            # Açıklama sütunu
-            for i, col in enumerate(header_lower):
-                if any(keyword in col for keyword in ['aciklama', 'açıklama', 'description', 'desc', 'merchant', 'is_yeri']):
-                    desc_col = i
-                    break
-            
-            # Tutar sütunu
-            for i, col in enumerate(header_lower):
-                if any(keyword in col for keyword in ['tutar', 'amount', 'miktar']):
-                    amount_col = i
-                    break
-            
-            # İşlem tipi sütunu
-            for i, col in enumerate(header_lower):
-                if any(keyword in col for keyword in ['islem_tipi', 'tip', 'type']):
-                    type_col = i
-                    break
-            
-            print(f"Column mapping - Date: {date_col}, Desc: {desc_col}, Amount: {amount_col}, Type: {type_col}")
-            
-            # Fallback: eğer sütun bulunamazsa varsayılan pozisyonları kullan
-            if date_col == -1:
-                date_col = 0
-            if desc_col == -1:
-                desc_col = 2 if len(header) > 2 else 1
-            if amount_col == -1:
-                amount_col = 5 if len(header) > 5 else (len(header) - 1)
-            
-            row_count = 0
-            for row in csv_reader:
-                row_count += 1
-                print(f"Processing row {row_count}: {row}")
-                
-                if len(row) <= max(date_col, desc_col, amount_col):
-                    print(f"Skipping row {row_count}: not enough columns")
-                    continue
-                
-                # Sütunlardan veriyi çıkar
-                date_str = row[date_col].strip() if date_col < len(row) and row[date_col] else ''
-                
-                # Açıklama için birden fazla sütunu birleştir
-                if desc_col < len(row):
-                    description = row[desc_col].strip()
-                    # İş yeri bilgisi varsa ekle
-                    if len(row) > 12 and row[12].strip():  # is_yeri sütunu
-                        description = f"{row[12].strip()} - {description}"
-                else:
-                    description = ''
-                
-                amount_str = row[amount_col].strip() if amount_col < len(row) and row[amount_col] else '0'
-                
-                # İşlem tipini kontrol et (ödeme, iade vs. harcama olmayan işlemleri filtrele)
-                transaction_type = ''
-                if type_col != -1 and type_col < len(row):
-                    transaction_type = row[type_col].strip().lower()
-                
-                print(f"Parsed data: date={date_str}, desc={description}, amount={amount_str}, type={transaction_type}")
-                
-                # Harcama olmayan işlemleri filtrele
-                if transaction_type in ['ödeme', 'iade', 'faiz', 'ucret']:
-                    print(f"Skipping non-expense transaction: {transaction_type}")
-                    continue
-                
-                # Tarih parse et
-                try:
-                    # Çeşitli tarih formatlarını dene
-                    date_formats = ['%Y-%m-%d', '%d/%m/%Y', '%d.%m.%Y', '%d-%m-%Y', '%Y/%m/%d']
-                    transaction_date = None
-                    
-                    for fmt in date_formats:
-                        try:
-                            transaction_date = datetime.strptime(date_str, fmt)
-                            print(f"Date parsed successfully with format {fmt}: {transaction_date}")
-                            break
-                        except ValueError as e:
-                            print(f"Date format {fmt} failed: {e}")
-                            continue
-                    
-                    if not transaction_date:
-                        print(f"Could not parse date: {date_str}")
-                        continue
-                        
-                except Exception as e:
-                    print(f"Date parsing error: {e}")
-                    continue
-                
-                # Tutarı parse et
-                try:
-                    # Negatif işaret ve para birimi sembollerini temizle
-                    amount_str = re.sub(r'[^\d,.-]', '', amount_str)
-                    print(f"Amount string after cleaning: {amount_str}")
-                    
-                    # Boş veya geçersiz tutarları atla
-                    if not amount_str or amount_str in ['-', '.', ',']:
-                        print(f"Skipping invalid amount: {amount_str}")
-                        continue
-                    
-                    # Türkiye formatı (1.234,56) veya international format (1,234.56)
-                    if ',' in amount_str and '.' in amount_str:
-                        # Hem virgül hem nokta var, format belirle
-                        if amount_str.rfind(',') > amount_str.rfind('.'):
-                            # Virgül daha sonda, TR format (1.234,56)
-                            amount_str = amount_str.replace('.', '').replace(',', '.')
-                        else:
-                            # Nokta daha sonda, US format (1,234.56)
-                            amount_str = amount_str.replace(',', '')
-                    elif ',' in amount_str:
-                        # Sadece virgül var
-                        parts = amount_str.split(',')
-                        if len(parts) == 2 and len(parts[1]) <= 2:
-                            # Decimal separator olarak virgül
-                            amount_str = amount_str.replace(',', '.')
-                        else:
-                            # Thousand separator olarak virgül
-                            amount_str = amount_str.replace(',', '')
-                    
-                    # Negatif tutarları pozitif yap (harcama)
-                    amount = abs(float(amount_str))
-                    print(f"Amount parsed: {amount}")
-                    
-                    if amount <= 0:
-                        print(f"Skipping zero amount transaction")
-                        continue
-                        
-                except Exception as e:
-                    print(f"Amount parsing error: {e}")
-                    continue
-                
-                if description and amount > 0:
-                    transaction = {
-                        'date': transaction_date.strftime('%Y-%m-%d'),
-                        'description': description[:100],  # Açıklamayı kısıtla
-                        'amount': amount
-                    }
-                    transactions.append(transaction)
-                    print(f"Transaction added: {transaction}")
-            
-            print(f"Total transactions parsed: {len(transactions)}")
-            return transactions
-            
+            return parse_csv_statement(file)
         except Exception as e:
             print(f"CSV parse error: {e}")
-            import traceback
-            traceback.print_exc()
             return []
     
-    def _parse_txt_statement(self, file):
-        """TXT formatındaki ekstre dosyasını parse et"""
-        transactions = []
+    def _parse_xlsx_statement(self, file):
+        """XLSX formatındaki ekstre dosyasını parse et (CSV ile aynı sütun tespiti)"""
         try:
-            content = file.read().decode('utf-8-sig')
-            lines = content.strip().split('\n')
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Basit regex pattern'lar ile işlem bilgilerini çıkart
-                # Format: "DD/MM/YYYY AÇIKLAMA TUTAR"
-                pattern = r'(\d{1,2}[/.]\d{1,2}[/.]\d{2,4})\s+(.+?)\s+(\d+[.,]\d{2})'
-                match = re.search(pattern, line)
-                
-                if match:
-                    date_str = match.group(1)
-                    description = match.group(2).strip()
-                    amount_str = match.group(3)
-                    
-                    # Tarih parse et
-                    try:
-                        date_str = date_str.replace('.', '/').replace('-', '/')
-                        transaction_date = datetime.strptime(date_str, '%d/%m/%Y')
-                    except:
-                        try:
-                            transaction_date = datetime.strptime(date_str, '%d/%m/%y')
-                        except:
-                            continue
-                    
-                    # Tutar parse et
-                    try:
-                        amount_str = amount_str.replace(',', '.')
-                        amount = float(amount_str)
-                        if amount > 0:
-                            transactions.append({
-                                'date': transaction_date.strftime('%Y-%m-%d'),
-                                'description': description,
-                                'amount': amount
-                            })
-                    except:
-                        continue
-            
-            return transactions
-            
+            return parse_xlsx_statement(file)
         except Exception as e:
-            print(f"TXT parse error: {e}")
+            print(f"XLSX parse error: {e}")
             return []
     
-    def _analyze_credit_card_statement(self, transactions):
-        """Kredi kartı ekstresi AI analizi"""
-        try:
-            # Temel istatistikler
-            total_amount = sum(t['amount'] for t in transactions)
-            transaction_count = len(transactions)
-            avg_transaction = total_amount / transaction_count if transaction_count > 0 else 0
-            
-            # Kategori analizi - AI ile her işlemi kategorize et
-            analysis_service = ExpenseAnalysisService()
-            categorized_transactions = []
-            category_totals = {}
-            
-            for transaction in transactions:
-                # Her işlem için AI kategorilendirmesi
-                try:
-                    ai_analysis = analysis_service.analyze_expense_text(
-                        transaction['description'], 
-                        transaction['amount']
-                    )
-                    category = ai_analysis.get('category', 'other')
-                    confidence = ai_analysis.get('confidence', 0.5)
-                    
-                    categorized_transaction = {
-                        **transaction,
-                        'category': category,
-                        'confidence': confidence,
-                        'ai_tags': ai_analysis.get('tags', [])
-                    }
-                    categorized_transactions.append(categorized_transaction)
-                    
-                    # Kategori toplamları
-                    if category not in category_totals:
-                        category_totals[category] = {
-                            'amount': 0,
-                            'count': 0,
-                            'transactions': []
-                        }
-                    
-                    category_totals[category]['amount'] += transaction['amount']
-                    category_totals[category]['count'] += 1
-                    category_totals[category]['transactions'].append(transaction)
-                    
-                except Exception as e:
-                    print(f"Transaction analysis error: {e}")
-                    # Fallback kategori
-                    categorized_transactions.append({
-                        **transaction,
-                        'category': 'other',
-                        'confidence': 0.3
-                    })
-            
-            # Kategori bilgilerini zenginleştir
-            category_mapping = {
-                'food': ('🍽️', 'Gıda & İçecek', '#ef4444'),
-                'transport': ('🚗', 'Ulaşım', '#3b82f6'),
-                'entertainment': ('🎬', 'Eğlence', '#8b5cf6'),
-                'bills': ('💡', 'Faturalar', '#f59e0b'),
-                'shopping': ('🛍️', 'Alışveriş', '#ec4899'),
-                'health': ('🏥', 'Sağlık', '#10b981'),
-                'education': ('📚', 'Eğitim', '#06b6d4'),
-                'investment': ('📈', 'Yatırım', '#84cc16'),
-                'housing': ('🏠', 'Konut', '#f97316'),
-                'other': ('📦', 'Diğer', '#6366f1')
-            }
-            
-            category_analysis = {}
-            for category, data in category_totals.items():
-                icon, name, color = category_mapping.get(category, category_mapping['other'])
-                percentage = (data['amount'] / total_amount) * 100 if total_amount > 0 else 0
-                
-                category_analysis[category] = {
-                    'name': name,
-                    'icon': icon,
-                    'color': color,
-                    'amount': data['amount'],
-                    'count': data['count'],
-                    'percentage': percentage,
-                    'avg_amount': data['amount'] / data['count'] if data['count'] > 0 else 0
-                }
-            
-            # En büyük kategoriler
-            top_categories = sorted(category_analysis.items(), 
-                                  key=lambda x: x[1]['amount'], reverse=True)[:5]
-            
-            # AI insights üret
-            insights = self._generate_spending_insights(category_analysis, categorized_transactions, total_amount)
-            
-            # Tarih aralığı
-            dates = [datetime.strptime(t['date'], '%Y-%m-%d') for t in transactions]
-            min_date = min(dates).strftime('%Y-%m-%d') if dates else None
-            max_date = max(dates).strftime('%Y-%m-%d') if dates else None
-            
-            return {
-                'summary': {
-                    'total_amount': total_amount,
-                    'transaction_count': transaction_count,
-                    'avg_transaction': avg_transaction,
-                    'date_range': {
-                        'start': min_date,
-                        'end': max_date
-                    }
-                },
-                'category_analysis': category_analysis,
-                'top_categories': [
-                    {
-                        'category': cat[0],
-                        'name': cat[1]['name'],
-                        'icon': cat[1]['icon'],
-                        'amount': cat[1]['amount'],
-                        'percentage': cat[1]['percentage']
-                    } for cat in top_categories
-                ],
-                'insights': insights,
-                'categorized_transactions': categorized_transactions[:50]  # İlk 50 işlem
-            }
-            
-        except Exception as e:
-            print(f"Analysis error: {e}")
-            raise
-    
-    def _generate_spending_insights(self, category_analysis, transactions, total_amount):
-        """Harcama analizine dayalı AI insights üret"""
-        insights = []
-        
-        try:
-            # En yüksek harcama kategorisi
-            if category_analysis:
-                top_category = max(category_analysis.items(), key=lambda x: x[1]['amount'])
-                top_cat_name = top_category[1]['name']
-                top_cat_amount = top_category[1]['amount']
-                top_cat_percentage = top_category[1]['percentage']
-                
-                if top_cat_percentage > 40:
-                    insights.append({
-                        'type': 'warning',
-                        'icon': '⚠️',
-                        'title': f'{top_cat_name} Ağırlıklı Harcama',
-                        'message': f'Harcamalarınızın %{top_cat_percentage:.1f}\'i {top_cat_name} kategorisinde. Bu dengeyi gözden geçirmek isteyebilirsiniz.',
-                        'priority': 4,
-                        'amount': top_cat_amount
-                    })
-                elif top_cat_percentage > 25:
-                    insights.append({
-                        'type': 'info',
-                        'icon': '💡',
-                        'title': f'{top_cat_name} Odaklı Bütçe',
-                        'message': f'{top_cat_name} harcamalarınız toplam bütçenizin %{top_cat_percentage:.1f}\'ini oluşturuyor.',
-                        'priority': 2,
-                        'amount': top_cat_amount
-                    })
-            
-            # Ortalama işlem tutarı analizi
-            avg_transaction = total_amount / len(transactions) if transactions else 0
-            if avg_transaction > 500:
-                insights.append({
-                    'type': 'suggestion',
-                    'icon': '📊',
-                    'title': 'Yüksek Ortalama Harcama',
-                    'message': f'Ortalama işlem tutarınız ₺{avg_transaction:.2f}. Küçük harcamaları takip etmek tasarrufa yardımcı olabilir.',
-                    'priority': 3,
-                    'amount': avg_transaction
-                })
-            
-            # Gıda harcamaları özel analizi
-            if 'food' in category_analysis:
-                food_data = category_analysis['food']
-                food_avg = food_data['avg_amount']
-                food_count = food_data['count']
-                
-                if food_avg > 100:
-                    insights.append({
-                        'type': 'suggestion',
-                        'icon': '🍽️',
-                        'title': 'Yemek Harcama Optimizasyonu',
-                        'message': f'Ortalama yemek harcamanız ₺{food_avg:.2f}. Evde yemek yaparak aylık ₺{(food_avg * food_count * 0.3):.0f} tasarruf edebilirsiniz.',
-                        'priority': 3,
-                        'amount': food_avg * food_count * 0.3
-                    })
-            
-            # Eğlence harcamaları
-            if 'entertainment' in category_analysis:
-                ent_data = category_analysis['entertainment']
-                if ent_data['percentage'] > 20:
-                    insights.append({
-                        'type': 'info',
-                        'icon': '🎬',
-                        'title': 'Eğlence Bütçesi',
-                        'message': f'Eğlence harcamalarınız %{ent_data["percentage"]:.1f}. Bu oran dengeyi gösteriyor!',
-                        'priority': 1,
-                        'amount': ent_data['amount']
-                    })
-            
-            # Genel başarı mesajı
-            if len(insights) < 2:
-                insights.append({
-                    'type': 'achievement',
-                    'icon': '🎉',
-                    'title': 'Dengeli Harcama Profili',
-                    'message': f'{len(transactions)} işleminiz başarıyla analiz edildi. Harcama dağılımınız dengeli görünüyor!',
-                    'priority': 1,
-                    'amount': total_amount
-                })
-            
-            # Insights'ları önceliğe göre sırala
-            insights.sort(key=lambda x: x['priority'], reverse=True)
-            
-            return insights[:5]  # En fazla 5 insight
-            
-        except Exception as e:
-            print(f"Insights generation error: {e}")
-            return [{
-                'type': 'info',
-                'icon': '📊',
-                'title': 'Analiz Tamamlandı',
-                'message': f'{len(transactions)} işleminiz başarıyla kategorilere ayrıldı.',
-                'priority': 1,
-                'amount': total_amount
-            }]
-    
-    def _save_statement_to_db(self, file_name, analysis, transactions):
-        """Ekstreyi veritabanına kaydet"""
+    def _parse_txt_statement(self, file):
+        """TXT formatındaki ekstre dosyasını parse et"""
         try:
-            from datetime import datetime
-            
-            # Ekstre kaydı oluştur
-            statement = CreditCardStatement.objects.create(
-                # user=request.user,  # Şimdilik user yok
-                file_name=file_name,
-                total_amount=analysis['summary']['total_amount'],
-                transaction_count=analysis['summary']['transaction_count'],
-                avg_transaction=analysis['summary']['avg_transaction'],
-                start_date=datetime.strptime(analysis['summary']['date_range']['start'], '%Y-%m-%d').date(),
-                end_date=datetime.strptime(analysis['summary']['date_range']['end'], '%Y-%m-%d').date(),
-                category_analysis=analysis['category_analysis'],
-                top_categories=analysis['top_categories'],
-                insights=analysis['insights']
-            )
-            
-            # İşlemleri kaydet
-            for transaction in analysis['categorized_transactions']:
-                StatementTransaction.objects.create(
-                    statement=statement,
-                    date=datetime.strptime(transaction['date'], '%Y-%m-%d').date(),
-                    description=transaction['description'],
-                    amount=transaction['amount'],
-                    category=transaction['category'],
-                    confidence=transaction.get('confidence', 85.0),
-                    ai_tags=transaction.get('ai_tags', [])
-                )
-            
-            return statement
-            
+            return parse_txt_statement(file)
         except Exception as e:
-            print(f"Error saving statement to DB: {e}")
-            return None
+            print(f"TXT parse error: {e}")
+            return []
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -1059,3 +604,140 @@ class StatementDetailView(APIView):
             return Response({
                 'error': 'Ekstre detayı alınırken hata oluştu'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class MerchantCategoryView(APIView):
+    """İşyeri kategori önbelleği: listeleme ve kullanıcı düzeltmesi
+
+    Genel işyeri → kategori eşlemesi tüm kullanıcıların kategorilendirmesinde
+    kullanıldığından yalnızca yöneticiler (is_staff) değiştirebilir; diğer
+    kullanıcıların düzeltmeleri kendilerine özel kayda yazılır ve yalnızca
+    onların sonraki yüklemelerinde genel kayıttan önce kullanılır.
+    """
+    permission_classes = [IsAuthenticated]
+    
+    def get(self, request):
+        """Önbellekteki işyerlerini getir (?search= ile filtrelenebilir)"""
+        try:
+            entries = MerchantCategory.objects.all()
+            search = request.query_params.get('search', '').strip()
+            if search:
+                entries = entries.filter(normalized_name__icontains=search)
+            
+            merchants = [{
+                'id': entry.id,
+                'normalized_name': entry.normalized_name,
+                'sample_description': entry.sample_description,
+                'category': entry.category,
+                'confidence': entry.confidence,
+                'source': entry.source,
+                'hit_count': entry.hit_count,
+                'updated_at': entry.updated_at.strftime('%Y-%m-%d %H:%M')
+            } for entry in entries.order_by('-hit_count')[:200]]
+            
+            return Response({
+                'merchants': merchants,
+                'total_count': len(merchants)
+            })
+            
+        except Exception as e:
+            print(f"Merchant category list error: {e}")
+            return Response({
+                'error': 'İşyeri kategorileri alınırken hata oluştu'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def post(self, request):
+        """İşyeri kategorisini düzelt; transaction_id verilirse kullanıcının o işlemini de güncelle"""
+        try:
+            description = request.data.get('description', '')
+            category = request.data.get('category', '')
+            transaction_id = request.data.get('transaction_id')
+            
+            if not isinstance(description, str) or not isinstance(category, str):
+                return Response({
+                    'error': 'İşlem açıklaması ve kategori metin olmalı'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            description = description.strip()
+            category = category.strip()
+            if not description or category not in EXPENSE_CATEGORY_CODES:
+                return Response({
+                    'error': 'İşlem açıklaması ve geçerli bir kategori gerekli'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            if transaction_id is not None:
+                if isinstance(transaction_id, bool) or not str(transaction_id).isdigit():
+                    return Response({
+                        'error': 'transaction_id tam sayı olmalı'
+                    }, status=status.HTTP_400_BAD_REQUEST)
+                transaction_id = int(transaction_id)
+                
+                owned = StatementTransaction.objects.filter(id=transaction_id, statement__user=request.user)
+                if not owned.exists():
+                    return Response({
+                        'error': 'İşlem bulunamadı'
+                    }, status=status.HTTP_404_NOT_FOUND)
+            
+            cache = MerchantCategoryCache(request.user)
+            if request.user.is_staff:
+                entry = cache.correct(description, category, request.user)
+            else:
+                entry = cache.override(description, category, request.user)
+            if entry is None:
+                return Response({
+                    'error': 'Açıklamadan işyeri adı çıkarılamadı'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            updated_transactions = owned.update(category=category) if transaction_id is not None else 0
+            
+            return Response({
+                'success': True,
+                'normalized_name': entry.normalized_name,
+                'category': category,
+                'scope': 'global' if request.user.is_staff else 'user',
+                'updated_transactions': updated_transactions
+            })
+            
+        except Exception as e:
+            print(f"Merchant category correction error: {e}")
+            return Response({
+                'error': 'İşyeri kategorisi güncellenirken hata oluştu'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class StatementJobView(APIView):
+    """Arka plan ekstre işinin durumu"""
+    permission_classes = [AllowAny]  # Geçici
+    
+    def get(self, request, job_id):
+        """İşin aşamasını, ilerlemesini ve (kısmi) sonucunu getir (yalnızca işin sahibi)"""
+        try:
+            fail_stale_jobs()
+            owner = request.user if request.user.is_authenticated else None
+            job = StatementJob.objects.get(id=job_id, user=owner)
+            
+            return Response({
+                'id': job.id,
+                'file_name': job.file_name,
+                'status': job.status,
+                'stage': job.stage,
+                'processed_count': job.processed_count,
+                'partial_result': job.partial_result,
+                'result': job.result if job.status == 'completed' else None,
+                'statement_id': job.statement_id,
+                'error': job.error or None,
+                'created_at': job.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                'finished_at': job.finished_at.strftime('%Y-%m-%d %H:%M:%S') if job.finished_at else None
+            })
+            
+        except StatementJob.DoesNotExist:
+            return Response({
+                'error': 'İş bulunamadı'
+            }, status=status.HTTP_404_NOT_FOUND)
+        except Exception as e:
+            print(f"Statement job status error: {e}")
+            return Response({
+                'error': 'İş durumu alınırken hata oluştu'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -13,4 +13,10 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'finoba_api.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Django hazır olduktan sonra içe aktarılmalı (modeller yüklenir)
+from stock_market.streaming import QuoteStreamApp  # noqa: E402
+
+# /api/stocks/stream/ SSE akışı olay döngüsünde, diğer her şey Django'da
+application = QuoteStreamApp(django_application)
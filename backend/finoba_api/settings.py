@@ -98,6 +98,17 @@ DATABASES = {
 }
 
 
+# Cache
+# Yerelde LocMem; üretimde CACHE_BACKEND/CACHE_LOCATION ile paylaşımlı bir backend (Redis, Memcached) verilir
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'finobai-default'),
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -173,3 +184,49 @@ LANGUAGE_CODE = 'tr-tr'
 
 # OpenAI API Settings
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
+
+# Borsa veri servisi ayarları
+STOCK_PRICE_BATCH_SIZE = int(os.getenv('STOCK_PRICE_BATCH_SIZE', '50'))  # Toplu indirme başına sembol
+STOCK_PRICE_MAX_WORKERS = int(os.getenv('STOCK_PRICE_MAX_WORKERS', '4'))  # Eşzamanlı toplu istek
+STOCK_HISTORY_REFRESH_MINUTES = int(os.getenv('STOCK_HISTORY_REFRESH_MINUTES', '15'))  # Bar deposu senkron aralığı
+STOCK_HISTORY_OFFLINE = os.getenv('STOCK_HISTORY_OFFLINE', 'False').lower() == 'true'  # Sadece yerel depo
+STOCK_FUNDAMENTALS_TTL = int(os.getenv('STOCK_FUNDAMENTALS_TTL', str(6 * 60 * 60)))  # Ticker.info taze kalma süresi (sn)
+STOCK_FUNDAMENTALS_STALE_TTL = int(os.getenv('STOCK_FUNDAMENTALS_STALE_TTL', str(24 * 60 * 60)))  # Eski değerin sunulabileceği ek süre (sn)
+STOCK_FUNDAMENTALS_LOCK_TIMEOUT = int(os.getenv('STOCK_FUNDAMENTALS_LOCK_TIMEOUT', '15'))  # Tekil çekim kilidi (sn)
+STOCK_TICK_RETENTION_HOURS = int(os.getenv('STOCK_TICK_RETENTION_HOURS', '48'))  # Ham StockPrice tiklerinin saklama süresi
+STOCK_BAR_1M_RETENTION_DAYS = int(os.getenv('STOCK_BAR_1M_RETENTION_DAYS', '7'))  # 1 dakikalık barlar
+STOCK_BAR_1H_RETENTION_DAYS = int(os.getenv('STOCK_BAR_1H_RETENTION_DAYS', '180'))  # 1 saatlik barlar
+STOCK_BAR_1D_RETENTION_DAYS = int(os.getenv('STOCK_BAR_1D_RETENTION_DAYS', '0'))  # Günlük barlar (0: süresiz)
+STOCK_ROLLUP_DELETE_BATCH_SIZE = int(os.getenv('STOCK_ROLLUP_DELETE_BATCH_SIZE', '5000'))  # Tik silme parça boyutu
+STOCK_STREAM_QUEUE_SIZE = int(os.getenv('STOCK_STREAM_QUEUE_SIZE', '100'))  # Bağlantı başına bekleyen olay sınırı
+STOCK_STREAM_DB_POLL_SECONDS = float(os.getenv('STOCK_STREAM_DB_POLL_SECONDS', '1'))  # Başka süreçteki fiyat güncellemelerini izleme aralığı (0: kapalı)
+STOCK_STREAM_HEARTBEAT_SECONDS = float(os.getenv('STOCK_STREAM_HEARTBEAT_SECONDS', '15'))  # Boştaki akışa yorum satırı gönderme aralığı
+STOCK_STREAM_MAX_SYMBOLS = int(os.getenv('STOCK_STREAM_MAX_SYMBOLS', '200'))  # Bağlantı başına sembol sınırı
+STOCK_BENCHMARK_SYMBOL = os.getenv('STOCK_BENCHMARK_SYMBOL', 'XU100.IS')  # Beta için endeks (BIST 100)
+STOCK_FX_SYMBOL = os.getenv('STOCK_FX_SYMBOL', 'USDTRY=X')  # Piyasa özetindeki döviz kuru
+STOCK_RISK_BETA_WINDOW = int(os.getenv('STOCK_RISK_BETA_WINDOW', '60'))  # Kayan beta penceresi (işlem günü)
+STOCK_RISK_CONFIDENCE = float(os.getenv('STOCK_RISK_CONFIDENCE', '0.95'))  # VaR/CVaR güven düzeyi
+STOCK_ALERT_MAX_RULES_PER_USER = int(os.getenv('STOCK_ALERT_MAX_RULES_PER_USER', '100'))  # Kullanıcı başına aktif uyarı kuralı
+STOCK_ANALYSIS_CACHE_TTL = int(os.getenv('STOCK_ANALYSIS_CACHE_TTL', str(24 * 60 * 60)))  # Analiz sonuçları (sn); yeni bar anahtarı zaten değiştirir
+STOCK_ANALYSIS_LOCK_TIMEOUT = int(os.getenv('STOCK_ANALYSIS_LOCK_TIMEOUT', '60'))  # Aynı analizi hesaplayan süreci bekleme süresi (sn)
+STOCK_MARKET_SNAPSHOT_REFRESH_SECONDS = float(os.getenv('STOCK_MARKET_SNAPSHOT_REFRESH_SECONDS', '30'))  # Piyasa özeti görüntüsünün yenilenme aralığı
+PORTFOLIO_ANALYSIS_MAX_WORKERS = int(os.getenv('PORTFOLIO_ANALYSIS_MAX_WORKERS', '8'))  # Portföy optimizasyonunda paralel analiz
+PORTFOLIO_ANALYSIS_TIMEOUT = float(os.getenv('PORTFOLIO_ANALYSIS_TIMEOUT', '30'))  # Hisse başına analiz zaman aşımı (sn)
+
+# Paylaşılan LLM ağ geçidi ayarları
+LLM_BASE_URL = os.getenv('LLM_BASE_URL') or None  # OpenAI uyumlu alternatif/sahte sunucu
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))  # Süreç başına eşzamanlı istek
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))  # 429/5xx için üstel geri çekilmeli deneme
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))  # İstek zaman aşımı (sn)
+LLM_KEEPALIVE_SECONDS = float(os.getenv('LLM_KEEPALIVE_SECONDS', '30'))  # Boşta bağlantı tutma süresi (sn)
+
+# Ekstre kategorilendirme ayarları
+EXPENSE_CATEGORIZATION_BATCH_SIZE = int(os.getenv('EXPENSE_CATEGORIZATION_BATCH_SIZE', '25'))  # Prompt başına işlem
+EXPENSE_CATEGORIZATION_MAX_WORKERS = int(os.getenv('EXPENSE_CATEGORIZATION_MAX_WORKERS', '4'))  # Eşzamanlı LLM isteği
+EXPENSE_CATEGORIZATION_TIMEOUT = float(os.getenv('EXPENSE_CATEGORIZATION_TIMEOUT', '60'))  # Toplam süre sınırı (sn)
+STATEMENT_SAVE_CHUNK_SIZE = int(os.getenv('STATEMENT_SAVE_CHUNK_SIZE', '500'))  # Ekstre işlemleri bulk_create parça boyutu
+STATEMENT_JOB_MAX_WORKERS = int(os.getenv('STATEMENT_JOB_MAX_WORKERS', '2'))  # Arka plan ekstre işleyici sayısı
+STATEMENT_JOB_CHUNK_SIZE = int(os.getenv('STATEMENT_JOB_CHUNK_SIZE', '200'))  # Aşamalar arası parça boyutu (işlem)
+STATEMENT_JOBS_EAGER = os.getenv('STATEMENT_JOBS_EAGER', 'False').lower() == 'true'  # İşleri istek içinde çalıştır (testler)
+STATEMENT_JOB_HEARTBEAT_SECONDS = float(os.getenv('STATEMENT_JOB_HEARTBEAT_SECONDS', '30'))  # Süreç canlılık sinyali aralığı (kuyruktaki ve çalışan işler)
+STATEMENT_JOB_STALE_MINUTES = int(os.getenv('STATEMENT_JOB_STALE_MINUTES', '10'))  # Bu süre canlılık sinyali gelmeyen iş başarısız sayılır (süreç sonlandıysa)
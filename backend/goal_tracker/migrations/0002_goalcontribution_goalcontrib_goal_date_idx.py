@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goal_tracker', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goalcontribution',
+            index=models.Index(fields=['goal', 'date'], name='goalcontrib_goal_date_idx'),
+        ),
+    ]
@@ -170,6 +170,10 @@ class GoalContribution(models.Model):
         verbose_name = 'Hedef Katkısı'
         verbose_name_plural = 'Hedef Katkıları'
         ordering = ['-date']
+        indexes = [
+            # Hedefin tarih aralığındaki katkıları
+            models.Index(fields=['goal', 'date'], name='goalcontrib_goal_date_idx'),
+        ]
     
     def __str__(self):
         return f"{self.goal.name} - ₺{self.amount}"
@@ -1,6 +1,4 @@
-import openai
-from openai import OpenAI
-from django.conf import settings
+from ai_services.llm_gateway import get_llm_gateway
 from .models import FinancialGoal, GoalContribution
 from .goal_specific_analysis import GoalSpecificAnalyzer
 from django.utils import timezone
@@ -13,7 +11,7 @@ class GoalAnalysisService:
     """AI destekli hedef analiz servisi"""
     
     def __init__(self):
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def analyze_personal_goals(self, user_id):
         """Kullanıcının kişisel hedeflerine yönelik detaylı analiz"""
@@ -112,7 +110,7 @@ class GoalAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen uzman bir kişisel finans danışmanısın. Kullanıcının gerçek verilerine dayanarak, kişiye özel, uygulanabilir ve motivasyon verici finansal stratejiler geliştiriyorsun. Türkçe konuşuyorsun ve her tavsiyeni verilerle destekliyorsun."},
@@ -177,7 +175,7 @@ class GoalAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen uzman bir finansal danışmansın. Türkçe ve anlaşılır cevaplar veriyorsun."},
@@ -234,7 +232,7 @@ class GoalAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen uzman bir finansal planlama danışmanısın. Türkçe ve pratik öneriler veriyorsun."},
@@ -308,7 +306,7 @@ class GoalAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen uzman bir finansal analiz uzmanısın. Türkçe ve detaylı analizler yapıyorsun."},
@@ -587,6 +585,9 @@ class GoalAnalysisService:
 class GoalPlanningService:
     """Hedef planlama ve optimizasyon servisi"""
     
+    def __init__(self):
+        self.llm = get_llm_gateway()
+    
     def calculate_optimal_savings_plan(self, goals_data):
         """Çoklu hedef için optimal tasarruf planı hesapla"""
         try:
@@ -762,7 +763,7 @@ class GoalPlanningService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen uzman bir kişisel finans danışmanısın. Kullanıcının GERÇEK verilerine ve SPESİFİK hedeflerine dayanarak, her hedef için ayrı ayrı özelleştirilmiş, uygulanabilir ve motivasyon verici finansal stratejiler geliştiriyorsun. Türkçe konuşuyorsun ve her tavsiyeni gerçek verilerle ve hedef türlerine göre özelleştiriyorsun."},
@@ -4,18 +4,27 @@ Bu servis, gelişmiş yapay zeka algoritmaları ile borsa analizi yapar.
 """
 
 import json
+import time
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Any, Optional, Tuple
-import yfinance as yf
 import requests
-import openai
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 from dataclasses import dataclass
 
+from ai_services.llm_gateway import get_llm_gateway
+
+from .analysis_cache import analysis_cache, profile_bucket
+from .fundamentals_cache import fundamentals_cache
+from .history_store import PriceHistoryStore
+from .indicators import compute_indicator_series, last_valid
+from .portfolio_optimizer import PortfolioOptimizationEngine
+from .risk_metrics import RiskMetricsEngine
 from .models import (
     StockSymbol, StockPrice, StockAnalysis, UserPortfolio, 
     UserRiskProfile, PortfolioPosition
@@ -69,34 +78,65 @@ class AdvancedAIStockAnalyzer:
     """Ultra gelişmiş AI borsa analiz motoru"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
         self.risk_free_rate = 0.12  # Türkiye 10 yıllık tahvil faizi
+        self.history_store = PriceHistoryStore()
+        self.risk_engine = RiskMetricsEngine(risk_free_rate=self.risk_free_rate)
     
     def analyze_stock_comprehensive(self, symbol: str, user_profile: Optional[UserRiskProfile] = None) -> Dict[str, Any]:
-        """Kapsamlı hisse analizi (Teknik + Fundamental + AI)"""
+        """Kapsamlı hisse analizi (Teknik + Fundamental + AI)
+
+        Profilden bağımsız analiz (sembol, son bar) ve AI değerlendirmesi
+        (sembol, son bar, profil grubu) anahtarlarıyla önbelleklenir.
+        """
         try:
-            # 1. Veri toplama
-            stock_data = self._fetch_comprehensive_data(symbol)
-            if not stock_data:
+            # Eksik kuyruk önce depoya alınır; yeni bar önbellek anahtarını değiştirir
+            if not self.history_store.offline:
+                self.history_store.sync(symbol, days=365)
+            bar_stamp = self.history_store.last_bar_stamp(symbol)
+            if bar_stamp is None:
                 return self._generate_error_response(f"Veri bulunamadı: {symbol}")
             
-            # 2. Teknik analiz
-            technical_analysis = self._perform_technical_analysis(stock_data['price_history'])
-            
-            # 3. Fundamental analiz
-            fundamental_analysis = self._perform_fundamental_analysis(stock_data['fundamental_data'])
-            
-            # 4. Sentiment analizi
-            sentiment_analysis = self._analyze_market_sentiment(symbol)
+            # 1-4, 6. Veri, teknik, fundamental, sentiment ve risk analizi
+            degraded = {}
             
-            # 5. AI destekli değerlendirme
-            ai_evaluation = self._generate_ai_evaluation(
-                symbol, technical_analysis, fundamental_analysis, 
-                sentiment_analysis, user_profile
-            )
+            def compute_base():
+                base = self._perform_base_analysis(symbol)
+                if base is None or base['complete']:
+                    return base
+                # Yedek değerli sonuç önbelleğe yazılmaz; yalnızca bu istekte kullanılır
+                degraded['base'] = base
+                return None
             
-            # 6. Risk analizi
-            risk_analysis = self._calculate_risk_metrics(stock_data['price_history'])
+            base = analysis_cache.get_or_compute('base', symbol, bar_stamp, compute_base) or degraded.get('base')
+            if base is None:
+                return self._generate_error_response(f"Veri bulunamadı: {symbol}")
+            stock_data = base['stock_data']
+            technical_analysis = base['technical_analysis']
+            fundamental_analysis = base['fundamental_analysis']
+            sentiment_analysis = base['sentiment_analysis']
+            risk_analysis = base['risk_analysis']
+            
+            # 5. AI destekli değerlendirme (profil grubu başına bir LLM çağrısı)
+            bucket = profile_bucket(user_profile)
+            
+            def evaluate():
+                return self._request_ai_evaluation(
+                    symbol, technical_analysis, fundamental_analysis, sentiment_analysis, bucket
+                )
+            
+            try:
+                if base.get('complete', True):
+                    ai_evaluation = analysis_cache.get_or_compute(
+                        'ai', symbol, f"{bar_stamp}:{bucket['key'] if bucket else 'anon'}", evaluate
+                    )
+                else:
+                    # Eksik temel katmana dayanan değerlendirme de önbelleğe yazılmaz
+                    ai_evaluation = evaluate()
+            except Exception as e:
+                # Yedek değerlendirme önbelleğe yazılmaz; sonraki istek LLM'i yeniden dener
+                print(f"AI evaluation error: {e}")
+                ai_evaluation = self._get_fallback_ai_evaluation(technical_analysis, fundamental_analysis)
             
             # 7. Hedef fiyat hesaplama
             target_prices = self._calculate_target_prices(
@@ -181,19 +221,42 @@ class AdvancedAIStockAnalyzer:
             print(f"Comprehensive analysis error for {symbol}: {e}")
             return self._generate_error_response(f"Analiz hatası: {str(e)}")
     
+    def _perform_base_analysis(self, symbol: str) -> Optional[Dict[str, Any]]:
+        """Kullanıcı profilinden bağımsız analiz katmanı
+
+        Temel veri çekilemediyse veya bir bileşen yedek değer döndürdüyse
+        'complete' False olur (önbelleğe yazılmaz).
+        """
+        stock_data = self._fetch_comprehensive_data(symbol)
+        if not stock_data:
+            return None
+        
+        price_history = stock_data['price_history']
+        technical_analysis = self._perform_technical_analysis(price_history)
+        fundamental_analysis = self._perform_fundamental_analysis(stock_data['fundamental_data'])
+        risk_analysis = self._calculate_risk_metrics(price_history)
+        return {
+            # Ham geçmiş ve Ticker.info önbelleğe yazılmaz
+            'stock_data': {key: stock_data[key] for key in ('company_name', 'current_price', 'sector', 'industry')},
+            'technical_analysis': technical_analysis,
+            'fundamental_analysis': fundamental_analysis,
+            'sentiment_analysis': self._analyze_market_sentiment(symbol),
+            'risk_analysis': risk_analysis,
+            'complete': bool(stock_data['fundamental_data']) and not any(
+                part.get('is_fallback') for part in (technical_analysis, fundamental_analysis, risk_analysis)
+            ),
+        }
+    
     def _fetch_comprehensive_data(self, symbol: str) -> Optional[Dict]:
         """Kapsamlı veri çekme"""
         try:
-            # Yahoo Finance'dan veri çek
-            ticker = yf.Ticker(symbol)
-            
-            # Fiyat geçmişi (1 yıl)
-            hist = ticker.history(period="1y", interval="1d")
+            # Fiyat geçmişi (1 yıl) - yerel depodan; eksik kuyruk analiz başında senkronlanır
+            hist = self.history_store.load(symbol, days=365)
             if hist.empty:
                 return None
                 
-            # Temel veriler
-            info = ticker.info
+            # Temel veriler (TTL önbellekli)
+            info = fundamentals_cache.get(symbol)
             
             # Son fiyat verileri
             latest = hist.iloc[-1]
@@ -221,19 +284,27 @@ class AdvancedAIStockAnalyzer:
             lows = price_data['Low'].values
             volumes = price_data['Volume'].values
             
+            # Tüm gösterge serileri tek geçişte
+            series = compute_indicator_series(closes)
+            
             # Hareketli ortalamalar
-            sma_20 = np.mean(closes[-20:])
-            sma_50 = np.mean(closes[-50:]) if len(closes) >= 50 else sma_20
-            sma_200 = np.mean(closes[-200:]) if len(closes) >= 200 else sma_50
+            sma_20 = last_valid(series.sma_20, np.mean(closes[-20:]))
+            sma_50 = last_valid(series.sma_50, sma_20)
+            sma_200 = last_valid(series.sma_200, sma_50)
             
-            # RSI hesaplama
-            rsi = self._calculate_rsi(closes)
+            # RSI (Wilder)
+            rsi = last_valid(series.rsi, 50.0)
             
-            # MACD hesaplama
-            macd, macd_signal = self._calculate_macd(closes)
+            # MACD (26 günden kısa seride nötr)
+            if len(closes) >= 26:
+                macd = last_valid(series.macd, 0.0)
+                macd_signal = last_valid(series.macd_signal, macd)
+            else:
+                macd, macd_signal = 0.0, 0.0
             
             # Bollinger Bands
-            bb_upper, bb_lower = self._calculate_bollinger_bands(closes)
+            bb_upper = last_valid(series.bollinger_upper, closes[-1] * 1.02)
+            bb_lower = last_valid(series.bollinger_lower, closes[-1] * 0.98)
             
             # Support/Resistance seviyeleri
             support, resistance = self._find_support_resistance(highs, lows)
@@ -304,74 +375,6 @@ class AdvancedAIStockAnalyzer:
             print(f"Technical analysis error: {e}")
             return self._get_default_technical_analysis()
     
-    def _calculate_rsi(self, prices: np.ndarray, period: int = 14) -> float:
-        """RSI hesaplama"""
-        if len(prices) < period + 1:
-            return 50.0
-            
-        deltas = np.diff(prices)
-        gains = np.where(deltas > 0, deltas, 0)
-        losses = np.where(deltas < 0, -deltas, 0)
-        
-        avg_gain = np.mean(gains[-period:])
-        avg_loss = np.mean(losses[-period:])
-        
-        if avg_loss == 0:
-            return 100.0
-            
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-    
-    def _calculate_macd(self, prices: np.ndarray) -> Tuple[float, float]:
-        """MACD hesaplama"""
-        if len(prices) < 26:
-            return 0.0, 0.0
-            
-        ema_12 = self._calculate_ema(prices, 12)
-        ema_26 = self._calculate_ema(prices, 26)
-        macd = ema_12 - ema_26
-        
-        # MACD signal line (MACD'nin 9 günlük EMA'sı)
-        macd_values = []
-        for i in range(26, len(prices)):
-            ema_12_i = self._calculate_ema(prices[:i+1], 12)
-            ema_26_i = self._calculate_ema(prices[:i+1], 26)
-            macd_values.append(ema_12_i - ema_26_i)
-        
-        if len(macd_values) >= 9:
-            signal = self._calculate_ema(np.array(macd_values), 9)
-        else:
-            signal = macd
-            
-        return macd, signal
-    
-    def _calculate_ema(self, prices: np.ndarray, period: int) -> float:
-        """EMA hesaplama"""
-        if len(prices) < period:
-            return np.mean(prices)
-            
-        multiplier = 2 / (period + 1)
-        ema = prices[0]
-        
-        for price in prices[1:]:
-            ema = (price * multiplier) + (ema * (1 - multiplier))
-            
-        return ema
-    
-    def _calculate_bollinger_bands(self, prices: np.ndarray, period: int = 20) -> Tuple[float, float]:
-        """Bollinger Bands hesaplama"""
-        if len(prices) < period:
-            return prices[-1] * 1.02, prices[-1] * 0.98
-            
-        sma = np.mean(prices[-period:])
-        std = np.std(prices[-period:])
-        
-        upper = sma + (2 * std)
-        lower = sma - (2 * std)
-        
-        return upper, lower
-    
     def _find_support_resistance(self, highs: np.ndarray, lows: np.ndarray) -> Tuple[float, float]:
         """Support/Resistance seviyeleri"""
         # Son 50 günün verilerini kullan
@@ -629,105 +632,98 @@ class AdvancedAIStockAnalyzer:
             'sentiment_score': round(sentiment_score, 2)
         }
     
-    def _generate_ai_evaluation(self, symbol: str, technical: Dict, fundamental: Dict, 
-                               sentiment: Dict, user_profile: Optional[UserRiskProfile]) -> Dict[str, Any]:
-        """AI destekli kapsamlı değerlendirme"""
-        try:
-            # Kullanıcı profil bilgilerini hazırla
-            user_context = ""
-            if user_profile:
-                user_context = f"""
-                Kullanıcı Profili:
-                - Risk Toleransı: {user_profile.risk_tolerance}
-                - Yatırım Hedefi: {user_profile.investment_goal}
-                - Yatırım Vadesi: {user_profile.investment_horizon} ay
-                - Aylık Bütçe: {user_profile.monthly_investment_budget}₺
-                - Deneyim: {user_profile.experience_years} yıl
-                """
-            
-            # AI analiz promptu
-            prompt = f"""
-            {symbol} hissesi için ultra detaylı yatırım analizi yap:
-            
-            TEKNİK ANALİZ:
-            - Genel Sinyal: {technical['overall_signal']} (%{technical['signal_strength']} güç)
-            - RSI: {technical['indicators']['rsi']}
-            - MACD: {technical['indicators']['macd']}
-            - Trend: {technical['trend_analysis']['overall_trend']}
-            - Support: {technical['support_resistance']['support']}
-            - Resistance: {technical['support_resistance']['resistance']}
-            
-            FUNDAMENTAL ANALİZ:
-            - Değerleme Skoru: {fundamental['valuation_score']}/100
-            - Finansal Sağlık: {fundamental['financial_health']}/100
-            - Büyüme Skoru: {fundamental['growth_metrics']['growth_score']}/100
-            - Karlılık Skoru: {fundamental['profitability_metrics']['profitability_score']}/100
-            
-            SENTIMENT ANALİZ:
-            - Haber Sentiment: {sentiment['news_sentiment']}
-            - Sosyal Sentiment: {sentiment['social_sentiment']}
-            - Genel Sentiment: {sentiment['overall_sentiment']}
-            
-            {user_context}
-            
-            JSON formatında yanıt ver:
-            {{
-                "recommendation": "STRONG_BUY/BUY/HOLD/SELL/STRONG_SELL",
-                "confidence": 85,
-                "summary": "3 cümlelik özet değerlendirme",
-                "investment_thesis": "Yatırım tezi - neden bu tavsiyeyi veriyorsun",
-                "strengths": ["güçlü yön 1", "güçlü yön 2", "güçlü yön 3"],
-                "weaknesses": ["zayıf yön 1", "zayıf yön 2"],
-                "catalysts": ["olumlu katalizör 1", "olumlu katalizör 2"],
-                "risks": ["risk faktörü 1", "risk faktörü 2"],
-                "time_horizon": "KISA/ORTA/UZUN",
-                "allocation_suggestion": 15,
-                "monitoring_points": ["takip edilecek metrik 1", "takip edilecek metrik 2"]
-            }}
+    def _request_ai_evaluation(self, symbol: str, technical: Dict, fundamental: Dict,
+                               sentiment: Dict, bucket: Optional[Dict[str, str]]) -> Dict[str, Any]:
+        """AI destekli kapsamlı değerlendirme (hata durumunda istisna fırlatır)
+
+        Prompt yalnızca profil grubuna bağlıdır; böylece sonuç aynı gruptaki
+        tüm kullanıcılar için önbellekten sunulabilir.
+        """
+        # Kullanıcı profil bilgilerini hazırla
+        user_context = ""
+        if bucket:
+            user_context = f"""
+            Kullanıcı Profili:
+            - Risk Toleransı: {bucket['risk_tolerance']}
+            - Yatırım Hedefi: {bucket['investment_goal']}
+            - Yatırım Vadesi: {bucket['horizon']}
+            - Aylık Bütçe: {bucket['budget']}
+            - Deneyim: {bucket['experience']}
             """
-            
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": "Sen dünya çapında deneyimli bir yatırım analisti ve portföy yöneticisisin. Türkiye piyasalarında uzman ve kullanıcılara kişiselleştirilmiş yatırım tavsiyeleri veriyorsun."},
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=800,
-                temperature=0.3
-            )
-            
-            ai_analysis = json.loads(response.choices[0].message.content)
-            return ai_analysis
-            
-        except Exception as e:
-            print(f"AI evaluation error: {e}")
-            return self._get_fallback_ai_evaluation(technical, fundamental)
+        
+        # AI analiz promptu
+        prompt = f"""
+        {symbol} hissesi için ultra detaylı yatırım analizi yap:
+        
+        TEKNİK ANALİZ:
+        - Genel Sinyal: {technical['overall_signal']} (%{technical['signal_strength']} güç)
+        - RSI: {technical['indicators']['rsi']}
+        - MACD: {technical['indicators']['macd']}
+        - Trend: {technical['trend_analysis']['overall_trend']}
+        - Support: {technical['support_resistance']['support']}
+        - Resistance: {technical['support_resistance']['resistance']}
+        
+        FUNDAMENTAL ANALİZ:
+        - Değerleme Skoru: {fundamental['valuation_score']}/100
+        - Finansal Sağlık: {fundamental['financial_health']}/100
+        - Büyüme Skoru: {fundamental['growth_metrics']['growth_score']}/100
+        - Karlılık Skoru: {fundamental['profitability_metrics']['profitability_score']}/100
+        
+        SENTIMENT ANALİZ:
+        - Haber Sentiment: {sentiment['news_sentiment']}
+        - Sosyal Sentiment: {sentiment['social_sentiment']}
+        - Genel Sentiment: {sentiment['overall_sentiment']}
+        
+        {user_context}
+        
+        JSON formatında yanıt ver:
+        {{
+            "recommendation": "STRONG_BUY/BUY/HOLD/SELL/STRONG_SELL",
+            "confidence": 85,
+            "summary": "3 cümlelik özet değerlendirme",
+            "investment_thesis": "Yatırım tezi - neden bu tavsiyeyi veriyorsun",
+            "strengths": ["güçlü yön 1", "güçlü yön 2", "güçlü yön 3"],
+            "weaknesses": ["zayıf yön 1", "zayıf yön 2"],
+            "catalysts": ["olumlu katalizör 1", "olumlu katalizör 2"],
+            "risks": ["risk faktörü 1", "risk faktörü 2"],
+            "time_horizon": "KISA/ORTA/UZUN",
+            "allocation_suggestion": 15,
+            "monitoring_points": ["takip edilecek metrik 1", "takip edilecek metrik 2"]
+        }}
+        """
+        
+        response = self.llm.chat_completion(
+            model="gpt-3.5-turbo",
+            messages=[
+                {"role": "system", "content": "Sen dünya çapında deneyimli bir yatırım analisti ve portföy yöneticisisin. Türkiye piyasalarında uzman ve kullanıcılara kişiselleştirilmiş yatırım tavsiyeleri veriyorsun."},
+                {"role": "user", "content": prompt}
+            ],
+            max_tokens=800,
+            temperature=0.3
+        )
+        
+        ai_analysis = json.loads(response.choices[0].message.content)
+        return ai_analysis
+        
     
     def _calculate_risk_metrics(self, price_data: pd.DataFrame) -> Dict[str, Any]:
-        """Risk metrik hesaplamaları"""
+        """Risk metrik hesaplamaları (BIST 100'e karşı beta dahil)"""
         try:
-            returns = price_data['Close'].pct_change().dropna()
-            
-            # Volatilite (yıllık)
-            daily_vol = returns.std()
-            annual_vol = daily_vol * np.sqrt(252)
-            
-            # Beta (BIST 100'e karşı, basitleştirilmiş)
-            # Gerçek uygulamada BIST 100 verisi çekilmeli
-            beta = 1.0  # Varsayılan beta
+            returns = price_data['Close'].pct_change().iloc[1:].to_frame('stock')
             
-            # Value at Risk (95% güven aralığı)
-            var_95 = np.percentile(returns, 5) * 100
+            # Endeks serisi yerel depodan; hisse günlerine hizalanır
+            benchmark = self.history_store.get_history(settings.STOCK_BENCHMARK_SYMBOL, days=365)
+            benchmark_returns = benchmark['Close'].reindex(price_data.index).ffill().pct_change(
+                fill_method=None
+            ).iloc[1:] if not benchmark.empty else None
             
-            # Maximum Drawdown
-            cumulative = (1 + returns).cumprod()
-            running_max = cumulative.expanding().max()
-            drawdown = (cumulative - running_max) / running_max
-            max_drawdown = drawdown.min() * 100
+            metrics = self.risk_engine.compute(returns, benchmark_returns).for_symbol('stock')
+            if metrics['volatility'] is None:
+                raise ValueError('Yetersiz fiyat geçmişi')
             
-            # Sharpe Ratio
-            excess_returns = returns.mean() - (self.risk_free_rate / 252)
-            sharpe_ratio = excess_returns / returns.std() * np.sqrt(252) if returns.std() > 0 else 0
+            annual_vol = metrics['volatility'] / 100
+            # Endeks verisi yoksa piyasa betası varsayılır
+            beta = metrics['beta'] if metrics['beta'] is not None else 1.0
             
             # Risk seviyesi belirleme
             if annual_vol < 0.15:
@@ -743,9 +739,13 @@ class AdvancedAIStockAnalyzer:
                 'overall_risk': risk_level,
                 'volatility': round(annual_vol * 100, 2),  # Yüzde olarak
                 'beta': round(beta, 2),
-                'var_95': round(var_95, 2),
-                'max_drawdown': round(max_drawdown, 2),
-                'sharpe_ratio': round(sharpe_ratio, 2)
+                'rolling_beta': round(metrics['rolling_beta'], 2) if metrics['rolling_beta'] is not None else None,
+                'var_95': round(metrics['var_95'], 2),
+                'cvar_95': round(metrics['cvar_95'], 2),
+                'var_95_parametric': round(metrics['var_95_parametric'], 2),
+                'max_drawdown': round(metrics['max_drawdown'], 2),
+                'sharpe_ratio': round(metrics['sharpe_ratio'] or 0, 2),
+                'sortino_ratio': round(metrics['sortino_ratio'] or 0, 2)
             }
             
         except Exception as e:
@@ -756,7 +756,8 @@ class AdvancedAIStockAnalyzer:
                 'beta': 1.0,
                 'var_95': -5.0,
                 'max_drawdown': -20.0,
-                'sharpe_ratio': 0.5
+                'sharpe_ratio': 0.5,
+                'is_fallback': True
             }
     
     def _calculate_target_prices(self, current_price: float, technical: Dict, 
@@ -987,7 +988,8 @@ class AdvancedAIStockAnalyzer:
                 'short_term': {'direction': 'NEUTRAL', 'strength': 0},
                 'medium_term': {'direction': 'NEUTRAL', 'strength': 0},
                 'long_term': {'direction': 'NEUTRAL', 'strength': 0}
-            }
+            },
+            'is_fallback': True
         }
     
     def _get_default_fundamental_analysis(self) -> Dict[str, Any]:
@@ -1010,7 +1012,8 @@ class AdvancedAIStockAnalyzer:
                 'pe_ratio': 0,
                 'pb_ratio': 0,
                 'debt_to_equity': 0
-            }
+            },
+            'is_fallback': True
         }
     
     def _get_fallback_ai_evaluation(self, technical: Dict, fundamental: Dict) -> Dict[str, Any]:
@@ -1068,19 +1071,24 @@ class AdvancedAIStockAnalyzer:
 class PortfolioOptimizerService:
     """Modern Portföy Teorisi ile optimizasyon"""
     
+    RISK_TOLERANCE_METHODS = {
+        'CONSERVATIVE': 'min_variance',
+        'MODERATE': 'risk_parity',
+        'AGGRESSIVE': 'max_sharpe',
+        'VERY_AGGRESSIVE': 'max_sharpe',
+    }
+    
     def __init__(self):
         self.analyzer = AdvancedAIStockAnalyzer()
+        self.optimization_engine = PortfolioOptimizationEngine()
+        self.risk_engine = RiskMetricsEngine()
     
     def optimize_portfolio(self, user_profile: UserRiskProfile, 
                           available_stocks: List[str]) -> Dict[str, Any]:
         """Kullanıcı profiline göre optimal portföy oluştur"""
         
-        # Her hisse için analiz yap
-        stock_analyses = {}
-        for symbol in available_stocks:
-            analysis = self.analyzer.analyze_stock_comprehensive(symbol, user_profile)
-            if not analysis.get('error'):
-                stock_analyses[symbol] = analysis
+        # Her hisse için analiz yap (eşzamanlı, kısmi sonuçlar korunur)
+        stock_analyses, failed_symbols = self._analyze_symbols(available_stocks, user_profile)
         
         # Risk-getiri optimizasyonu
         optimal_weights = self._calculate_optimal_weights(stock_analyses, user_profile)
@@ -1091,6 +1099,9 @@ class PortfolioOptimizerService:
         # Çeşitlendirme analizi
         diversification_analysis = self._analyze_diversification(optimal_weights, stock_analyses)
         
+        # Tüm hisselerin risk metrikleri tek vektörel geçişte
+        risk_metrics = self.risk_engine.score_universe(list(stock_analyses))
+        
         return {
             'optimal_allocation': optimal_weights,
             'portfolio_metrics': portfolio_metrics,
@@ -1098,13 +1109,75 @@ class PortfolioOptimizerService:
             'rebalancing_schedule': self._suggest_rebalancing_schedule(user_profile),
             'risk_budget': self._calculate_risk_budget(optimal_weights, stock_analyses),
             'expected_returns': portfolio_metrics['expected_annual_return'],
-            'max_drawdown_estimate': portfolio_metrics['estimated_max_drawdown']
+            'max_drawdown_estimate': portfolio_metrics['estimated_max_drawdown'],
+            'risk_metrics': {symbol: risk_metrics.for_symbol(symbol) for symbol in risk_metrics.symbols},
+            'failed_symbols': failed_symbols
         }
     
+    def _analyze_symbols(self, symbols: List[str], 
+                         user_profile: UserRiskProfile) -> Tuple[Dict[str, Any], List[str]]:
+        """Hisseleri sınırlı bir iş parçacığı havuzunda paralel analiz et"""
+        if not symbols:
+            return {}, []
+        
+        max_workers = max(1, min(settings.PORTFOLIO_ANALYSIS_MAX_WORKERS, len(symbols)))
+        timeout = settings.PORTFOLIO_ANALYSIS_TIMEOUT
+        # Havuz dolu olsa bile kuyruktaki işlerin bekleyeceği en uzun süre
+        waves = -(-len(symbols) // max_workers)
+        overall_deadline = time.monotonic() + timeout * waves
+        started = {}
+        
+        def run(symbol: str) -> Dict[str, Any]:
+            started[symbol] = time.monotonic()
+            try:
+                return self.analyzer.analyze_stock_comprehensive(symbol, user_profile)
+            finally:
+                # İş parçacığına ait DB bağlantısını bırak
+                connection.close()
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='portfolio-analysis')
+        futures = {executor.submit(run, symbol): symbol for symbol in symbols}
+        pending = set(futures)
+        results = {}
+        
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    symbol = futures[future]
+                    try:
+                        analysis = future.result()
+                    except Exception as e:
+                        print(f"Portfolio analysis error for {symbol}: {e}")
+                        continue
+                    if not analysis.get('error'):
+                        results[symbol] = analysis
+                
+                # Süresi dolan hisseleri bekleme
+                now = time.monotonic()
+                for future in list(pending):
+                    symbol = futures[future]
+                    start = started.get(symbol)
+                    if (start is not None and now - start > timeout) or now > overall_deadline:
+                        print(f"Portfolio analysis timeout for {symbol}")
+                        pending.discard(future)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        stock_analyses = {symbol: results[symbol] for symbol in symbols if symbol in results}
+        failed_symbols = [symbol for symbol in symbols if symbol not in results]
+        return stock_analyses, failed_symbols
+    
     def _calculate_optimal_weights(self, analyses: Dict, user_profile: UserRiskProfile) -> Dict[str, float]:
         """Optimal ağırlık hesaplama"""
-        # Basitleştirilmiş optimizasyon - gerçek uygulamada scipy.optimize kullanılmalı
+        # Fiyat geçmişi yeterliyse kovaryans tabanlı optimizasyon
+        method = self.RISK_TOLERANCE_METHODS.get(getattr(user_profile, 'risk_tolerance', None), 'risk_parity')
+        result = self.optimization_engine.optimize(list(analyses.keys()), method=method)
+        if result is not None:
+            return {symbol: round(weight * 100, 2) for symbol, weight in result.weights.items()}
         
+        # Geçmiş yetersizse skor bazlı basit dağılım
         total_score = 0
         stock_scores = {}
         
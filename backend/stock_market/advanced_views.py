@@ -9,16 +9,19 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils import timezone
 from datetime import datetime, timedelta
 import json
 from typing import Dict, List, Any
 
 from .models import (
     StockSymbol, StockPrice, StockAnalysis, UserPortfolio, 
-    UserRiskProfile, PortfolioPosition, MarketNews
+    UserRiskProfile, PortfolioPosition, MarketNews, PriceAlertRule
 )
 from .advanced_ai_service import AdvancedAIStockAnalyzer, PortfolioOptimizerService
 from .services import StockDataService, MarketNewsService
+from .screener import StockScreener
+from .alert_rules import alert_payload, create_alert_rule
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -323,7 +326,7 @@ class PersonalizedStockScreenerView(APIView):
             user_budget = request.data.get('budget', 10000)
             investment_horizon = request.data.get('investment_horizon', 12)
             
-            # Mock hisse tarama sonuçları
+            # Faktör tablosu üzerinde tarama
             screened_stocks = self._perform_stock_screening(criteria, user_budget, investment_horizon)
             
             # AI öneriler
@@ -347,107 +350,57 @@ class PersonalizedStockScreenerView(APIView):
                 'error': 'Hisse tarama işlemi başarısız'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+    # Yatırım tarzı → faktör tablosunda sıralama
+    STYLE_ORDERING = {
+        'BALANCED': '-ai_score',
+        'GROWTH': '-return_3m',
+        'VALUE': 'pe_ratio',
+        'DIVIDEND': '-dividend_yield',
+        'INCOME': '-dividend_yield',
+    }
+    
     def _perform_stock_screening(self, criteria: Dict, budget: float, horizon: int) -> List[Dict]:
-        """Hisse tarama işlemi"""
-        # Mock tarama sonuçları - gerçek uygulamada veritabanı sorgusu yapılacak
-        mock_results = [
-            {
-                'symbol': 'THYAO.IS',
-                'name': 'Türk Hava Yolları',
-                'sector': 'Ulaştırma',
-                'current_price': 245.50,
-                'market_cap': 3380000000,
-                'pe_ratio': 12.5,
-                'dividend_yield': 2.1,
-                'volume': 2150000,
-                'risk_score': 68,
-                'ai_score': 85,
-                'match_reasons': [
-                    'P/E oranı kriterlere uygun',
-                    'Yüksek işlem hacmi',
-                    'Sektör tercihinizle uyumlu'
-                ],
-                'price_target': 285.00,
-                'investment_thesis': 'Turizm toparlanması ile güçlü büyüme potansiyeli'
-            },
-            {
-                'symbol': 'ASELS.IS',
-                'name': 'Aselsan',
-                'sector': 'Teknoloji',
-                'current_price': 89.75,
-                'market_cap': 196450000000,
-                'pe_ratio': 15.8,
-                'dividend_yield': 1.8,
-                'volume': 3250000,
-                'risk_score': 75,
-                'ai_score': 92,
-                'match_reasons': [
-                    'Teknoloji sektörü lideri',
-                    'Güçlü büyüme potansiyeli',
-                    'Yüksek AI skoru'
-                ],
-                'price_target': 115.00,
-                'investment_thesis': 'Savunma teknolojilerinde global oyuncu'
-            },
-            {
-                'symbol': 'BIMAS.IS',
-                'name': 'BİM',
-                'sector': 'Perakende',
-                'current_price': 485.00,
-                'market_cap': 329550000000,
-                'pe_ratio': 18.2,
-                'dividend_yield': 3.2,
-                'volume': 1850000,
-                'risk_score': 45,
-                'ai_score': 78,
-                'match_reasons': [
-                    'Düşük risk profili',
-                    'İstikrarlı temettü',
-                    'Güçlü finansal yapı'
-                ],
-                'price_target': 520.00,
-                'investment_thesis': 'Perakende sektöründe güvenilir büyüme'
-            }
-        ]
+        """Hisse tarama işlemi (gecelik faktör tablosu üzerinde indeksli sorgu)"""
+        filters = {key: value for key, value in criteria.items() if key != 'investment_style'}
+        order_by = self.STYLE_ORDERING.get(str(criteria.get('investment_style', '')).upper(), '-ai_score')
+        results = StockScreener().screen(filters, order_by=order_by, limit=10)['results']
         
-        # Kriterlere göre filtrele
         filtered_results = []
-        for stock in mock_results:
-            if self._meets_criteria(stock, criteria):
-                # Bütçeye göre önerilen miktar hesapla
-                max_investment = min(budget * 0.2, budget / len(mock_results))  # Maksimum %20 veya eşit dağılım
-                suggested_quantity = int(max_investment / stock['current_price'])
-                stock['suggested_quantity'] = suggested_quantity
-                stock['suggested_investment'] = suggested_quantity * stock['current_price']
-                
-                filtered_results.append(stock)
-        
-        # AI skoruna göre sırala
-        filtered_results.sort(key=lambda x: x['ai_score'], reverse=True)
+        for stock in results:
+            if not stock['current_price']:
+                continue
+            stock['ai_score'] = stock['ai_score'] or 0
+            stock['risk_score'] = stock['risk_score'] if stock['risk_score'] is not None else 50
+            stock['match_reasons'] = self._match_reasons(stock, criteria)
+            
+            # Bütçeye göre önerilen miktar hesapla
+            max_investment = min(budget * 0.2, budget / len(results))  # Maksimum %20 veya eşit dağılım
+            suggested_quantity = int(max_investment / stock['current_price'])
+            stock['suggested_quantity'] = suggested_quantity
+            stock['suggested_investment'] = suggested_quantity * stock['current_price']
+            
+            filtered_results.append(stock)
         
-        return filtered_results[:10]  # En iyi 10 hisse
+        return filtered_results  # En iyi 10 hisse
     
-    def _meets_criteria(self, stock: Dict, criteria: Dict) -> bool:
-        """Hisse kriterleri karşılıyor mu kontrol et"""
-        if stock['market_cap'] < criteria['min_market_cap']:
-            return False
-        if stock['pe_ratio'] > criteria['max_pe_ratio']:
-            return False
-        if stock['dividend_yield'] < criteria['min_dividend_yield']:
-            return False
-        if criteria['sectors'] and stock['sector'] not in criteria['sectors']:
-            return False
-        if stock['volume'] < criteria['min_volume']:
-            return False
-        
-        # Risk seviyesi kontrolü
-        risk_level = criteria['risk_level']
-        if risk_level == 'DÜŞÜK' and stock['risk_score'] > 60:
-            return False
-        elif risk_level == 'YÜKSEK' and stock['risk_score'] < 60:
-            return False
-        
-        return True
+    def _match_reasons(self, stock: Dict, criteria: Dict) -> List[str]:
+        """Hissenin kriterlerle eşleşme nedenleri"""
+        reasons = []
+        if criteria.get('max_pe_ratio') and stock['pe_ratio'] is not None:
+            reasons.append('P/E oranı kriterlere uygun')
+        if criteria.get('sectors') and stock['sector'] in criteria['sectors']:
+            reasons.append('Sektör tercihinizle uyumlu')
+        if stock['volume'] and stock['volume'] >= max(criteria.get('min_volume') or 0, 1000000):
+            reasons.append('Yüksek işlem hacmi')
+        if stock['ai_score'] >= 80:
+            reasons.append('Yüksek AI skoru')
+        if stock['risk_score'] < 37.5:
+            reasons.append('Düşük risk profili')
+        if stock['dividend_yield'] and stock['dividend_yield'] >= 3:
+            reasons.append('İstikrarlı temettü')
+        if stock['return_3m'] and stock['return_3m'] > 10:
+            reasons.append('Güçlü fiyat momentumu')
+        return reasons
     
     def _generate_screening_insights(self, criteria: Dict, results: List[Dict]) -> Dict[str, Any]:
         """Tarama sonuçları için AI öngörüleri"""
@@ -515,46 +468,19 @@ class RealTimeStockAlertsView(APIView):
     def get(self, request):
         """Aktif uyarıları getir"""
         try:
-            # Mock uyarılar - gerçek uygulamada Redis/WebSocket kullanılacak
-            alerts = [
-                {
-                    'id': 1,
-                    'type': 'PRICE_ALERT',
-                    'symbol': 'THYAO.IS',
-                    'message': 'THY hedef fiyata ulaştı: 245.50₺',
-                    'severity': 'INFO',
-                    'timestamp': datetime.now().isoformat(),
-                    'action_required': False
-                },
-                {
-                    'id': 2,
-                    'type': 'TECHNICAL_ALERT',
-                    'symbol': 'ASELS.IS',
-                    'message': 'ASELSAN RSI 70 üzerine çıktı - Aşırı alım bölgesi',
-                    'severity': 'WARNING',
-                    'timestamp': (datetime.now() - timedelta(minutes=5)).isoformat(),
-                    'action_required': True,
-                    'suggested_action': 'Kâr realizasyonu düşünün'
-                },
-                {
-                    'id': 3,
-                    'type': 'NEWS_ALERT',
-                    'symbol': 'GARAN.IS',
-                    'message': 'Garanti Bankası üç aylık sonuçları beklentileri aştı',
-                    'severity': 'POSITIVE',
-                    'timestamp': (datetime.now() - timedelta(minutes=15)).isoformat(),
-                    'action_required': False
-                },
-                {
-                    'id': 4,
-                    'type': 'PORTFOLIO_ALERT',
-                    'symbol': 'PORTFOLIO',
-                    'message': 'Portföy değeriniz %5 yükseldi - Kâr realizasyonu düşünün',
-                    'severity': 'SUCCESS',
-                    'timestamp': (datetime.now() - timedelta(hours=1)).isoformat(),
-                    'action_required': False
-                }
-            ]
+            alerts = []
+            if request.user.is_authenticated:
+                # Son 7 günde tetiklenen kurallar
+                rules = PriceAlertRule.objects.select_related('stock').filter(
+                    user=request.user,
+                    triggered_at__gte=timezone.now() - timedelta(days=7)
+                ).order_by('-triggered_at')[:50]
+                for rule in rules:
+                    alert = alert_payload(rule)
+                    alert['severity'] = 'INFO' if alert['type'] == 'PRICE_ALERT' else 'WARNING'
+                    alert['timestamp'] = alert['triggered_at']
+                    alert['action_required'] = alert['type'] == 'TECHNICAL_ALERT'
+                    alerts.append(alert)
             
             # Kullanıcı ayarları (mock)
             user_settings = {
@@ -585,37 +511,26 @@ class RealTimeStockAlertsView(APIView):
     
     def post(self, request):
         """Yeni uyarı oluştur"""
+        if not request.user.is_authenticated:
+            return Response({
+                'success': False,
+                'error': 'Uyarı oluşturmak için giriş yapmalısınız'
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
         try:
-            alert_data = {
-                'symbol': request.data.get('symbol'),
-                'alert_type': request.data.get('alert_type'),  # PRICE_ABOVE, PRICE_BELOW, RSI_OVERBOUGHT, etc.
-                'threshold_value': request.data.get('threshold_value'),
-                'notification_method': request.data.get('notification_method', 'IN_APP')
-            }
-            
-            # Uyarı doğrulaması
-            if not all([alert_data['symbol'], alert_data['alert_type'], alert_data['threshold_value']]):
+            # alert_type: PRICE_ABOVE, PRICE_BELOW, CHANGE_ABOVE, RSI_OVERBOUGHT, MA_CROSS_ABOVE vb.
+            try:
+                rule = create_alert_rule(request.user, request.data)
+            except ValueError as e:
                 return Response({
                     'success': False,
-                    'error': 'Eksik uyarı bilgileri'
+                    'error': str(e)
                 }, status=status.HTTP_400_BAD_REQUEST)
             
-            # Mock uyarı oluşturma - gerçek uygulamada veritabanına kaydet
-            new_alert = {
-                'id': 99,
-                'user_id': getattr(request.user, 'id', 'demo'),
-                'symbol': alert_data['symbol'],
-                'alert_type': alert_data['alert_type'],
-                'threshold_value': alert_data['threshold_value'],
-                'is_active': True,
-                'created_at': datetime.now().isoformat(),
-                'triggered_count': 0
-            }
-            
             return Response({
                 'success': True,
                 'data': {
-                    'alert': new_alert,
+                    'alert': alert_payload(rule),
                     'message': 'Uyarı başarıyla oluşturuldu'
                 }
             })
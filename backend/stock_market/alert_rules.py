@@ -0,0 +1,397 @@
+"""
+Finobai - Uyarı Kuralı Değerlendiricisi
+Aktif PriceAlertRule kayıtlarını bellekte sembol ve koşul başına sıralı
+eşik dizilerinde tutar. Her fiyat grubunda bir sembol için yalnızca
+tetiklenebilecek eşikler (ikili arama ile bulunan önek/sonek) okunur;
+tablo taranmaz. Kurallar tek seferliktir: tetiklenen kural indeksten
+çıkar ve veritabanında pasifleşir.
+
+İndeks açılışta bir kez yüklenir, sonra `updated_at` üzerinden artımlı
+senkronlanır (yeni, değişen ve kullanıcının kapattığı kurallar).
+"""
+
+import threading
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .indicators import last_valid, rsi
+from .models import DailyPriceBar, PriceAlertRule, StockSymbol
+
+
+# Eşikli koşul → (ölçülen değer, yukarı mı). Yukarı koşullar eşik <= değer,
+# aşağı koşullar eşik >= değer olduğunda tetiklenir.
+THRESHOLD_CONDITIONS = {
+    'PRICE_ABOVE': ('price', True),
+    'PRICE_BELOW': ('price', False),
+    'CHANGE_ABOVE': ('change', True),
+    'CHANGE_BELOW': ('change', False),
+    'RSI_ABOVE': ('rsi', True),
+    'RSI_BELOW': ('rsi', False),
+}
+
+# Hareketli ortalama kesişimleri: fiyatın ortalamaya göre konumu değiştiğinde tetiklenir
+CROSS_CONDITIONS = {'MA_CROSS_ABOVE': True, 'MA_CROSS_BELOW': False}
+
+# Eski istemcilerin gönderdiği uyarı tipleri → (koşul, varsayılan eşik)
+CONDITION_ALIASES = {
+    'RSI_OVERBOUGHT': ('RSI_ABOVE', 70),
+    'RSI_OVERSOLD': ('RSI_BELOW', 30),
+}
+
+MAX_MA_PERIOD = 200
+HISTORY_DAYS = 320  # 200 işlem günü + tatiller
+SYNC_OVERLAP = timedelta(seconds=60)  # Geç commit edilen kayıtlar için örtüşen senkron penceresi
+
+MESSAGES = {
+    'PRICE_ABOVE': '{symbol} {threshold:.2f} TL seviyesini aştı ({value:.2f} TL)',
+    'PRICE_BELOW': '{symbol} {threshold:.2f} TL seviyesinin altına indi ({value:.2f} TL)',
+    'CHANGE_ABOVE': '{symbol} günlük değişimi %{threshold:.2f} eşiğini aştı (%{value:.2f})',
+    'CHANGE_BELOW': '{symbol} günlük değişimi %{threshold:.2f} eşiğinin altına indi (%{value:.2f})',
+    'RSI_ABOVE': '{symbol} RSI {threshold:.0f} üzerine çıktı ({value:.1f})',
+    'RSI_BELOW': '{symbol} RSI {threshold:.0f} altına indi ({value:.1f})',
+    'MA_CROSS_ABOVE': '{symbol} fiyatı {ma_period} günlük ortalamayı yukarı kesti ({value:.2f} TL)',
+    'MA_CROSS_BELOW': '{symbol} fiyatı {ma_period} günlük ortalamayı aşağı kesti ({value:.2f} TL)',
+}
+
+
+def alert_payload(rule: PriceAlertRule) -> dict:
+    """PriceAlertRule kaydını API/akış çıktısına dönüştür"""
+    is_price = rule.condition.startswith(('PRICE', 'CHANGE'))
+    threshold = float(rule.threshold) if rule.threshold is not None else None
+    if rule.triggered_value is not None:
+        message = MESSAGES[rule.condition].format(
+            symbol=rule.stock.symbol, threshold=threshold or 0,
+            ma_period=rule.ma_period, value=rule.triggered_value
+        )
+    else:
+        target = f"{rule.ma_period} gün" if rule.ma_period else threshold
+        message = f"{rule.stock.symbol}: {rule.get_condition_display()} ({target})"
+
+    return {
+        'id': rule.id,
+        'type': 'PRICE_ALERT' if is_price else 'TECHNICAL_ALERT',
+        'condition': rule.condition,
+        'symbol': rule.stock.symbol,
+        'threshold': threshold,
+        'ma_period': rule.ma_period,
+        'message': message,
+        'note': rule.note,
+        'priority': 'HIGH' if is_price else 'MEDIUM',
+        'notification_method': rule.notification_method,
+        'is_active': rule.is_active,
+        'triggered_value': rule.triggered_value,
+        'created_at': rule.created_at.isoformat(),
+        'triggered_at': rule.triggered_at.isoformat() if rule.triggered_at else None,
+    }
+
+
+def create_alert_rule(user, data: Dict) -> PriceAlertRule:
+    """İstek verisinden kural oluştur; geçersiz veride ValueError"""
+    symbol = str(data.get('symbol') or '').strip().upper()
+    condition = str(data.get('condition') or data.get('alert_type') or '').strip().upper()
+    threshold = data.get('threshold', data.get('threshold_value'))
+    condition, default_threshold = CONDITION_ALIASES.get(condition, (condition, None))
+    if threshold in (None, ''):
+        threshold = default_threshold
+
+    if condition not in THRESHOLD_CONDITIONS and condition not in CROSS_CONDITIONS:
+        raise ValueError('Geçersiz uyarı koşulu')
+
+    stock = StockSymbol.objects.filter(symbol=symbol, is_active=True).first()
+    if stock is None:
+        raise ValueError('Hisse bulunamadı')
+
+    ma_period = None
+    if condition in CROSS_CONDITIONS:
+        try:
+            ma_period = int(data.get('ma_period') or 50)
+        except (TypeError, ValueError):
+            raise ValueError('Geçersiz ortalama periyodu')
+        if not 2 <= ma_period <= MAX_MA_PERIOD:
+            raise ValueError(f'Ortalama periyodu 2-{MAX_MA_PERIOD} arasında olmalı')
+        threshold = None
+    else:
+        try:
+            threshold = Decimal(str(threshold))
+        except (InvalidOperation, TypeError):
+            raise ValueError('Geçersiz eşik değeri')
+        if not threshold.is_finite():
+            raise ValueError('Geçersiz eşik değeri')
+        if condition.startswith('RSI') and not 0 <= threshold <= 100:
+            raise ValueError('RSI eşiği 0-100 arasında olmalı')
+
+    notification_method = str(data.get('notification_method') or 'IN_APP').strip().upper()
+    if notification_method not in dict(PriceAlertRule.NOTIFICATION_CHOICES):
+        raise ValueError('Geçersiz bildirim yöntemi')
+
+    if user.price_alerts.filter(is_active=True).count() >= settings.STOCK_ALERT_MAX_RULES_PER_USER:
+        raise ValueError(f'En fazla {settings.STOCK_ALERT_MAX_RULES_PER_USER} aktif uyarı tanımlanabilir')
+
+    return PriceAlertRule.objects.create(
+        user=user,
+        stock=stock,
+        condition=condition,
+        threshold=threshold,
+        ma_period=ma_period,
+        note=str(data.get('note') or '')[:255],
+        notification_method=notification_method,
+    )
+
+
+class IndexedRule(NamedTuple):
+    """İndeksteki kuralın değerlendirme için gereken alanları"""
+    id: int
+    symbol: str
+    condition: str
+    threshold: Optional[float]
+    ma_period: Optional[int]
+
+
+class AlertRuleIndex:
+    """Sembol/koşul başına sıralı eşik dizileri"""
+
+    def __init__(self):
+        self._thresholds: Dict[Tuple[str, str], List[float]] = {}
+        self._ids: Dict[Tuple[str, str], List[int]] = {}  # Eşiklerle paralel kural kimlikleri
+        self._crosses: Dict[str, Dict[Tuple[str, int], set]] = {}  # sembol → (koşul, periyot) → kimlikler
+        self._rules: Dict[int, IndexedRule] = {}
+
+    def __len__(self):
+        return len(self._rules)
+
+    def add(self, rule: IndexedRule):
+        if rule.id in self._rules:
+            self.remove(rule.id)
+        self._rules[rule.id] = rule
+
+        if rule.condition in CROSS_CONDITIONS:
+            periods = self._crosses.setdefault(rule.symbol, {})
+            periods.setdefault((rule.condition, rule.ma_period), set()).add(rule.id)
+            return
+
+        key = (rule.symbol, rule.condition)
+        thresholds = self._thresholds.setdefault(key, [])
+        ids = self._ids.setdefault(key, [])
+        position = bisect_right(thresholds, rule.threshold)
+        thresholds.insert(position, rule.threshold)
+        ids.insert(position, rule.id)
+
+    def remove(self, rule_id: int) -> Optional[IndexedRule]:
+        rule = self._rules.pop(rule_id, None)
+        if rule is None:
+            return None
+
+        if rule.condition in CROSS_CONDITIONS:
+            periods = self._crosses[rule.symbol]
+            key = (rule.condition, rule.ma_period)
+            periods[key].discard(rule_id)
+            if not periods[key]:
+                del periods[key]
+            if not periods:
+                del self._crosses[rule.symbol]
+            return rule
+
+        key = (rule.symbol, rule.condition)
+        thresholds, ids = self._thresholds[key], self._ids[key]
+        position = bisect_left(thresholds, rule.threshold)
+        while ids[position] != rule_id:
+            position += 1
+        del thresholds[position], ids[position]
+        self._drop_if_empty(key)
+        return rule
+
+    def take_triggered(self, symbol: str, condition: str, value: float) -> List[IndexedRule]:
+        """Değerle sağlanan eşikleri indeksten çıkarıp döndür"""
+        key = (symbol, condition)
+        thresholds = self._thresholds.get(key)
+        if not thresholds:
+            return []
+
+        if THRESHOLD_CONDITIONS[condition][1]:
+            span = slice(0, bisect_right(thresholds, value))
+        else:
+            span = slice(bisect_left(thresholds, value), None)
+
+        fired = self._ids[key][span]
+        if not fired:
+            return []
+        del thresholds[span], self._ids[key][span]
+        self._drop_if_empty(key)
+        return [self._rules.pop(rule_id) for rule_id in fired]
+
+    def take_crossed(self, symbol: str, condition: str, period: int) -> List[IndexedRule]:
+        periods = self._crosses.get(symbol, {})
+        fired = periods.pop((condition, period), set())
+        if not periods:
+            self._crosses.pop(symbol, None)
+        return [self._rules.pop(rule_id) for rule_id in fired]
+
+    def has_rules(self, symbol: str, condition: str) -> bool:
+        return (symbol, condition) in self._thresholds
+
+    def cross_periods(self, symbol: str) -> set:
+        return {period for _, period in self._crosses.get(symbol, {})}
+
+    def _drop_if_empty(self, key):
+        if not self._thresholds[key]:
+            del self._thresholds[key], self._ids[key]
+
+
+class AlertRuleEngine:
+    """Fiyat gruplarında uyarı kurallarını değerlendirir (süreç başına tek örnek)"""
+
+    def __init__(self):
+        self.index = AlertRuleIndex()
+        self._lock = threading.Lock()
+        self._synced_at = None
+        self._ma_state: Dict[Tuple[str, int], bool] = {}  # (sembol, periyot) → fiyat ortalamanın üzerinde mi
+        self._closes: Dict[str, np.ndarray] = {}
+        self._closes_date = None
+
+    def evaluate(self, quotes) -> List[Tuple[int, dict]]:
+        """LatestStockQuote grubunu değerlendir; (user_id, uyarı) çiftlerini döndür"""
+        with self._lock:
+            try:
+                self._sync()
+                return self._store(self._match(quotes))
+            except Exception as e:
+                print(f"Alert evaluation error: {e}")
+                return []
+
+    # --- İndeks ---
+
+    def _sync(self):
+        rules = PriceAlertRule.objects.all()
+        if self._synced_at is None:
+            rules = rules.filter(is_active=True)
+        else:
+            # Yeniden ekleme idempotent olduğundan pencere örtüşebilir
+            rules = rules.filter(updated_at__gt=self._synced_at - SYNC_OVERLAP)
+
+        synced_at = self._synced_at
+        rows = rules.values_list(
+            'id', 'stock__symbol', 'condition', 'threshold', 'ma_period', 'is_active', 'updated_at'
+        )
+        for rule_id, symbol, condition, threshold, ma_period, is_active, updated_at in rows.iterator(chunk_size=10000):
+            if is_active:
+                self.index.add(IndexedRule(
+                    rule_id, symbol, condition,
+                    float(threshold) if threshold is not None else None, ma_period
+                ))
+            else:
+                self.index.remove(rule_id)
+            if synced_at is None or updated_at > synced_at:
+                synced_at = updated_at
+        self._synced_at = synced_at
+
+    # --- Değerlendirme ---
+
+    def _match(self, quotes) -> List[Tuple[IndexedRule, float]]:
+        indicator_symbols = [
+            quote.stock.symbol for quote in quotes
+            if self.index.cross_periods(quote.stock.symbol)
+            or self.index.has_rules(quote.stock.symbol, 'RSI_ABOVE')
+            or self.index.has_rules(quote.stock.symbol, 'RSI_BELOW')
+        ]
+        closes = self._daily_closes(indicator_symbols)
+
+        fired = []
+        for quote in quotes:
+            symbol = quote.stock.symbol
+            price = float(quote.current_price)
+            values = {'price': price, 'change': float(quote.change_percent)}
+
+            history = closes.get(symbol)
+            if history is not None:
+                # Bugünün kapanışı yerine güncel fiyat
+                series = np.append(history, price)
+                values['rsi'] = last_valid(rsi(series))
+
+            for condition, (measure, _) in THRESHOLD_CONDITIONS.items():
+                value = values.get(measure)
+                if value is None or np.isnan(value):
+                    continue
+                fired.extend((rule, value) for rule in self.index.take_triggered(symbol, condition, value))
+
+            for period in self.index.cross_periods(symbol):
+                if history is None or len(series) < period:
+                    continue
+                above = price > series[-period:].mean()
+                previous = self._ma_state.get((symbol, period))
+                self._ma_state[(symbol, period)] = above
+                # İlk gözlemde kesişim bilinemez
+                if previous is None or previous == above:
+                    continue
+                condition = 'MA_CROSS_ABOVE' if above else 'MA_CROSS_BELOW'
+                fired.extend((rule, price) for rule in self.index.take_crossed(symbol, condition, period))
+
+        return fired
+
+    def _daily_closes(self, symbols: List[str]) -> Dict[str, np.ndarray]:
+        """Bugünden önceki günlük kapanışlar (gün boyunca bellekte tutulur)"""
+        today = timezone.localdate()
+        if self._closes_date != today:
+            self._closes = {}
+            self._closes_date = today
+
+        missing = [symbol for symbol in symbols if symbol not in self._closes]
+        if missing:
+            rows = DailyPriceBar.objects.filter(
+                symbol__in=missing,
+                date__gte=today - timedelta(days=HISTORY_DAYS),
+                date__lt=today
+            ).order_by('symbol', 'date').values_list('symbol', 'close')
+            grouped = defaultdict(list)
+            for symbol, close in rows:
+                grouped[symbol].append(close)
+            for symbol in missing:
+                self._closes[symbol] = np.asarray(grouped.get(symbol, []), dtype=np.float64)
+
+        return {symbol: self._closes[symbol] for symbol in symbols}
+
+    # --- Kalıcılık ---
+
+    def _store(self, fired: List[Tuple[IndexedRule, float]]) -> List[Tuple[int, dict]]:
+        """Tetiklenen kuralları pasifleştir; başka süreçte tetiklenmiş olanlar atlanır"""
+        if not fired:
+            return []
+
+        values = {rule.id: value for rule, value in fired}
+        ids = list(values)
+        now = timezone.now()
+        triggered = []
+        try:
+            with transaction.atomic():
+                for start in range(0, len(ids), 1000):
+                    rules = list(
+                        PriceAlertRule.objects.select_related('stock').select_for_update(of=('self',))
+                        .filter(id__in=ids[start:start + 1000], is_active=True)
+                    )
+                    for rule in rules:
+                        rule.is_active = False
+                        rule.triggered_at = now
+                        rule.triggered_value = values[rule.id]
+                        rule.updated_at = now
+                    PriceAlertRule.objects.bulk_update(
+                        rules, ['is_active', 'triggered_at', 'triggered_value', 'updated_at']
+                    )
+                    triggered.extend(rules)
+        except Exception:
+            # Kalıcı yazılamayan kurallar bir sonraki fiyat grubunda yeniden denenir
+            for rule, _ in fired:
+                self.index.add(rule)
+            raise
+
+        return [(rule.user_id, alert_payload(rule)) for rule in triggered]
+
+
+# Süreç başına tek değerlendirici
+alert_engine = AlertRuleEngine()
@@ -0,0 +1,128 @@
+"""
+Finobai - Hisse Analizi Sonuç Önbelleği
+`analyze_stock_comprehensive` sonuçlarını iki katmanda Django cache üzerinde
+saklar:
+
+- base: profilden bağımsız veri, teknik, temel, sentiment ve risk analizi;
+  anahtar (sembol, son bar damgası)
+- ai: LLM değerlendirmesi; anahtar (sembol, son bar damgası, profil grubu)
+
+Son bar damgası bar yazıldıkça değiştiği için yeni bar gelince eski kayıtlar
+kendiliğinden geçersizleşir (TTL yalnızca belleği sınırlar). Aynı anahtar
+için eşzamanlı hesaplamalar tek bir hesaplamaya indirgenir (single-flight).
+"""
+
+import threading
+import time
+import weakref
+from typing import Any, Callable, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+# (üst sınır, etiket) - üst sınır hariç; None son dilim
+HORIZON_BANDS = ((12, '0-12 ay'), (36, '12-36 ay'), (None, '36+ ay'))
+BUDGET_BANDS = ((2500, '0-2.500₺'), (7500, '2.500-7.500₺'), (20000, '7.500-20.000₺'), (None, '20.000₺+'))
+EXPERIENCE_BANDS = ((1, '0-1 yıl'), (2, '1-2 yıl'), (5, '2-5 yıl'), (None, '5+ yıl'))
+
+
+def _band(value, bands) -> int:
+    """Değerin düştüğü dilimin sırası"""
+    for index, (limit, _) in enumerate(bands):
+        if limit is None or float(value or 0) < limit:
+            return index
+    return len(bands) - 1
+
+
+def profile_bucket(user_profile) -> Optional[Dict[str, str]]:
+    """Risk profilini kaba gruba indirge (AI değerlendirmesi grup başına bir kez üretilir)"""
+    if user_profile is None:
+        return None
+    horizon = _band(user_profile.investment_horizon, HORIZON_BANDS)
+    budget = _band(user_profile.monthly_investment_budget, BUDGET_BANDS)
+    experience = _band(user_profile.experience_years, EXPERIENCE_BANDS)
+    return {
+        'risk_tolerance': user_profile.risk_tolerance,
+        'investment_goal': user_profile.investment_goal,
+        'horizon': HORIZON_BANDS[horizon][1],
+        'budget': BUDGET_BANDS[budget][1],
+        'experience': EXPERIENCE_BANDS[experience][1],
+        'key': f"{user_profile.risk_tolerance}-{user_profile.investment_goal}-h{horizon}-b{budget}-e{experience}",
+    }
+
+
+class AnalysisCache:
+    """Katmanlı analiz sonuç önbelleği"""
+
+    KEY_PREFIX = 'stock_analysis'
+
+    def __init__(self):
+        # Kullanılmayan kilitler kendiliğinden silinir (anahtar sayısı sınırsız büyüyebilir)
+        self._locks = weakref.WeakValueDictionary()
+        self._locks_guard = threading.Lock()
+
+    @property
+    def ttl(self) -> int:
+        return settings.STOCK_ANALYSIS_CACHE_TTL
+
+    @property
+    def lock_timeout(self) -> int:
+        return settings.STOCK_ANALYSIS_LOCK_TIMEOUT
+
+    def get_or_compute(self, layer: str, symbol: str, version: str,
+                       compute: Callable[[], Optional[Any]]) -> Optional[Any]:
+        """Kaydı getir ya da hesaplayıp yaz; None sonuçlar ve hatalar önbelleğe yazılmaz"""
+        key = self._key(layer, symbol, version)
+        value = cache.get(key)
+        if value is not None:
+            return value
+
+        lock = self._local_lock(key)
+        with lock:
+            value = cache.get(key)
+            if value is not None:
+                return value
+
+            # Başka bir süreç hesaplıyorsa sonucunu bekle
+            lock_key = f"{key}:lock"
+            owns_lock = cache.add(lock_key, True, self.lock_timeout)
+            if not owns_lock:
+                value = self._wait_for_value(key, lock_key)
+                if value is not None:
+                    return value
+
+            try:
+                value = compute()
+                if value is not None:
+                    cache.set(key, value, self.ttl)
+                return value
+            finally:
+                if owns_lock:
+                    cache.delete(lock_key)
+
+    def _wait_for_value(self, key: str, lock_key: str) -> Optional[Any]:
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                return None
+            time.sleep(0.05)
+        return None
+
+    def _local_lock(self, key: str) -> threading.Lock:
+        with self._locks_guard:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[key] = lock
+            return lock
+
+    def _key(self, layer: str, symbol: str, version: str) -> str:
+        return f"{self.KEY_PREFIX}:{layer}:{symbol}:{version}"
+
+
+# Süreç genelinde paylaşılan önbellek
+analysis_cache = AnalysisCache()
@@ -0,0 +1,223 @@
+"""
+Finobai - Gecelik Faktör Hesaplama
+Tüm aktif hisseler için teknik, temel ve risk faktörlerini hesaplayıp
+StockFactor tablosuna yazar. Fiyat geçmişi tek sorguyla matris olarak
+okunur; teknik ve risk faktörleri tüm evren için vektörel hesaplanır.
+Ağ erişimi (geçmiş kuyruğu ve Ticker.info) yalnızca bu işte yapılır.
+"""
+
+import math
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .fundamentals_cache import fundamentals_cache
+from .history_store import PriceHistoryStore
+from .indicators import last_valid, rsi
+from .models import DailyPriceBar, StockFactor, StockSymbol
+from .risk_metrics import RiskMetricsEngine
+
+
+# Bileşik skorun bileşenleri: (faktör, yüksek değer iyi mi)
+SCORE_COMPONENTS = (
+    ('return_3m', True),      # Momentum
+    ('pe_ratio', False),      # Değer (yalnızca pozitif F/K)
+    ('roe', True),            # Kalite
+    ('sharpe_ratio', True),   # Riske göre getiri
+)
+
+FACTOR_FIELDS = [
+    'market', 'sector', 'as_of', 'price', 'return_1m', 'return_3m', 'return_12m', 'rsi_14',
+    'price_to_sma_50', 'price_to_sma_200', 'avg_volume_20', 'market_cap', 'pe_ratio', 'pb_ratio',
+    'dividend_yield', 'roe', 'profit_margin', 'revenue_growth', 'debt_to_equity', 'volatility',
+    'var_95', 'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'beta', 'risk_score', 'composite_score',
+]
+
+
+def risk_score_from_volatility(volatility: Optional[float]) -> Optional[float]:
+    """Yıllık volatiliteyi (%) 0-100 risk skoruna çevir (%40 volatilite = 60)"""
+    if volatility is None:
+        return None
+    return round(min(100.0, max(0.0, volatility * 1.5)), 1)
+
+
+def _clean(value):
+    """NaN/inf değerleri None yap, numpy skalerlerini Python tipine çevir"""
+    if value is None:
+        return None
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+
+def _percent(value) -> Optional[float]:
+    value = _clean(value)
+    return round(value * 100, 2) if value is not None else None
+
+
+class FactorComputationJob:
+    """Faktör tablosunu yeniden hesaplar"""
+
+    def __init__(self, days: int = 400, sync_history: bool = True):
+        self.days = days  # 12 aylık getiri ve SMA200 için ~1 yıl + pay
+        self.sync_history = sync_history
+        self.history_store = PriceHistoryStore()
+        self.risk_engine = RiskMetricsEngine()
+
+    def run(self, symbols: Optional[List[str]] = None) -> int:
+        """Faktörleri hesapla ve yaz; yazılan hisse sayısını döndür"""
+        stocks = StockSymbol.objects.filter(is_active=True)
+        if symbols:
+            stocks = stocks.filter(symbol__in=symbols)
+        stocks = {stock.symbol: stock for stock in stocks}
+        if not stocks:
+            return 0
+
+        benchmark = settings.STOCK_BENCHMARK_SYMBOL
+        fundamentals = self._prefetch(list(stocks) + [benchmark])
+
+        closes, volumes = self._load_bars(list(stocks) + [benchmark])
+        if closes.empty:
+            return 0
+
+        benchmark_closes = closes.pop(benchmark) if benchmark in closes else None
+        volumes = volumes.drop(columns=[benchmark], errors='ignore')
+        technical = self._technical_factors(closes, volumes)
+        risk = self._risk_factors(closes, benchmark_closes)
+
+        rows = []
+        for symbol in closes.columns:
+            stock = stocks.get(symbol)
+            if stock is None or symbol not in technical.index:
+                continue
+            factor = {'market': stock.market, 'sector': stock.sector}
+            for key, value in technical.loc[symbol].items():
+                factor[key] = value if key == 'as_of' else _clean(value)
+            if factor['avg_volume_20'] is not None:
+                factor['avg_volume_20'] = int(factor['avg_volume_20'])
+            factor.update(risk.get(symbol, {}))
+            factor.update(self._fundamental_factors(fundamentals.get(symbol) or {}))
+            factor['risk_score'] = risk_score_from_volatility(factor.get('volatility'))
+            rows.append((stock, factor))
+
+        self._add_composite_scores(rows)
+        self._store(rows)
+        return len(rows)
+
+    # --- Veri ---
+
+    def _prefetch(self, symbols: List[str]) -> Dict[str, Dict]:
+        """Geçmiş kuyruğunu ve temel verileri sınırlı bir havuzda paralel çek"""
+        def fetch(symbol: str):
+            try:
+                if self.sync_history:
+                    self.history_store.sync(symbol, self.days)
+                return symbol, fundamentals_cache.get(symbol)
+            except Exception as e:
+                print(f"Factor prefetch error for {symbol}: {e}")
+                return symbol, {}
+            finally:
+                close_old_connections()
+
+        with ThreadPoolExecutor(max_workers=max(1, settings.STOCK_PRICE_MAX_WORKERS),
+                                thread_name_prefix='factor-prefetch') as executor:
+            return dict(executor.map(fetch, symbols))
+
+    def _load_bars(self, symbols: List[str]):
+        """Kapanış ve hacim matrisleri (tarih x sembol), tek sorgu"""
+        since = timezone.localdate() - timedelta(days=self.days)
+        rows = DailyPriceBar.objects.filter(
+            symbol__in=symbols, date__gte=since
+        ).values_list('date', 'symbol', 'close', 'volume')
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', 'symbol', 'close', 'volume'])
+        if frame.empty:
+            return pd.DataFrame(), pd.DataFrame()
+        closes = frame.pivot(index='date', columns='symbol', values='close').sort_index()
+        volumes = frame.pivot(index='date', columns='symbol', values='volume').sort_index()
+        return closes, volumes
+
+    # --- Faktörler ---
+
+    def _technical_factors(self, closes: pd.DataFrame, volumes: pd.DataFrame) -> pd.DataFrame:
+        filled = closes.ffill()
+        last = filled.iloc[-1]
+
+        def trailing_return(days: int) -> pd.Series:
+            if len(filled) <= days:
+                return pd.Series(np.nan, index=filled.columns)
+            return (last / filled.iloc[-days - 1] - 1) * 100
+
+        sma_50 = filled.rolling(50).mean().iloc[-1]
+        sma_200 = filled.rolling(200).mean().iloc[-1]
+
+        frame = pd.DataFrame({
+            'as_of': closes.apply(lambda column: column.last_valid_index()),
+            'price': last,
+            'return_1m': trailing_return(21),
+            'return_3m': trailing_return(63),
+            'return_12m': trailing_return(252),
+            'rsi_14': [last_valid(rsi(closes[symbol].dropna().to_numpy())) for symbol in closes.columns],
+            'price_to_sma_50': (last / sma_50 - 1) * 100,
+            'price_to_sma_200': (last / sma_200 - 1) * 100,
+            'avg_volume_20': volumes.reindex(columns=closes.columns).tail(20).mean(),
+        }, index=closes.columns)
+        return frame[frame['as_of'].notna()]
+
+    def _risk_factors(self, closes: pd.DataFrame, benchmark_closes: Optional[pd.Series]) -> Dict[str, Dict]:
+        returns = closes.ffill().pct_change(fill_method=None).iloc[1:]
+        benchmark_returns = None
+        if benchmark_closes is not None:
+            benchmark_returns = benchmark_closes.ffill().pct_change(fill_method=None).iloc[1:]
+
+        result = self.risk_engine.compute(returns, benchmark_returns)
+        keys = ('volatility', 'var_95', 'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'beta')
+        return {
+            symbol: {key: metrics[key] for key in keys}
+            for symbol, metrics in ((symbol, result.for_symbol(symbol)) for symbol in result.symbols)
+        }
+
+    @staticmethod
+    def _fundamental_factors(info: Dict) -> Dict:
+        market_cap = _clean(info.get('marketCap'))
+        return {
+            'market_cap': int(market_cap) if market_cap is not None else None,
+            'pe_ratio': _clean(info.get('forwardPE', info.get('trailingPE'))),
+            'pb_ratio': _clean(info.get('priceToBook')),
+            'dividend_yield': _percent(info.get('dividendYield')),
+            'roe': _percent(info.get('returnOnEquity')),
+            'profit_margin': _percent(info.get('profitMargins')),
+            'revenue_growth': _percent(info.get('revenueGrowth')),
+            'debt_to_equity': _clean(info.get('debtToEquity')),
+        }
+
+    @staticmethod
+    def _add_composite_scores(rows):
+        """Bileşenlerin evren içi yüzdelik sıralarının ortalaması (0-100)"""
+        if not rows:
+            return
+        frame = pd.DataFrame([factor for _, factor in rows])
+        ranks = []
+        for column, higher_is_better in SCORE_COMPONENTS:
+            values = pd.to_numeric(frame[column], errors='coerce')
+            if column == 'pe_ratio':
+                values = values.where(values > 0)
+            ranks.append(values.rank(pct=True, ascending=higher_is_better))
+        scores = pd.concat(ranks, axis=1).mean(axis=1) * 100
+
+        for (_, factor), score in zip(rows, scores):
+            factor['composite_score'] = round(score, 1) if pd.notna(score) else None
+
+    def _store(self, rows):
+        StockFactor.objects.bulk_create(
+            [StockFactor(stock=stock, **{field: factor.get(field) for field in FACTOR_FIELDS}) for stock, factor in rows],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['stock'],
+            update_fields=FACTOR_FIELDS + ['computed_at'],
+        )
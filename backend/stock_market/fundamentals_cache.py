@@ -0,0 +1,130 @@
+"""
+Finobai - Temel Veri (Ticker.info) Önbelleği
+yfinance `Ticker.info` çağrılarını Django cache üzerinde TTL ile saklar.
+Aynı sembol için eşzamanlı istekler tek bir çekime indirgenir (single-flight),
+süresi dolan kayıtlar arka planda yenilenirken eski değer sunulur
+(stale-while-revalidate).
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+import yfinance as yf
+from django.conf import settings
+from django.core.cache import cache
+
+
+def fetch_info_from_yahoo(symbol: str) -> Dict:
+    """Yahoo Finance'dan temel verileri çek"""
+    return yf.Ticker(symbol).info or {}
+
+
+class FundamentalsCache:
+    """Sembol bazlı temel veri önbelleği"""
+
+    KEY_PREFIX = 'stock_fundamentals'
+
+    def __init__(self, fetcher: Optional[Callable[[str], Dict]] = None):
+        self.fetcher = fetcher or fetch_info_from_yahoo
+        self._locks: Dict[str, threading.Lock] = {}
+        self._locks_guard = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='fundamentals-refresh')
+
+    @property
+    def ttl(self) -> int:
+        return settings.STOCK_FUNDAMENTALS_TTL
+
+    @property
+    def stale_ttl(self) -> int:
+        return settings.STOCK_FUNDAMENTALS_STALE_TTL
+
+    @property
+    def lock_timeout(self) -> int:
+        return settings.STOCK_FUNDAMENTALS_LOCK_TIMEOUT
+
+    def get(self, symbol: str) -> Dict:
+        """Sembolün temel verilerini getir (gerekirse çek)"""
+        entry = cache.get(self._key(symbol))
+        if entry is not None:
+            if time.time() - entry['fetched_at'] >= self.ttl:
+                self._refresh_in_background(symbol)
+            return entry['info']
+
+        # Aynı süreçteki eşzamanlı istekler aynı kilitte bekler
+        with self._local_lock(symbol):
+            entry = cache.get(self._key(symbol))
+            if entry is not None:
+                return entry['info']
+
+            # Başka bir süreç çekiyorsa sonucunu bekle
+            owns_lock = cache.add(self._lock_key(symbol), True, self.lock_timeout)
+            if not owns_lock:
+                entry = self._wait_for_entry(symbol)
+                if entry is not None:
+                    return entry['info']
+
+            try:
+                return self._fetch_and_store(symbol)
+            finally:
+                if owns_lock:
+                    cache.delete(self._lock_key(symbol))
+
+    def invalidate(self, symbol: str):
+        """Sembolün önbellek kaydını sil"""
+        cache.delete(self._key(symbol))
+
+    def _fetch_and_store(self, symbol: str) -> Dict:
+        """Kaynaktan çek ve önbelleğe yaz (hata durumunda boş sözlük, önbelleğe yazılmaz)"""
+        try:
+            info = self.fetcher(symbol) or {}
+        except Exception as e:
+            print(f"Fundamentals fetch error for {symbol}: {e}")
+            return {}
+
+        cache.set(
+            self._key(symbol),
+            {'info': info, 'fetched_at': time.time()},
+            self.ttl + self.stale_ttl
+        )
+        return info
+
+    def _refresh_in_background(self, symbol: str):
+        """Eski kaydı arka planda yenile (süreçler arası tek yenileme)"""
+        if not cache.add(self._lock_key(symbol), True, self.lock_timeout):
+            return
+
+        def refresh():
+            try:
+                self._fetch_and_store(symbol)
+            finally:
+                cache.delete(self._lock_key(symbol))
+
+        self._refresh_pool.submit(refresh)
+
+    def _wait_for_entry(self, symbol: str) -> Optional[Dict]:
+        """Kilidi tutan sürecin kaydı yazmasını bekle"""
+        deadline = time.time() + self.lock_timeout
+        while time.time() < deadline:
+            entry = cache.get(self._key(symbol))
+            if entry is not None:
+                return entry
+            if cache.get(self._lock_key(symbol)) is None:
+                return None
+            time.sleep(0.05)
+        return None
+
+    def _local_lock(self, symbol: str) -> threading.Lock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _key(self, symbol: str) -> str:
+        return f"{self.KEY_PREFIX}:{symbol}"
+
+    def _lock_key(self, symbol: str) -> str:
+        return f"{self.KEY_PREFIX}:lock:{symbol}"
+
+
+# Süreç genelinde paylaşılan önbellek
+fundamentals_cache = FundamentalsCache()
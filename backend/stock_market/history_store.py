@@ -0,0 +1,111 @@
+"""
+Finobai - Yerel OHLCV Geçmiş Deposu
+Günlük barları (sembol, tarih) anahtarıyla saklar; ağdan yalnızca eksik kuyruğu çeker.
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Optional
+
+import pandas as pd
+import yfinance as yf
+from django.conf import settings
+from django.utils import timezone
+
+from .models import DailyPriceBar
+
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def fetch_daily_bars_from_yahoo(symbol: str, start: date) -> pd.DataFrame:
+    """Yahoo Finance'dan `start` tarihinden bugüne günlük barları çek"""
+    return yf.Ticker(symbol).history(start=start.isoformat(), interval="1d")
+
+
+class PriceHistoryStore:
+    """Sembol başına günlük bar deposu (artımlı ekleme ile)
+
+    `fetcher(symbol, start_date) -> DataFrame` yerel bir veri kaynağıyla
+    değiştirilebilir; `offline=True` iken ağa hiç gidilmez ve yalnızca
+    depodaki barlar döner.
+    """
+
+    def __init__(self, fetcher: Optional[Callable[[str, date], pd.DataFrame]] = None,
+                 offline: Optional[bool] = None):
+        self.fetcher = fetcher or fetch_daily_bars_from_yahoo
+        self.offline = settings.STOCK_HISTORY_OFFLINE if offline is None else offline
+
+    def get_history(self, symbol: str, days: int = 365) -> pd.DataFrame:
+        """Son `days` günün barlarını getir (gerekirse önce eksik kuyruğu çek)"""
+        if not self.offline:
+            self.sync(symbol, days)
+        return self.load(symbol, days)
+
+    def sync(self, symbol: str, days: int = 365) -> int:
+        """Son kayıtlı bardan bugüne kadar eksik barları çekip depoya yaz"""
+        last_bar = DailyPriceBar.objects.filter(symbol=symbol).order_by('-date').first()
+
+        if last_bar:
+            # Yakın zamanda senkronize edildiyse ağa gitme
+            refresh_after = timedelta(minutes=settings.STOCK_HISTORY_REFRESH_MINUTES)
+            if timezone.now() - last_bar.updated_at < refresh_after:
+                return 0
+            # Son bar seans içinde yazılmış olabilir, onu da yeniden çek
+            start = last_bar.date
+        else:
+            start = timezone.localdate() - timedelta(days=days)
+
+        try:
+            frame = self.fetcher(symbol, start)
+        except Exception as e:
+            print(f"History fetch error for {symbol}: {e}")
+            return 0
+
+        return self.append(symbol, frame)
+
+    def last_bar_stamp(self, symbol: str) -> Optional[str]:
+        """Son barın tarihi ve yazılma zamanı; bar eklenince ya da güncellenince değişir"""
+        row = DailyPriceBar.objects.filter(symbol=symbol).order_by('-date').values_list('date', 'updated_at').first()
+        if row is None:
+            return None
+        return f"{row[0].isoformat()}@{int(row[1].timestamp())}"
+
+    def append(self, symbol: str, frame: pd.DataFrame) -> int:
+        """DataFrame'deki barları depoya ekle (aynı tarih varsa güncelle)"""
+        if frame is None or frame.empty:
+            return 0
+
+        frame = frame.dropna(subset=['Close'])
+        bars = [
+            DailyPriceBar(
+                symbol=symbol,
+                date=pd.Timestamp(index).date(),
+                open=float(row.Open),
+                high=float(row.High),
+                low=float(row.Low),
+                close=float(row.Close),
+                volume=int(row.Volume) if pd.notna(row.Volume) else 0,
+            )
+            for index, row in zip(frame.index, frame[BAR_COLUMNS].itertuples(index=False))
+        ]
+
+        DailyPriceBar.objects.bulk_create(
+            bars,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['symbol', 'date'],
+            update_fields=['open', 'high', 'low', 'close', 'volume', 'updated_at'],
+        )
+        return len(bars)
+
+    def load(self, symbol: str, days: int = 365) -> pd.DataFrame:
+        """Depodaki barları yfinance history() biçiminde DataFrame olarak döndür"""
+        since = timezone.localdate() - timedelta(days=days)
+        rows = DailyPriceBar.objects.filter(
+            symbol=symbol,
+            date__gte=since
+        ).order_by('date').values_list('date', 'open', 'high', 'low', 'close', 'volume')
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['Date'] + BAR_COLUMNS)
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('Date')), name='Date')
+        return frame
@@ -0,0 +1,156 @@
+"""
+Finobai - Vektörel Teknik Gösterge Motoru
+Tüm gösterge serilerini (EMA, MACD, RSI, Bollinger, SMA) tek geçişte hesaplar.
+"""
+
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass
+class IndicatorSeries:
+    """Fiyat serisi boyunca hesaplanan gösterge serileri"""
+    sma_20: np.ndarray
+    sma_50: np.ndarray
+    sma_200: np.ndarray
+    ema_12: np.ndarray
+    ema_26: np.ndarray
+    macd: np.ndarray
+    macd_signal: np.ndarray
+    macd_histogram: np.ndarray
+    rsi: np.ndarray
+    bollinger_middle: np.ndarray
+    bollinger_upper: np.ndarray
+    bollinger_lower: np.ndarray
+
+
+def _as_float_array(values) -> np.ndarray:
+    """Girdiyi float64 numpy dizisine çevir"""
+    return np.asarray(values, dtype=np.float64).ravel()
+
+
+def sma(values, period: int) -> np.ndarray:
+    """Basit hareketli ortalama (kümülatif toplam ile O(n))"""
+    prices = _as_float_array(values)
+    result = np.full(prices.shape, np.nan)
+    if period <= 0 or len(prices) < period:
+        return result
+
+    cumsum = np.cumsum(np.insert(prices, 0, 0.0))
+    result[period - 1:] = (cumsum[period:] - cumsum[:-period]) / period
+    return result
+
+
+def rolling_std(values, period: int) -> np.ndarray:
+    """Kayan standart sapma (ddof=0, np.std ile aynı)"""
+    prices = _as_float_array(values)
+    result = np.full(prices.shape, np.nan)
+    if period <= 0 or len(prices) < period:
+        return result
+
+    windows = np.lib.stride_tricks.sliding_window_view(prices, period)
+    result[period - 1:] = windows.std(axis=1)
+    return result
+
+
+def ema(values, period: int) -> np.ndarray:
+    """Üssel hareketli ortalama serisi
+
+    İlk değerle başlatılan klasik özyinelemeli EMA'dır
+    (ema_t = α·p_t + (1-α)·ema_{t-1}, α = 2 / (period + 1)).
+    Özyineleme pandas'ın C seviyesindeki ewm çekirdeğinde çalışır.
+    """
+    prices = _as_float_array(values)
+    if len(prices) == 0:
+        return prices
+    return pd.Series(prices).ewm(span=period, adjust=False).mean().to_numpy()
+
+
+def macd(values, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD, sinyal ve histogram serileri
+
+    Sinyal hattı, MACD serisinin yavaş EMA'nın oturduğu noktadan
+    (slow - 1) itibaren hesaplanan EMA'sıdır; öncesi NaN döner.
+    """
+    prices = _as_float_array(values)
+    macd_line = ema(prices, fast) - ema(prices, slow)
+
+    signal_line = np.full(prices.shape, np.nan)
+    start = slow - 1
+    if len(prices) > start:
+        signal_line[start:] = ema(macd_line[start:], signal)
+
+    return macd_line, signal_line, macd_line - signal_line
+
+
+def rsi(values, period: int = 14) -> np.ndarray:
+    """Wilder yumuşatmalı RSI serisi
+
+    İlk ortalama kazanç/kayıp, ilk `period` değişimin basit ortalamasıdır;
+    sonrası α = 1/period ile Wilder yumuşatmasıdır.
+    """
+    prices = _as_float_array(values)
+    result = np.full(prices.shape, np.nan)
+    if len(prices) < period + 1:
+        return result
+
+    deltas = np.diff(prices)
+    gains = np.clip(deltas, 0, None)
+    losses = np.clip(-deltas, 0, None)
+
+    # Wilder: tohum değer + sonraki değişimler, tek ewm geçişi
+    seeded_gains = np.concatenate(([gains[:period].mean()], gains[period:]))
+    seeded_losses = np.concatenate(([losses[:period].mean()], losses[period:]))
+    alpha = 1.0 / period
+    avg_gain = pd.Series(seeded_gains).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    avg_loss = pd.Series(seeded_losses).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = avg_gain / avg_loss
+        values_rsi = 100.0 - (100.0 / (1.0 + rs))
+    values_rsi = np.where(avg_loss == 0, 100.0, values_rsi)
+
+    result[period:] = values_rsi
+    return result
+
+
+def bollinger_bands(values, period: int = 20, num_std: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger bantları (orta, üst, alt)"""
+    middle = sma(values, period)
+    std = rolling_std(values, period)
+    return middle, middle + num_std * std, middle - num_std * std
+
+
+def compute_indicator_series(closes) -> IndicatorSeries:
+    """Kapanış fiyatlarından tüm gösterge serilerini tek seferde hesapla"""
+    prices = _as_float_array(closes)
+
+    ema_12 = ema(prices, 12)
+    ema_26 = ema(prices, 26)
+    macd_line, signal_line, histogram = macd(prices)
+    bb_middle, bb_upper, bb_lower = bollinger_bands(prices)
+
+    return IndicatorSeries(
+        sma_20=sma(prices, 20),
+        sma_50=sma(prices, 50),
+        sma_200=sma(prices, 200),
+        ema_12=ema_12,
+        ema_26=ema_26,
+        macd=macd_line,
+        macd_signal=signal_line,
+        macd_histogram=histogram,
+        rsi=rsi(prices),
+        bollinger_middle=bb_middle,
+        bollinger_upper=bb_upper,
+        bollinger_lower=bb_lower,
+    )
+
+
+def last_valid(series: np.ndarray, default: float = np.nan) -> float:
+    """Serinin son geçerli (NaN olmayan) değeri"""
+    if len(series) == 0 or np.isnan(series[-1]):
+        return default
+    return float(series[-1])
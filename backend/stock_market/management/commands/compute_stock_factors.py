@@ -0,0 +1,28 @@
+"""
+Tarayıcının kullandığı StockFactor tablosunu yeniden hesaplar.
+Gecelik (seans kapanışından sonra) cron ile çalıştırılır.
+
+    python manage.py compute_stock_factors
+    python manage.py compute_stock_factors --symbols THYAO.IS ASELS.IS --no-sync
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from stock_market.factors import FactorComputationJob
+
+
+class Command(BaseCommand):
+    help = 'Hisse faktörlerini (teknik, temel, risk) hesaplayıp faktör tablosuna yazar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--symbols', nargs='+', help='Yalnızca verilen semboller')
+        parser.add_argument('--days', type=int, default=400, help='Kullanılacak geçmiş (gün)')
+        parser.add_argument('--no-sync', action='store_true', help='Fiyat geçmişini ağdan güncelleme')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        count = FactorComputationJob(days=options['days'], sync_history=not options['no_sync']).run(options['symbols'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f'{count} hisse için faktörler {elapsed:.1f} sn içinde güncellendi.'))
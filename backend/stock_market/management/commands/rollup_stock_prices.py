@@ -0,0 +1,35 @@
+"""
+StockPrice tiklerini 1m / 1h / 1d barlarına toplar ve saklama süresi
+dolan satırları siler. Varsayılan artımlıdır (yalnızca kontrol noktasından
+sonraki bölümler); periyodik olarak (ör. 5 dakikada bir cron) çalıştırılır.
+
+    python manage.py rollup_stock_prices
+    python manage.py rollup_stock_prices --full --no-prune
+"""
+
+from django.core.management.base import BaseCommand
+
+from stock_market.price_rollup import RESOLUTIONS, PriceRollupEngine
+
+
+class Command(BaseCommand):
+    help = 'Fiyat tiklerini OHLCV barlarına toplar ve eski ham verileri temizler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true', help='Kontrol noktalarını yok sayıp mevcut tüm veriyi yeniden topla')
+        parser.add_argument('--no-prune', action='store_true', help='Saklama süresi temizliğini atla')
+        parser.add_argument('--resolution', action='append', choices=RESOLUTIONS,
+                            help='Yalnızca verilen çözünürlük(ler)i topla')
+
+    def handle(self, *args, **options):
+        report = PriceRollupEngine().run(
+            incremental=not options['full'],
+            prune=not options['no_prune'],
+            resolutions=options['resolution'] or RESOLUTIONS
+        )
+
+        for resolution, count in report['rolled'].items():
+            self.stdout.write(f"{resolution}: {count} bar yazıldı")
+        for tier, count in report.get('pruned', {}).items():
+            self.stdout.write(f"{tier}: {count} satır silindi")
+        self.stdout.write(self.style.SUCCESS('Fiyat toplama tamamlandı.'))
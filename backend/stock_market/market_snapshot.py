@@ -0,0 +1,390 @@
+"""
+Finobai - Piyasa Özeti Anlık Görüntüleri
+MarketOverview ve MarketSentiment yanıtlarını güncel fiyat tablosundan
+(LatestStockQuote) yenileme aralığında bir kez hesaplar ve bir kez JSON
+bayta serileştirir. View'lar bu baytları ETag ile sunar; süresi dolan
+görüntü arka planda yenilenirken eskisi sunulmaya devam eder
+(stale-while-revalidate). Veri bulunmayan bölümlerde varsayılan değerler
+kullanılır; bu bölümler `fallback_sections` listesinde, sözlük olanlar ayrıca
+`is_fallback: True` ile işaretlenir.
+"""
+
+import copy
+import hashlib
+import json
+import statistics
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .history_store import PriceHistoryStore
+from .models import DailyPriceBar, LatestStockQuote, MarketNews
+
+
+# Veri yokken kullanılan varsayılan değerler
+FALLBACK_OVERVIEW = {
+    'bist100': {
+        'value': 8456.78,
+        'change': 125.45,
+        'change_percent': 1.51,
+        'volume': 185000000000,
+        'status': 'RISING'
+    },
+    'usd_try': {
+        'value': 34.15,
+        'change': -0.25,
+        'change_percent': -0.73,
+        'status': 'FALLING'
+    },
+    'trending_sectors': [
+        {'name': 'Teknoloji', 'change_percent': 4.2},
+        {'name': 'Savunma', 'change_percent': 3.8},
+        {'name': 'Enerji', 'change_percent': 2.5}
+    ],
+    'top_gainers': [
+        {'symbol': 'ASELS.IS', 'name': 'Aselsan', 'change_percent': 5.15},
+        {'symbol': 'TUPRS.IS', 'name': 'Tüpraş', 'change_percent': 4.35},
+        {'symbol': 'THYAO.IS', 'name': 'THY', 'change_percent': 3.25}
+    ],
+    'top_losers': [
+        {'symbol': 'AKBNK.IS', 'name': 'Akbank', 'change_percent': -1.85},
+        {'symbol': 'BIMAS.IS', 'name': 'BİM', 'change_percent': -0.65}
+    ]
+}
+
+FALLBACK_SENTIMENT = {
+    'success': True,
+    'overall_sentiment': {
+        'score': 0.72,
+        'label': 'POZİTİF',
+        'confidence': 0.85
+    },
+    'fear_greed_index': {
+        'value': 68,
+        'label': 'AÇGÖZLÜLÜK',
+        'components': {
+            'price_momentum': 75,
+            'volatility': 45,
+            'volume': 65,
+            'social_sentiment': 80
+        }
+    },
+    'sector_sentiments': {
+        'teknoloji': {'score': 0.78, 'trend': 'YUKSELİŞ'},
+        'bankacılık': {'score': 0.65, 'trend': 'YAN YÖN'},
+        'enerji': {'score': 0.82, 'trend': 'YUKSELİŞ'},
+        'savunma': {'score': 0.88, 'trend': 'GÜÇLÜ YUKSELİŞ'},
+        'perakende': {'score': 0.58, 'trend': 'YAN YÖN'}
+    },
+    'news_analysis': {
+        'total_articles': 1250,
+        'positive_ratio': 0.68,
+        'negative_ratio': 0.22,
+        'key_themes': ['ekonomik toparlanma', 'teknoloji yatırımları', 'ihracat artışı']
+    },
+    'market_indicators': {
+        'vix_level': 18.5,
+        'trend_strength': 0.75,
+        'momentum': 'POZİTİF'
+    }
+}
+
+
+def _clamp(value: float, low: float = 0.0, high: float = 100.0) -> float:
+    return max(low, min(high, value))
+
+
+def _status(change: float) -> str:
+    if change > 0:
+        return 'RISING'
+    if change < 0:
+        return 'FALLING'
+    return 'FLAT'
+
+
+def _trend_label(change_percent: float) -> str:
+    if change_percent >= 2:
+        return 'GÜÇLÜ YUKSELİŞ'
+    if change_percent >= 0.5:
+        return 'YUKSELİŞ'
+    if change_percent > -0.5:
+        return 'YAN YÖN'
+    if change_percent > -2:
+        return 'DÜŞÜŞ'
+    return 'GÜÇLÜ DÜŞÜŞ'
+
+
+def _fear_greed_label(value: float) -> str:
+    if value < 25:
+        return 'AŞIRI KORKU'
+    if value < 45:
+        return 'KORKU'
+    if value < 55:
+        return 'NÖTR'
+    if value < 75:
+        return 'AÇGÖZLÜLÜK'
+    return 'AŞIRI AÇGÖZLÜLÜK'
+
+
+def _mark_fallbacks(data: Dict, keys) -> Dict:
+    """Varsayılan değerle kalan bölümleri işaretle (gerçek veriyle karıştırılmasın)"""
+    fallback_sections = []
+    for key in keys:
+        section = data.get(key)
+        if isinstance(section, dict):
+            section['is_fallback'] = True
+        fallback_sections.append(key)
+    data['fallback_sections'] = fallback_sections
+    return data
+
+
+def _load_quotes() -> List[Dict]:
+    """Aktif hisselerin güncel fiyatları (tek sorgu)"""
+    rows = LatestStockQuote.objects.filter(stock__is_active=True).values_list(
+        'stock__symbol', 'stock__name', 'stock__sector', 'change_percent', 'timestamp'
+    )
+    return [
+        {'symbol': symbol, 'name': name, 'sector': sector,
+         'change_percent': float(change_percent), 'timestamp': timestamp}
+        for symbol, name, sector, change_percent, timestamp in rows
+    ]
+
+
+def _sector_changes(quotes: List[Dict]) -> List[Dict]:
+    """Sektör ortalama değişimleri (yüksekten düşüğe)"""
+    grouped = defaultdict(list)
+    for quote in quotes:
+        if quote['sector']:
+            grouped[quote['sector']].append(quote['change_percent'])
+    sectors = [
+        {'name': sector, 'change_percent': round(statistics.fmean(changes), 2), 'stock_count': len(changes)}
+        for sector, changes in grouped.items()
+    ]
+    return sorted(sectors, key=lambda sector: sector['change_percent'], reverse=True)
+
+
+def _breadth(quotes: List[Dict]) -> Dict:
+    changes = [quote['change_percent'] for quote in quotes]
+    return {
+        'advancing': sum(1 for change in changes if change > 0),
+        'declining': sum(1 for change in changes if change < 0),
+        'unchanged': sum(1 for change in changes if change == 0),
+        'total': len(changes),
+    }
+
+
+def _index_quote(symbol: str, include_volume: bool = False) -> Optional[Dict]:
+    """Endeks/döviz değeri: depodaki son iki günlük kapanış"""
+    if not settings.STOCK_HISTORY_OFFLINE:
+        PriceHistoryStore().sync(symbol, days=10)
+    bars = list(DailyPriceBar.objects.filter(symbol=symbol).order_by('-date').values('date', 'close', 'volume')[:2])
+    if len(bars) < 2:
+        return None
+
+    latest, previous = bars
+    change = latest['close'] - previous['close']
+    quote = {
+        'value': round(latest['close'], 4),
+        'change': round(change, 4),
+        'change_percent': round(change / previous['close'] * 100, 2) if previous['close'] else 0.0,
+        'status': _status(change),
+        'as_of': latest['date'].isoformat(),
+    }
+    if include_volume:
+        quote['volume'] = latest['volume']
+    return quote
+
+
+def build_market_overview() -> Dict:
+    """Piyasa genel durumu: endeks, döviz, sektörler, yükselen/düşenler"""
+    overview = copy.deepcopy(FALLBACK_OVERVIEW)
+    fallback = set(FALLBACK_OVERVIEW)
+
+    for key, symbol, include_volume in (
+        ('bist100', settings.STOCK_BENCHMARK_SYMBOL, True),
+        ('usd_try', settings.STOCK_FX_SYMBOL, False),
+    ):
+        try:
+            quote = _index_quote(symbol, include_volume)
+        except Exception as e:
+            print(f"Market overview index error for {symbol}: {e}")
+            quote = None
+        if quote:
+            overview[key] = quote
+            fallback.discard(key)
+
+    quotes = _load_quotes()
+    if quotes:
+        ranked = sorted(quotes, key=lambda quote: quote['change_percent'], reverse=True)
+        fields = ('symbol', 'name', 'change_percent')
+        overview['top_gainers'] = [
+            {field: quote[field] for field in fields} for quote in ranked[:5] if quote['change_percent'] > 0
+        ]
+        overview['top_losers'] = [
+            {field: quote[field] for field in fields} for quote in reversed(ranked[-5:]) if quote['change_percent'] < 0
+        ]
+        fallback -= {'top_gainers', 'top_losers'}
+        sectors = _sector_changes(quotes)
+        if sectors:
+            overview['trending_sectors'] = sectors[:3]
+            fallback.discard('trending_sectors')
+        overview['market_breadth'] = _breadth(quotes)
+        # Kurulum zamanı değil veri zamanı: veri değişmedikçe ETag aynı kalır
+        overview['as_of'] = max(quote['timestamp'] for quote in quotes).isoformat()
+
+    return _mark_fallbacks(overview, [key for key in FALLBACK_OVERVIEW if key in fallback])
+
+
+def build_market_sentiment() -> Dict:
+    """Fiyat genişliği, sektör hareketleri ve haberlerden piyasa sentimenti"""
+    sentiment = copy.deepcopy(FALLBACK_SENTIMENT)
+    fallback = set(FALLBACK_SENTIMENT) - {'success'}
+
+    quotes = _load_quotes()
+    if quotes:
+        breadth = _breadth(quotes)
+        changes = [quote['change_percent'] for quote in quotes]
+        net = (breadth['advancing'] - breadth['declining']) / breadth['total']  # -1..1
+        average_change = statistics.fmean(changes)
+        dispersion = statistics.pstdev(changes)
+
+        score = round((net + 1) / 2, 2)
+        sentiment['overall_sentiment'] = {
+            'score': score,
+            'label': 'POZİTİF' if score >= 0.6 else 'NEGATİF' if score <= 0.4 else 'NÖTR',
+            'confidence': round(max(breadth['advancing'], breadth['declining']) / breadth['total'], 2),
+        }
+
+        components = {
+            'price_momentum': round(_clamp(50 + average_change * 10)),
+            'volatility': round(_clamp(100 - dispersion * 20)),  # Yüksek dağılım = korku
+            'market_breadth': round(score * 100),
+        }
+        fear_greed = round(statistics.fmean(components.values()))
+        sentiment['fear_greed_index'] = {
+            'value': fear_greed,
+            'label': _fear_greed_label(fear_greed),
+            'components': components,
+        }
+
+        fallback -= {'overall_sentiment', 'fear_greed_index', 'market_indicators'}
+
+        sectors = _sector_changes(quotes)
+        if sectors:
+            fallback.discard('sector_sentiments')
+            sentiment['sector_sentiments'] = {
+                sector['name'].lower(): {
+                    'score': round(_clamp(0.5 + sector['change_percent'] / 10, 0.0, 1.0), 2),
+                    'trend': _trend_label(sector['change_percent']),
+                }
+                for sector in sectors
+            }
+
+        sentiment['market_indicators'] = {
+            'dispersion': round(dispersion, 2),
+            'trend_strength': round(abs(net), 2),
+            'momentum': 'POZİTİF' if average_change > 0 else 'NEGATİF' if average_change < 0 else 'NÖTR',
+        }
+        sentiment['as_of'] = max(quote['timestamp'] for quote in quotes).isoformat()
+
+    # Son 24 saatin haberleri
+    news = list(MarketNews.objects.filter(
+        published_at__gte=timezone.now() - timedelta(hours=24)
+    ).values_list('sentiment', flat=True))
+    if news:
+        sentiment['news_analysis'] = {
+            'total_articles': len(news),
+            'positive_ratio': round(news.count('POSITIVE') / len(news), 2),
+            'negative_ratio': round(news.count('NEGATIVE') / len(news), 2),
+        }
+        fallback.discard('news_analysis')
+
+    return _mark_fallbacks(sentiment, [key for key in FALLBACK_SENTIMENT if key in fallback])
+
+
+@dataclass(frozen=True)
+class MarketSnapshot:
+    """Serileştirilmiş yanıt gövdesi"""
+    body: bytes
+    etag: str
+    built_at: float  # time.monotonic()
+
+
+class MarketSnapshotService:
+    """Süreç başına anlık görüntü deposu"""
+
+    BUILDERS = {
+        'overview': build_market_overview,
+        'sentiment': build_market_sentiment,
+    }
+
+    def __init__(self):
+        self._snapshots: Dict[str, MarketSnapshot] = {}
+        self._build_lock = threading.Lock()
+        self._refreshing = set()
+        self._refreshing_guard = threading.Lock()
+        self._refresh_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='market-snapshot')
+
+    @property
+    def refresh_seconds(self) -> float:
+        return settings.STOCK_MARKET_SNAPSHOT_REFRESH_SECONDS
+
+    def get(self, name: str) -> MarketSnapshot:
+        """Güncel görüntüyü döndür; yoksa kur, eskiyse arka planda yenile"""
+        snapshot = self._snapshots.get(name)
+        if snapshot is None:
+            # İlk istekler aynı kurulumu bekler
+            with self._build_lock:
+                snapshot = self._snapshots.get(name)
+                if snapshot is None:
+                    snapshot = self._build(name)
+            return snapshot
+
+        if time.monotonic() - snapshot.built_at >= self.refresh_seconds:
+            self._refresh_in_background(name)
+        return snapshot
+
+    def _build(self, name: str) -> MarketSnapshot:
+        data = self.BUILDERS[name]()
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        snapshot = MarketSnapshot(
+            body=body,
+            etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"',
+            built_at=time.monotonic()
+        )
+        self._snapshots[name] = snapshot
+        return snapshot
+
+    def _refresh_in_background(self, name: str):
+        with self._refreshing_guard:
+            if name in self._refreshing:
+                return
+            self._refreshing.add(name)
+
+        def refresh():
+            try:
+                self._build(name)
+            except Exception as e:
+                print(f"Market snapshot refresh error ({name}): {e}")
+                # Eski görüntü sunulmaya devam eder; yeniden deneme bir aralık sonra
+                previous = self._snapshots.get(name)
+                if previous is not None:
+                    self._snapshots[name] = replace(previous, built_at=time.monotonic())
+            finally:
+                close_old_connections()
+                with self._refreshing_guard:
+                    self._refreshing.discard(name)
+
+        self._refresh_pool.submit(refresh)
+
+
+# Süreç genelinde paylaşılan görüntüler
+market_snapshots = MarketSnapshotService()
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.5 on 2026-10-16 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0002_dailypricebar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='stockprice',
+            index=models.Index(fields=['timestamp', 'change_percent'], name='stockprice_ts_change_idx'),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 5.2.5 on 2026-10-16 12:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_latest_quotes(apps, schema_editor):
+    """Mevcut zaman serisinden her sembolün en yeni fiyatını kopyala"""
+    StockPrice = apps.get_model('stock_market', 'StockPrice')
+    LatestStockQuote = apps.get_model('stock_market', 'LatestStockQuote')
+
+    newest = StockPrice.objects.filter(
+        stock=models.OuterRef('stock')
+    ).order_by('-timestamp').values('id')[:1]
+    prices = StockPrice.objects.filter(id=models.Subquery(newest)).iterator()
+
+    LatestStockQuote.objects.bulk_create([
+        LatestStockQuote(
+            stock_id=price.stock_id,
+            price_id=price.id,
+            open_price=price.open_price,
+            current_price=price.current_price,
+            high_price=price.high_price,
+            low_price=price.low_price,
+            volume=price.volume,
+            change_percent=price.change_percent,
+            change_amount=price.change_amount,
+            market_cap=price.market_cap,
+            timestamp=price.timestamp,
+        )
+        for price in prices
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0003_stockprice_stockprice_ts_change_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LatestStockQuote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_price', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('current_price', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('high_price', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('low_price', models.DecimalField(decimal_places=4, max_digits=10)),
+                ('volume', models.BigIntegerField(default=0)),
+                ('change_percent', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('change_amount', models.DecimalField(decimal_places=4, default=0, max_digits=10)),
+                ('market_cap', models.BigIntegerField(blank=True, null=True)),
+                ('timestamp', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('price', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='stock_market.stockprice')),
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='latest_quote', to='stock_market.stocksymbol')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['change_percent'], name='latestquote_change_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_latest_quotes, migrations.RunPython.noop),
+    ]
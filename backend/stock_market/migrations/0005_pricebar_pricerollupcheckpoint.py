@@ -0,0 +1,43 @@
+# Generated by Django 5.2.5 on 2026-10-16 12:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0004_lateststockquote'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 Dakika'), ('1h', '1 Saat'), ('1d', '1 Gün')], max_length=2)),
+                ('start', models.DateTimeField()),
+                ('open', models.FloatField()),
+                ('high', models.FloatField()),
+                ('low', models.FloatField()),
+                ('close', models.FloatField()),
+                ('volume', models.BigIntegerField(default=0)),
+                ('tick_count', models.IntegerField(default=0)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bars', to='stock_market.stocksymbol')),
+            ],
+            options={
+                'ordering': ['stock', 'resolution', 'start'],
+                'indexes': [models.Index(fields=['resolution', 'start'], name='pricebar_res_start_idx')],
+                'unique_together': {('stock', 'resolution', 'start')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PriceRollupCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('1m', '1 Dakika'), ('1h', '1 Saat'), ('1d', '1 Gün')], max_length=2, unique=True)),
+                ('rolled_until', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
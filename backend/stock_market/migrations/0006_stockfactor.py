@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-16 13:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0005_pricebar_pricerollupcheckpoint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockFactor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('market', models.CharField(max_length=20)),
+                ('sector', models.CharField(blank=True, max_length=100)),
+                ('as_of', models.DateField()),
+                ('price', models.FloatField(blank=True, null=True)),
+                ('return_1m', models.FloatField(blank=True, null=True)),
+                ('return_3m', models.FloatField(blank=True, null=True)),
+                ('return_12m', models.FloatField(blank=True, null=True)),
+                ('rsi_14', models.FloatField(blank=True, null=True)),
+                ('price_to_sma_50', models.FloatField(blank=True, null=True)),
+                ('price_to_sma_200', models.FloatField(blank=True, null=True)),
+                ('avg_volume_20', models.BigIntegerField(blank=True, null=True)),
+                ('market_cap', models.BigIntegerField(blank=True, null=True)),
+                ('pe_ratio', models.FloatField(blank=True, null=True)),
+                ('pb_ratio', models.FloatField(blank=True, null=True)),
+                ('dividend_yield', models.FloatField(blank=True, null=True)),
+                ('roe', models.FloatField(blank=True, null=True)),
+                ('profit_margin', models.FloatField(blank=True, null=True)),
+                ('revenue_growth', models.FloatField(blank=True, null=True)),
+                ('debt_to_equity', models.FloatField(blank=True, null=True)),
+                ('volatility', models.FloatField(blank=True, null=True)),
+                ('var_95', models.FloatField(blank=True, null=True)),
+                ('max_drawdown', models.FloatField(blank=True, null=True)),
+                ('sharpe_ratio', models.FloatField(blank=True, null=True)),
+                ('sortino_ratio', models.FloatField(blank=True, null=True)),
+                ('beta', models.FloatField(blank=True, null=True)),
+                ('risk_score', models.FloatField(blank=True, null=True)),
+                ('composite_score', models.FloatField(blank=True, null=True)),
+                ('computed_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='factors', to='stock_market.stocksymbol')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['market', 'sector', 'composite_score'], name='factor_mkt_sector_score_idx'),
+                    models.Index(fields=['composite_score'], name='factor_score_idx'),
+                    models.Index(fields=['market_cap'], name='factor_mcap_idx'),
+                    models.Index(fields=['pe_ratio'], name='factor_pe_idx'),
+                    models.Index(fields=['dividend_yield'], name='factor_dividend_idx'),
+                    models.Index(fields=['avg_volume_20'], name='factor_volume_idx'),
+                    models.Index(fields=['risk_score'], name='factor_risk_idx'),
+                    models.Index(fields=['return_3m'], name='factor_return_3m_idx'),
+                ],
+            },
+        ),
+    ]
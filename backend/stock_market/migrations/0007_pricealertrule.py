@@ -0,0 +1,42 @@
+# Generated by Django 5.2.5 on 2026-10-16 14:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0006_stockfactor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceAlertRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('condition', models.CharField(choices=[('PRICE_ABOVE', 'Fiyat Eşiğin Üzerine Çıktı'), ('PRICE_BELOW', 'Fiyat Eşiğin Altına İndi'), ('CHANGE_ABOVE', 'Günlük Değişim Eşiğin Üzerinde'), ('CHANGE_BELOW', 'Günlük Değişim Eşiğin Altında'), ('RSI_ABOVE', 'RSI Eşiğin Üzerinde'), ('RSI_BELOW', 'RSI Eşiğin Altında'), ('MA_CROSS_ABOVE', 'Fiyat Hareketli Ortalamayı Yukarı Kesti'), ('MA_CROSS_BELOW', 'Fiyat Hareketli Ortalamayı Aşağı Kesti')], max_length=20)),
+                ('threshold', models.DecimalField(blank=True, decimal_places=4, max_digits=15, null=True)),
+                ('ma_period', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('note', models.CharField(blank=True, max_length=255)),
+                ('notification_method', models.CharField(choices=[('IN_APP', 'Uygulama İçi'), ('EMAIL', 'E-posta'), ('PUSH', 'Anlık Bildirim')], default='IN_APP', max_length=10)),
+                ('is_active', models.BooleanField(default=True)),
+                ('triggered_at', models.DateTimeField(blank=True, null=True)),
+                ('triggered_value', models.FloatField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alert_rules', to='stock_market.stocksymbol')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_alerts', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [
+                    models.Index(condition=models.Q(('is_active', True)), fields=['stock', 'condition', 'threshold'], name='alert_stock_cond_thr_idx'),
+                    models.Index(fields=['updated_at'], name='alert_updated_idx'),
+                    models.Index(fields=['triggered_at'], name='alert_triggered_idx'),
+                    models.Index(fields=['user', '-created_at'], name='alert_user_created_idx'),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.5 on 2026-10-16 23:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stock_market', '0007_pricealertrule'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StreamConnection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('connection_id', models.CharField(max_length=32, unique=True)),
+                ('symbols', models.JSONField(default=list)),
+                ('version', models.IntegerField(default=0)),
+                ('seen_at', models.DateTimeField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
@@ -46,11 +46,178 @@ class StockPrice(models.Model):
     class Meta:
         ordering = ['-timestamp']
         unique_together = ['stock', 'timestamp']
+        indexes = [
+            # Trend hisseler: son 24 saat, değişime göre sıralı
+            models.Index(fields=['timestamp', 'change_percent'], name='stockprice_ts_change_idx'),
+        ]
     
     def __str__(self):
         return f"{self.stock.symbol} - {self.current_price}"
 
 
+class LatestStockQuote(models.Model):
+    """Her sembolün en güncel fiyatı (StockPrice zaman serisinin özeti)
+
+    update_all_stock_prices tarafından StockPrice eklemeleriyle aynı işlemde
+    güncellenir; güncel fiyat okumaları zaman serisini taramak yerine bu
+    tablodan tek sorguda yapılır.
+    """
+    
+    stock = models.OneToOneField(StockSymbol, on_delete=models.CASCADE, related_name='latest_quote')
+    price = models.ForeignKey(StockPrice, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    open_price = models.DecimalField(max_digits=10, decimal_places=4)
+    current_price = models.DecimalField(max_digits=10, decimal_places=4)
+    high_price = models.DecimalField(max_digits=10, decimal_places=4)
+    low_price = models.DecimalField(max_digits=10, decimal_places=4)
+    volume = models.BigIntegerField(default=0)
+    change_percent = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+    change_amount = models.DecimalField(max_digits=10, decimal_places=4, default=0)
+    market_cap = models.BigIntegerField(null=True, blank=True)
+    timestamp = models.DateTimeField()  # Kaynak StockPrice zamanı
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Piyasa özeti: en çok yükselen / düşenler
+            models.Index(fields=['change_percent'], name='latestquote_change_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock.symbol} - {self.current_price}"
+
+
+class DailyPriceBar(models.Model):
+    """Analiz motoru için yerel günlük OHLCV geçmişi (sembol + tarih anahtarlı)"""
+    
+    # Her sembol için (StockSymbol kaydı olmasa da) tutulabilmesi için düz metin
+    symbol = models.CharField(max_length=20)
+    date = models.DateField()
+    # Göstergeler float ile çalıştığından okuma sırasında Decimal dönüşümü yapılmaz
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['symbol', 'date']
+        unique_together = ['symbol', 'date']
+    
+    def __str__(self):
+        return f"{self.symbol} {self.date} - {self.close}"
+
+
+class PriceBar(models.Model):
+    """StockPrice tiklerinden toplanan OHLCV barları (1 dakika / 1 saat / 1 gün)
+
+    Ham tikler ve ince çözünürlüklü barlar saklama süreleri dolunca silinir;
+    grafik ve göstergeler bir üst katmandan okumaya devam eder.
+    """
+    
+    RESOLUTION_CHOICES = [
+        ('1m', '1 Dakika'),
+        ('1h', '1 Saat'),
+        ('1d', '1 Gün'),
+    ]
+    
+    stock = models.ForeignKey(StockSymbol, on_delete=models.CASCADE, related_name='bars')
+    resolution = models.CharField(max_length=2, choices=RESOLUTION_CHOICES)
+    start = models.DateTimeField()  # Bar aralığının başlangıcı (yerel saat dilimine hizalı)
+    # DailyPriceBar gibi göstergeler için float
+    open = models.FloatField()
+    high = models.FloatField()
+    low = models.FloatField()
+    close = models.FloatField()
+    volume = models.BigIntegerField(default=0)  # Aralıktaki en yüksek kümülatif seans hacmi
+    tick_count = models.IntegerField(default=0)  # Bara katılan ham tik sayısı
+    
+    class Meta:
+        ordering = ['stock', 'resolution', 'start']
+        unique_together = ['stock', 'resolution', 'start']
+        indexes = [
+            # Saklama süresi temizliği: çözünürlük + zaman aralığı
+            models.Index(fields=['resolution', 'start'], name='pricebar_res_start_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock.symbol} {self.resolution} {self.start} - {self.close}"
+
+
+class PriceRollupCheckpoint(models.Model):
+    """Çözünürlük başına toplama ilerlemesi (artımlı çalışma için)"""
+    
+    resolution = models.CharField(max_length=2, choices=PriceBar.RESOLUTION_CHOICES, unique=True)
+    rolled_until = models.DateTimeField(null=True, blank=True)  # Bu andan önceki aralıklar kapandı ve toplandı
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.resolution} - {self.rolled_until}"
+
+
+class StockFactor(models.Model):
+    """Tarayıcı için gecelik hesaplanan hisse faktörleri (teknik, temel, risk)
+
+    compute_stock_factors komutuyla güncellenir; tarama istekleri yalnızca
+    bu tablodaki indeksli aralık sorgularıyla yanıtlanır.
+    """
+    
+    stock = models.OneToOneField(StockSymbol, on_delete=models.CASCADE, related_name='factors')
+    # Bileşik indeks ve join'siz filtre için StockSymbol'den kopyalanır
+    market = models.CharField(max_length=20)
+    sector = models.CharField(max_length=100, blank=True)
+    as_of = models.DateField()  # Son bar tarihi
+    
+    # Teknik
+    price = models.FloatField(null=True, blank=True)
+    return_1m = models.FloatField(null=True, blank=True)  # %
+    return_3m = models.FloatField(null=True, blank=True)  # %
+    return_12m = models.FloatField(null=True, blank=True)  # %
+    rsi_14 = models.FloatField(null=True, blank=True)
+    price_to_sma_50 = models.FloatField(null=True, blank=True)  # % (fiyat / SMA50 - 1)
+    price_to_sma_200 = models.FloatField(null=True, blank=True)  # %
+    avg_volume_20 = models.BigIntegerField(null=True, blank=True)
+    
+    # Temel
+    market_cap = models.BigIntegerField(null=True, blank=True)
+    pe_ratio = models.FloatField(null=True, blank=True)
+    pb_ratio = models.FloatField(null=True, blank=True)
+    dividend_yield = models.FloatField(null=True, blank=True)  # %
+    roe = models.FloatField(null=True, blank=True)  # %
+    profit_margin = models.FloatField(null=True, blank=True)  # %
+    revenue_growth = models.FloatField(null=True, blank=True)  # %
+    debt_to_equity = models.FloatField(null=True, blank=True)
+    
+    # Risk (yıllık, %)
+    volatility = models.FloatField(null=True, blank=True)
+    var_95 = models.FloatField(null=True, blank=True)
+    max_drawdown = models.FloatField(null=True, blank=True)
+    sharpe_ratio = models.FloatField(null=True, blank=True)
+    sortino_ratio = models.FloatField(null=True, blank=True)
+    beta = models.FloatField(null=True, blank=True)
+    
+    # Skorlar (0-100)
+    risk_score = models.FloatField(null=True, blank=True)
+    composite_score = models.FloatField(null=True, blank=True)
+    
+    computed_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['market', 'sector', 'composite_score'], name='factor_mkt_sector_score_idx'),
+            models.Index(fields=['composite_score'], name='factor_score_idx'),
+            models.Index(fields=['market_cap'], name='factor_mcap_idx'),
+            models.Index(fields=['pe_ratio'], name='factor_pe_idx'),
+            models.Index(fields=['dividend_yield'], name='factor_dividend_idx'),
+            models.Index(fields=['avg_volume_20'], name='factor_volume_idx'),
+            models.Index(fields=['risk_score'], name='factor_risk_idx'),
+            models.Index(fields=['return_3m'], name='factor_return_3m_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.stock.symbol} faktörleri ({self.as_of})"
+
+
 class UserPortfolio(models.Model):
     """Kullanıcı portföyü"""
     
@@ -192,3 +359,77 @@ class UserRiskProfile(models.Model):
     
     def __str__(self):
         return f"{self.user.username} - {self.risk_tolerance}"
+
+
+class PriceAlertRule(models.Model):
+    """Kullanıcı fiyat/gösterge uyarı kuralı
+
+    Kurallar tek seferliktir: koşul sağlandığında tetiklenir ve pasifleşir.
+    Değerlendirme, fiyat güncellemelerinde bellekteki sıralı eşik
+    indeksiyle (alert_rules.AlertRuleEngine) yapılır.
+    """
+    
+    CONDITION_CHOICES = [
+        ('PRICE_ABOVE', 'Fiyat Eşiğin Üzerine Çıktı'),
+        ('PRICE_BELOW', 'Fiyat Eşiğin Altına İndi'),
+        ('CHANGE_ABOVE', 'Günlük Değişim Eşiğin Üzerinde'),
+        ('CHANGE_BELOW', 'Günlük Değişim Eşiğin Altında'),
+        ('RSI_ABOVE', 'RSI Eşiğin Üzerinde'),
+        ('RSI_BELOW', 'RSI Eşiğin Altında'),
+        ('MA_CROSS_ABOVE', 'Fiyat Hareketli Ortalamayı Yukarı Kesti'),
+        ('MA_CROSS_BELOW', 'Fiyat Hareketli Ortalamayı Aşağı Kesti'),
+    ]
+    
+    NOTIFICATION_CHOICES = [
+        ('IN_APP', 'Uygulama İçi'),
+        ('EMAIL', 'E-posta'),
+        ('PUSH', 'Anlık Bildirim'),
+    ]
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='price_alerts')
+    stock = models.ForeignKey(StockSymbol, on_delete=models.CASCADE, related_name='alert_rules')
+    condition = models.CharField(max_length=20, choices=CONDITION_CHOICES)
+    threshold = models.DecimalField(max_digits=15, decimal_places=4, null=True, blank=True)  # MA kesişiminde boş
+    ma_period = models.PositiveSmallIntegerField(null=True, blank=True)  # Yalnızca MA kesişimi
+    note = models.CharField(max_length=255, blank=True)
+    notification_method = models.CharField(max_length=10, choices=NOTIFICATION_CHOICES, default='IN_APP')
+    
+    is_active = models.BooleanField(default=True)
+    triggered_at = models.DateTimeField(null=True, blank=True)
+    triggered_value = models.FloatField(null=True, blank=True)  # Tetiklendiği andaki fiyat/değişim/RSI
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        indexes = [
+            # Aktif kuralların sembol/koşul/eşik sırası (indeks kurulumu ve doğrulama)
+            models.Index(fields=['stock', 'condition', 'threshold'], name='alert_stock_cond_thr_idx',
+                         condition=models.Q(is_active=True)),
+            # Değerlendiricinin artımlı senkronu
+            models.Index(fields=['updated_at'], name='alert_updated_idx'),
+            # Akış izleyicisinin tetiklenen uyarıları okuması
+            models.Index(fields=['triggered_at'], name='alert_triggered_idx'),
+            models.Index(fields=['user', '-created_at'], name='alert_user_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.stock.symbol} {self.condition} {self.threshold or self.ma_period}"
+
+
+class StreamConnection(models.Model):
+    """Açık SSE akış bağlantısının sembol kümesi (süreçler arası paylaşılır)
+
+    Abonelik değişikliği (POST /api/stocks/stream/<id>/) hangi worker'a
+    düşerse düşsün bu kayda yazılır; bağlantıyı tutan sürecin price_bus
+    izleyicisi yeni sürümü alıp uygular.
+    """
+    
+    connection_id = models.CharField(max_length=32, unique=True)
+    symbols = models.JSONField(default=list)
+    version = models.IntegerField(default=0)  # Her sembol değişikliğinde artar
+    seen_at = models.DateTimeField()  # Sahibi olan sürecin son canlılık sinyali
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.connection_id} ({len(self.symbols)} sembol)"
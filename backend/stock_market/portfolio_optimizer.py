@@ -0,0 +1,258 @@
+"""
+Finobai - Portföy Optimizasyon Motoru
+Saklanan günlük barlardan getiri matrisi kurar, büzülmeli (Ledoit-Wolf)
+kovaryans hesaplar ve hisse/sektör sınırları altında minimum varyans,
+maksimum Sharpe ve risk paritesi ağırlıklarını çözer.
+"""
+
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+from scipy.optimize import minimize
+
+from .models import DailyPriceBar, StockSymbol
+
+
+OPTIMIZATION_METHODS = ('min_variance', 'max_sharpe', 'risk_parity')
+
+
+@dataclass
+class ReturnsMatrix:
+    """Hizalanmış günlük getiri matrisi (T gün x N hisse)"""
+    symbols: List[str]
+    returns: np.ndarray
+    dates: List = field(default_factory=list)
+
+
+@dataclass
+class OptimizationResult:
+    """Optimizasyon sonucu (yıllık metrikler)"""
+    method: str
+    weights: Dict[str, float]
+    expected_return: float
+    volatility: float
+    sharpe_ratio: float
+    risk_contributions: Dict[str, float]
+    sector_weights: Dict[str, float]
+    shrinkage: float
+    excluded_symbols: List[str]
+
+
+def shrinkage_covariance(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Ledoit-Wolf büzülmeli kovaryans (hedef: ölçekli birim matris)
+
+    Döndürür: (kovaryans, büzülme katsayısı)
+    """
+    t, n = returns.shape
+    centered = returns - returns.mean(axis=0)
+    sample = centered.T @ centered / t
+
+    mu = np.trace(sample) / n
+    target = mu * np.eye(n)
+
+    d2 = np.sum((sample - target) ** 2)
+    if d2 == 0:
+        return sample, 0.0
+
+    # Σ_t ||x_t x_tᵀ - S||² = Σ_t |x_t|⁴ - T·||S||²
+    row_norms_sq = np.sum(centered ** 2, axis=1)
+    b2_bar = (np.sum(row_norms_sq ** 2) - t * np.sum(sample ** 2)) / t ** 2
+    b2 = min(b2_bar, d2)
+    shrinkage = float(b2 / d2)
+
+    return shrinkage * target + (1 - shrinkage) * sample, shrinkage
+
+
+class PortfolioOptimizationEngine:
+    """Ortalama-varyans / risk paritesi optimizasyon motoru"""
+
+    def __init__(self, risk_free_rate: float = 0.12, trading_days: int = 252,
+                 min_observations: int = 60):
+        self.risk_free_rate = risk_free_rate  # Türkiye 10 yıllık tahvil faizi
+        self.trading_days = trading_days
+        self.min_observations = min_observations
+
+    def symbols_without_history(self, symbols: List[str]) -> List[str]:
+        """Depoda hiç barı olmayan semboller"""
+        stored = set(
+            DailyPriceBar.objects.filter(symbol__in=symbols).values_list('symbol', flat=True).distinct()
+        )
+        return [symbol for symbol in symbols if symbol not in stored]
+
+    def build_returns_matrix(self, symbols: List[str], days: int = 365) -> ReturnsMatrix:
+        """Saklanan kapanışlardan tek sorguyla hizalanmış getiri matrisi kur"""
+        since = timezone.localdate() - timedelta(days=days)
+        rows = DailyPriceBar.objects.filter(
+            symbol__in=symbols,
+            date__gte=since
+        ).values_list('date', 'symbol', 'close')
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', 'symbol', 'close'])
+        if frame.empty:
+            return ReturnsMatrix(symbols=[], returns=np.empty((0, 0)))
+
+        closes = frame.pivot(index='date', columns='symbol', values='close').sort_index()
+        # Yeterli geçmişi olmayan hisseleri çıkar, tatil boşluklarını doldur
+        closes = closes.loc[:, closes.count() > self.min_observations].ffill()
+        returns = closes.pct_change().iloc[1:].dropna(how='any')
+
+        ordered = [symbol for symbol in symbols if symbol in returns.columns]
+        returns = returns[ordered]
+        return ReturnsMatrix(
+            symbols=ordered,
+            returns=returns.to_numpy(dtype=np.float64),
+            dates=list(returns.index)
+        )
+
+    def optimize(self, symbols: List[str], method: str = 'max_sharpe',
+                 min_weight: float = 0.0, max_weight: float = 0.25,
+                 max_sector_weight: Optional[float] = 0.40,
+                 sector_limits: Optional[Dict[str, float]] = None,
+                 sectors: Optional[Dict[str, str]] = None,
+                 days: int = 365) -> Optional[OptimizationResult]:
+        """Verilen hisseler için optimal ağırlıkları hesapla
+
+        Yeterli fiyat geçmişi olan hisse sayısı 2'den azsa None döner.
+        """
+        if method not in OPTIMIZATION_METHODS:
+            method = 'max_sharpe'
+
+        matrix = self.build_returns_matrix(symbols, days)
+        n = len(matrix.symbols)
+        if n < 2 or len(matrix.returns) < self.min_observations:
+            return None
+
+        cov, shrinkage = shrinkage_covariance(matrix.returns)
+        cov *= self.trading_days
+        mu = matrix.returns.mean(axis=0) * self.trading_days
+
+        if sectors is None:
+            sectors = self.get_sectors(matrix.symbols)
+        asset_sectors = [sectors.get(symbol) or 'Diğer' for symbol in matrix.symbols]
+
+        # Hisse sınırları uygulanabilir olmalı (n * üst sınır >= 1)
+        max_weight = min(1.0, max(max_weight, 1.0 / n))
+        min_weight = max(0.0, min(min_weight, 1.0 / n))
+        bounds = [(min_weight, max_weight)] * n
+
+        constraints = [{'type': 'eq', 'fun': lambda w: np.sum(w) - 1.0, 'jac': lambda w: np.ones_like(w)}]
+        constraints.extend(self._sector_constraints(asset_sectors, max_weight, max_sector_weight, sector_limits))
+
+        # Ölçek bağımsız yöntemler için normalize kovaryans (sayısal kararlılık)
+        scale = float(np.mean(np.diag(cov))) or 1.0
+        cov_n = cov / scale
+        x0 = self._initial_weights(cov, min_weight, max_weight)
+
+        if method == 'min_variance':
+            objective = lambda w: (w @ cov_n @ w, 2 * cov_n @ w)
+        elif method == 'risk_parity':
+            objective = lambda w: self._risk_parity_objective(w, cov_n)
+        else:
+            objective = lambda w: self._negative_sharpe(w, mu, cov)
+
+        solution = minimize(
+            objective, x0, jac=True, method='SLSQP', bounds=bounds,
+            constraints=constraints, options={'maxiter': 500, 'ftol': 1e-12}
+        )
+        weights = solution.x if solution.success else x0
+        weights = np.clip(weights, 0, None)
+        weights /= weights.sum()
+
+        return self._build_result(method, matrix.symbols, asset_sectors, weights, mu, cov,
+                                  shrinkage, [s for s in symbols if s not in matrix.symbols])
+
+    def get_sectors(self, symbols: List[str]) -> Dict[str, str]:
+        """StockSymbol tablosundan sektör bilgisi"""
+        return dict(
+            StockSymbol.objects.filter(symbol__in=symbols).exclude(sector='').values_list('symbol', 'sector')
+        )
+
+    def _sector_constraints(self, asset_sectors: List[str], max_weight: float,
+                            max_sector_weight: Optional[float],
+                            sector_limits: Optional[Dict[str, float]]) -> List[Dict]:
+        """Sektör başına üst sınır kısıtları (uygulanabilir olacak şekilde gevşetilir)"""
+        sector_limits = sector_limits or {}
+        unique_sectors = sorted(set(asset_sectors))
+        masks = {s: np.array([a == s for a in asset_sectors], dtype=np.float64) for s in unique_sectors}
+
+        limits = {}
+        for sector in unique_sectors:
+            limit = sector_limits.get(sector, max_sector_weight)
+            if limit is not None:
+                limits[sector] = float(limit)
+
+        # Sınırların toplam kapasitesi 1'i karşılamıyorsa kısıt uygulanmaz
+        capacity = sum(
+            min(limits.get(s, 1.0), masks[s].sum() * max_weight) for s in unique_sectors
+        )
+        if capacity < 1.0 - 1e-9:
+            return []
+
+        constraints = []
+        for sector, limit in limits.items():
+            mask = masks[sector]
+            constraints.append({
+                'type': 'ineq',
+                'fun': lambda w, m=mask, l=limit: l - m @ w,
+                'jac': lambda w, m=mask: -m,
+            })
+        return constraints
+
+    def _initial_weights(self, cov: np.ndarray, min_weight: float, max_weight: float) -> np.ndarray:
+        """Ters volatilite ağırlıklarıyla başlangıç noktası"""
+        inv_vol = 1.0 / np.sqrt(np.clip(np.diag(cov), 1e-12, None))
+        weights = inv_vol / inv_vol.sum()
+        weights = np.clip(weights, min_weight, max_weight)
+        return weights / weights.sum()
+
+    def _negative_sharpe(self, w: np.ndarray, mu: np.ndarray, cov: np.ndarray) -> Tuple[float, np.ndarray]:
+        """Negatif Sharpe oranı ve gradyanı"""
+        cov_w = cov @ w
+        variance = max(float(w @ cov_w), 1e-12)
+        vol = np.sqrt(variance)
+        excess = float(w @ mu) - self.risk_free_rate
+        value = -excess / vol
+        grad = -mu / vol + excess * cov_w / vol ** 3
+        return value, grad
+
+    def _risk_parity_objective(self, w: np.ndarray, cov: np.ndarray) -> Tuple[float, np.ndarray]:
+        """Risk katkılarının ortalamadan sapma kareleri toplamı ve gradyanı"""
+        n = len(w)
+        cov_w = cov @ w
+        contributions = w * cov_w
+        deviation = contributions - contributions.mean()
+        # Σ deviation = 0 olduğundan ortalama terimi gradyandan düşer
+        grad = 2 * (deviation * cov_w + cov @ (deviation * w))
+        factor = n ** 2
+        return factor * float(deviation @ deviation), factor * grad
+
+    def _build_result(self, method: str, symbols: List[str], asset_sectors: List[str],
+                      weights: np.ndarray, mu: np.ndarray, cov: np.ndarray,
+                      shrinkage: float, excluded: List[str]) -> OptimizationResult:
+        """Ağırlıklardan portföy metriklerini hesapla"""
+        cov_w = cov @ weights
+        variance = float(weights @ cov_w)
+        volatility = float(np.sqrt(max(variance, 0.0)))
+        expected_return = float(weights @ mu)
+        sharpe = (expected_return - self.risk_free_rate) / volatility if volatility > 0 else 0.0
+        contributions = weights * cov_w / variance if variance > 0 else np.zeros_like(weights)
+
+        sector_weights: Dict[str, float] = {}
+        for sector, weight in zip(asset_sectors, weights):
+            sector_weights[sector] = sector_weights.get(sector, 0.0) + float(weight)
+
+        return OptimizationResult(
+            method=method,
+            weights={s: round(float(w), 4) for s, w in zip(symbols, weights)},
+            expected_return=round(expected_return, 4),
+            volatility=round(volatility, 4),
+            sharpe_ratio=round(sharpe, 2),
+            risk_contributions={s: round(float(c), 4) for s, c in zip(symbols, contributions)},
+            sector_weights={s: round(w, 4) for s, w in sector_weights.items()},
+            shrinkage=round(shrinkage, 4),
+            excluded_symbols=excluded,
+        )
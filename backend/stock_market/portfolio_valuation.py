@@ -0,0 +1,105 @@
+"""
+Finobai - Artımlı Portföy Değerleme
+Yeni fiyatlar geldiğinde yalnızca fiyatı değişen sembolleri tutan pozisyonları
+yeniden değerler. Pozisyonlar tüm portföyler için tek bir UPDATE ile
+(LatestStockQuote alt sorgusundan) hesaplanır, ardından yalnızca etkilenen
+portföylerin toplamları yine tek bir UPDATE ile yeniden toplanır.
+"""
+
+from decimal import Decimal
+from typing import Iterable
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from .models import LatestStockQuote, PortfolioPosition, UserPortfolio
+
+
+MONEY = DecimalField(max_digits=15, decimal_places=2)
+PERCENT = DecimalField(max_digits=6, decimal_places=2)
+
+# gain_loss_percent sütununa (max_digits=6) sığacak sınır
+_PERCENT_LIMIT = Decimal('9999.99')
+
+
+def _percent(gain, base):
+    """(gain / base) * 100, base 0 ise 0; sütun sınırına kırpılır"""
+    return Case(
+        When(GreaterThan(base, 0), then=Least(
+            Greatest(
+                ExpressionWrapper(gain * Value(Decimal('100')) / base, output_field=PERCENT),
+                Value(-_PERCENT_LIMIT, output_field=PERCENT)
+            ),
+            Value(_PERCENT_LIMIT, output_field=PERCENT)
+        )),
+        default=Value(Decimal('0'), output_field=PERCENT),
+        output_field=PERCENT
+    )
+
+
+class PortfolioValuationEngine:
+    """Pozisyon ve portföy toplamlarını veritabanında toplu olarak günceller"""
+
+    def revalue_symbols(self, stock_ids: Iterable[int]) -> int:
+        """Verilen sembolleri tutan pozisyonları değerle; güncellenen pozisyon sayısını döndür"""
+        stock_ids = list(set(stock_ids))
+        if not stock_ids:
+            return 0
+        return self._revalue(PortfolioPosition.objects.filter(stock_id__in=stock_ids))
+
+    def revalue_portfolios(self, portfolio_ids: Iterable[int]) -> int:
+        """Verilen portföylerin tüm pozisyonlarını değerle (ör. pozisyon eklendikten sonra)"""
+        portfolio_ids = list(set(portfolio_ids))
+        if not portfolio_ids:
+            return 0
+        return self._revalue(PortfolioPosition.objects.filter(portfolio_id__in=portfolio_ids))
+
+    def _revalue(self, positions) -> int:
+        price = Subquery(
+            LatestStockQuote.objects.filter(stock_id=OuterRef('stock_id')).values('current_price')[:1]
+        )
+        # SET ifadeleri bazı veritabanlarında önceki sütun değerini görür;
+        # bu yüzden current_value'ya F() ile başvurmak yerine ifade tekrar kurulur
+        current_value = ExpressionWrapper(F('quantity') * price, output_field=MONEY)
+        gain_loss = ExpressionWrapper(F('quantity') * price - F('invested_amount'), output_field=MONEY)
+
+        positions = positions.filter(stock__latest_quote__isnull=False)
+        affected = positions.values_list('portfolio_id', flat=True).distinct()
+
+        with transaction.atomic():
+            updated = positions.update(
+                current_value=current_value,
+                gain_loss=gain_loss,
+                gain_loss_percent=_percent(gain_loss, F('invested_amount')),
+                updated_at=timezone.now()
+            )
+            if updated:
+                self._roll_up(UserPortfolio.objects.filter(id__in=affected))
+        return updated
+
+    def _roll_up(self, portfolios):
+        """Portföy toplamlarını pozisyonlardan yeniden hesapla"""
+        def position_sum(field):
+            return Coalesce(
+                Subquery(
+                    PortfolioPosition.objects.filter(portfolio_id=OuterRef('pk')).order_by().values(
+                        'portfolio_id'
+                    ).annotate(total=Sum(field)).values('total')[:1],
+                    output_field=MONEY
+                ),
+                Value(Decimal('0'), output_field=MONEY)
+            )
+
+        total_gain_loss = ExpressionWrapper(
+            position_sum('current_value') - position_sum('invested_amount'), output_field=MONEY
+        )
+        portfolios.update(
+            total_value=position_sum('current_value'),
+            total_invested=position_sum('invested_amount'),
+            total_gain_loss=total_gain_loss,
+            gain_loss_percent=_percent(total_gain_loss, position_sum('invested_amount')),
+            updated_at=timezone.now()
+        )
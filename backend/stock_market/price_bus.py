@@ -0,0 +1,292 @@
+"""
+Finobai - Süreç İçi Fiyat Veri Yolu
+Fiyat güncellemelerini ve tetiklenen uyarıları abone bağlantılara dağıtır.
+Yayıncılar (update_all_stock_prices, veritabanı izleyicisi) herhangi bir
+thread'den publish eder; her abonelik kendi olay döngüsündeki sınırlı bir
+kuyruğa yalnızca abone olduğu sembollerin değişen alanlarını alır.
+
+Bağlantıların sembol kümeleri StreamConnection tablosunda da tutulur; başka
+bir worker'a düşen abonelik değişiklikleri bağlantıyı tutan sürecin
+izleyicisi tarafından uygulanır.
+"""
+
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Set
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .alert_rules import alert_payload
+from .models import LatestStockQuote, PriceAlertRule, StreamConnection
+
+
+# Delta hesaplanırken karşılaştırılan alanlar
+QUOTE_FIELDS = ('current_price', 'change_percent', 'change_amount', 'volume', 'market_cap')
+
+# Aynı uyarının hem değerlendiriciden hem izleyiciden iki kez gönderilmemesi için
+RECENT_ALERTS_SIZE = 1000
+
+
+def quote_payload(quote) -> dict:
+    """LatestStockQuote kaydını API/akış çıktısına dönüştür"""
+    return {
+        'symbol': quote.stock.symbol,
+        'name': quote.stock.name,
+        'current_price': float(quote.current_price),
+        'change_percent': float(quote.change_percent),
+        'change_amount': float(quote.change_amount),
+        'volume': quote.volume,
+        'market_cap': quote.market_cap,
+        'sector': quote.stock.sector,
+        'currency': quote.stock.currency,
+        'timestamp': quote.timestamp.isoformat()
+    }
+
+
+def load_quotes(symbols: Iterable[str]) -> List[dict]:
+    """Sembollerin güncel fiyatları (snapshot olayı için)"""
+    quotes = LatestStockQuote.objects.select_related('stock').filter(stock__symbol__in=list(symbols))
+    return [quote_payload(quote) for quote in quotes]
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Tek bir akış bağlantısı"""
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue
+    symbols: Set[str]
+    user_id: Optional[int] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    dropped: int = 0  # Kuyruk dolduğu için atılan olay sayısı
+    version: int = 0  # Uygulanan StreamConnection sürümü
+
+
+class PriceBus:
+    """Fiyat ve uyarı olaylarını aboneliklere dağıtan yayın/abone yapısı"""
+
+    def __init__(self, queue_size: Optional[int] = None, poll_seconds: Optional[float] = None):
+        self.queue_size = queue_size or settings.STOCK_STREAM_QUEUE_SIZE
+        self.poll_seconds = settings.STOCK_STREAM_DB_POLL_SECONDS if poll_seconds is None else poll_seconds
+        self._subscriptions: Dict[str, Subscription] = {}
+        self._last_quotes: Dict[str, dict] = {}
+        self._recent_alerts: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+
+    # --- Abonelikler ---
+
+    def subscribe(self, symbols: Iterable[str], user_id: Optional[int] = None) -> Subscription:
+        """Çalışan olay döngüsü içinden çağrılır"""
+        subscription = Subscription(
+            loop=asyncio.get_running_loop(),
+            queue=asyncio.Queue(maxsize=self.queue_size),
+            symbols={s.upper() for s in symbols},
+            user_id=user_id
+        )
+        with self._lock:
+            self._subscriptions[subscription.id] = subscription
+        self._ensure_watcher()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions.pop(subscription.id, None)
+
+    def register(self, subscription: Subscription):
+        """Bağlantıyı süreçler arası kayda ekle (senkron bağlamdan çağrılır)"""
+        StreamConnection.objects.create(
+            connection_id=subscription.id, symbols=sorted(subscription.symbols), seen_at=timezone.now()
+        )
+
+    def unregister(self, subscription: Subscription):
+        StreamConnection.objects.filter(connection_id=subscription.id).delete()
+
+    def update_symbols(self, connection_id: str, add: Iterable[str] = (), remove: Iterable[str] = ()) -> Optional[Set[str]]:
+        """Bağlantının sembol kümesini değiştir (bağlantı hangi süreçte olursa olsun); bağlantı yoksa None
+
+        Sembol sınırı aşılırsa ValueError. Eklenen semboller için bağlantıya
+        `snapshot` olayı gönderilir.
+        """
+        add = {s.upper() for s in add}
+        remove = {s.upper() for s in remove}
+        with transaction.atomic():
+            connections = StreamConnection.objects.select_for_update().filter(connection_id=connection_id)
+            if self.poll_seconds > 0:
+                # Sahibi olan süreç sonlanmışsa kayıt artık güncellenmez
+                connections = connections.filter(seen_at__gte=timezone.now() - self.connection_ttl)
+            connection = connections.first()
+            if connection is None:
+                return None
+            symbols = (set(connection.symbols) | add) - remove
+            if len(symbols) > settings.STOCK_STREAM_MAX_SYMBOLS:
+                raise ValueError(f'En fazla {settings.STOCK_STREAM_MAX_SYMBOLS} sembol izlenebilir')
+            connection.symbols = sorted(symbols)
+            connection.version += 1
+            connection.save(update_fields=['symbols', 'version'])
+
+        # Bağlantı bu süreçteyse hemen uygulanır; değilse sahibinin izleyicisi alır
+        self._apply_symbols(connection_id, symbols, connection.version)
+        return symbols
+
+    def _apply_symbols(self, connection_id: str, symbols: Set[str], version: int):
+        with self._lock:
+            subscription = self._subscriptions.get(connection_id)
+            if subscription is None or version <= subscription.version:
+                return
+            added = symbols - subscription.symbols
+            # Yayıncı thread'leri kümeyi okurken yerinde değiştirmemek için yenisi atanır
+            subscription.symbols = set(symbols)
+            subscription.version = version
+        if added:
+            # Deltalar yalnızca değişen alanları taşıdığından yeni semboller tam fiyatla başlar
+            self._deliver(subscription, {'event': 'snapshot', 'data': load_quotes(added)})
+
+    @property
+    def connection_ttl(self) -> timedelta:
+        """Canlılık sinyali bu süreden eski bağlantı kayıtları sahipsiz sayılır"""
+        return timedelta(seconds=3 * settings.STOCK_STREAM_HEARTBEAT_SECONDS)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    # --- Yayın ---
+
+    def publish_quotes(self, quotes: List[dict]):
+        """Yeni fiyatları yayınla; yalnızca değişen alanlar (delta) gönderilir"""
+        deltas = {}
+        with self._lock:
+            for quote in quotes:
+                previous = self._last_quotes.get(quote['symbol'])
+                if previous is None:
+                    delta = dict(quote)
+                else:
+                    delta = {key: quote[key] for key in QUOTE_FIELDS if quote.get(key) != previous.get(key)}
+                    if not delta:
+                        continue
+                    delta['symbol'] = quote['symbol']
+                    delta['timestamp'] = quote['timestamp']
+                self._last_quotes[quote['symbol']] = quote
+                deltas[quote['symbol']] = delta
+            subscriptions = list(self._subscriptions.values())
+
+        if not deltas:
+            return
+        for subscription in subscriptions:
+            matched = [deltas[symbol] for symbol in subscription.symbols if symbol in deltas]
+            if matched:
+                self._deliver(subscription, {'event': 'quotes', 'data': matched})
+
+    def seed_quotes(self, quotes: List[dict]):
+        """Fiyatları yayınlamadan delta tabanı olarak kaydet"""
+        with self._lock:
+            for quote in quotes:
+                self._last_quotes[quote['symbol']] = quote
+
+    def publish_alert(self, alert: dict, user_id: Optional[int] = None):
+        """Tetiklenen uyarıyı sahibine (user_id yoksa sembol abonelerine) gönder"""
+        key = (alert.get('id'), alert.get('triggered_at'))
+        with self._lock:
+            if alert.get('id') is not None:
+                if key in self._recent_alerts:
+                    return
+                self._recent_alerts[key] = True
+                if len(self._recent_alerts) > RECENT_ALERTS_SIZE:
+                    self._recent_alerts.popitem(last=False)
+            subscriptions = list(self._subscriptions.values())
+        for subscription in subscriptions:
+            if user_id is not None:
+                if subscription.user_id != user_id:
+                    continue
+            elif alert.get('symbol') not in subscription.symbols:
+                continue
+            self._deliver(subscription, {'event': 'alert', 'data': alert})
+
+    def _deliver(self, subscription: Subscription, event: dict):
+        try:
+            subscription.loop.call_soon_threadsafe(self._enqueue, subscription, event)
+        except RuntimeError:
+            # Olay döngüsü kapanmış; bağlantı zaten sonlanıyor
+            self.unsubscribe(subscription)
+
+    @staticmethod
+    def _enqueue(subscription: Subscription, event: dict):
+        # Yavaş istemci: en eski olay atılır, yenisi kuyruğa girer
+        if subscription.queue.full():
+            subscription.queue.get_nowait()
+            subscription.dropped += 1
+        subscription.queue.put_nowait(event)
+
+    # --- Veritabanı izleyicisi ---
+
+    def _ensure_watcher(self):
+        """Fiyatlar başka bir süreçte güncelleniyorsa LatestStockQuote'u ve tetiklenen uyarıları izle
+
+        Tüm bağlantılar için tek bir thread ve aralık başına tek sorgu;
+        abone kalmadığında thread sonlanır.
+        """
+        if self.poll_seconds <= 0:
+            return
+        with self._lock:
+            if self._watcher is not None:
+                return
+            self._watcher = threading.Thread(target=self._watch, name='price-bus-watcher', daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        last_seen = None
+        alerts_seen = timezone.now()  # Bağlantı öncesi tetiklenenler yeniden gönderilmez
+        last_touch = 0.0
+        while True:
+            with self._lock:
+                if not self._subscriptions:
+                    self._watcher = None
+                    return
+                versions = {subscription.id: subscription.version for subscription in self._subscriptions.values()}
+            try:
+                # Başka worker'a düşen abonelik değişiklikleri
+                changed = StreamConnection.objects.filter(
+                    connection_id__in=list(versions), version__gt=0
+                ).values_list('connection_id', 'symbols', 'version')
+                for connection_id, symbols, version in changed:
+                    if version > versions[connection_id]:
+                        self._apply_symbols(connection_id, set(symbols), version)
+
+                if time.monotonic() - last_touch >= settings.STOCK_STREAM_HEARTBEAT_SECONDS:
+                    StreamConnection.objects.filter(connection_id__in=list(versions)).update(seen_at=timezone.now())
+                    last_touch = time.monotonic()
+
+                quotes = LatestStockQuote.objects.select_related('stock')
+                if last_seen is not None:
+                    quotes = quotes.filter(updated_at__gt=last_seen)
+                quotes = list(quotes)
+                if quotes:
+                    payloads = [quote_payload(quote) for quote in quotes]
+                    if last_seen is None:
+                        # İlk okuma yalnızca taban: bağlantılar bunu zaten snapshot olarak aldı
+                        self.seed_quotes(payloads)
+                    else:
+                        self.publish_quotes(payloads)
+                    last_seen = max(quote.updated_at for quote in quotes)
+
+                rules = list(PriceAlertRule.objects.select_related('stock').filter(triggered_at__gt=alerts_seen))
+                if rules:
+                    alerts_seen = max(rule.triggered_at for rule in rules)
+                    for rule in rules:
+                        self.publish_alert(alert_payload(rule), user_id=rule.user_id)
+            except Exception as e:
+                print(f"Price bus watcher error: {e}")
+            finally:
+                close_old_connections()
+            time.sleep(self.poll_seconds)
+
+
+# Süreç başına tek veri yolu
+price_bus = PriceBus()
@@ -0,0 +1,280 @@
+"""
+Finobai - Fiyat Toplama ve Saklama Katmanları
+StockPrice tiklerini kapanmış aralıklar halinde 1 dakikalık, 1 saatlik ve
+günlük OHLCV barlarına toplar (tik → 1m → 1h → 1d), saklama süresi dolan
+ham tikleri ve ince barları siler. Her çözünürlüğün ilerlemesi
+PriceRollupCheckpoint'te tutulur; artımlı modda yalnızca yeni bölümler işlenir.
+"""
+
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import LatestStockQuote, PriceBar, PriceRollupCheckpoint, StockPrice, StockSymbol
+
+
+RESOLUTIONS = ('1m', '1h', '1d')
+
+# Her çözünürlüğün kaynağı (None = ham StockPrice tikleri)
+SOURCE_RESOLUTION = {'1m': None, '1h': '1m', '1d': '1h'}
+
+RESOLUTION_DELTAS = {
+    '1m': timedelta(minutes=1),
+    '1h': timedelta(hours=1),
+    '1d': timedelta(days=1),
+}
+
+# Tek işlemde toplanan zaman bölümü (aralık uzunluğunun katı olmalı)
+PARTITION_DELTAS = {
+    '1m': timedelta(days=1),
+    '1h': timedelta(days=1),
+    '1d': timedelta(days=31),
+}
+
+BAR_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# (stock_id, başlangıç, open, high, low, close, volume, tik sayısı)
+BarRow = Tuple[int, datetime, float, float, float, float, int, int]
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """Anı, yerel saat dilimine göre çözünürlük aralığının başına hizala
+
+    Sonuç UTC olarak döner; veritabanından okunan bar başlangıçlarıyla aynı
+    ofsette olur (anlık toplanan kuyruk ile depolanmış barlar karışabilir).
+    """
+    local = timezone.localtime(moment)
+    if resolution == '1m':
+        start = local.replace(second=0, microsecond=0)
+    elif resolution == '1h':
+        start = local.replace(minute=0, second=0, microsecond=0)
+    else:
+        start = local.replace(hour=0, minute=0, second=0, microsecond=0)
+    return start.astimezone(dt_timezone.utc)
+
+
+def aggregate_bars(rows: Iterable[BarRow], resolution: str) -> Dict[Tuple[int, datetime], list]:
+    """Zaman sıralı bar/tik satırlarını üst çözünürlüğe topla
+
+    Ham tikler open=high=low=close olan tek tikli barlar olarak verilir.
+    Hacim, StockPrice'ta kümülatif seans hacmi olduğundan toplanmaz;
+    aralıktaki en yüksek değer alınır.
+    """
+    bars = {}
+    for stock_id, start, open_, high, low, close, volume, count in rows:
+        key = (stock_id, bucket_start(start, resolution))
+        bar = bars.get(key)
+        if bar is None:
+            bars[key] = [open_, high, low, close, volume, count]
+            continue
+        if high > bar[1]:
+            bar[1] = high
+        if low < bar[2]:
+            bar[2] = low
+        bar[3] = close
+        if volume > bar[4]:
+            bar[4] = volume
+        bar[5] += count
+    return bars
+
+
+class PriceRollupEngine:
+    """Toplama, saklama temizliği ve katmanlı bar okuma"""
+
+    def __init__(self, now: Optional[datetime] = None):
+        self.now = now or timezone.now()
+
+    def run(self, incremental: bool = True, prune: bool = True, resolutions=RESOLUTIONS) -> dict:
+        """Seçilen çözünürlükleri sırayla topla, ardından süresi dolanları sil"""
+        report = {
+            'rolled': {resolution: self.rollup(resolution, incremental) for resolution in RESOLUTIONS
+                       if resolution in resolutions}
+        }
+        if prune:
+            report['pruned'] = self.prune()
+        return report
+
+    # --- Toplama ---
+
+    def rollup(self, resolution: str, incremental: bool = True) -> int:
+        """Kapanmış aralıkları kaynak katmandan topla; yazılan bar sayısını döndür"""
+        checkpoint, _ = PriceRollupCheckpoint.objects.get_or_create(resolution=resolution)
+
+        # Yalnızca kapanmış aralıklar; üst katmanlar kaynağın ilerlemesini geçemez
+        end = bucket_start(self.now, resolution)
+        source = SOURCE_RESOLUTION[resolution]
+        if source is not None:
+            source_until = self._rolled_until(source)
+            if source_until is None:
+                return 0
+            end = min(end, bucket_start(source_until, resolution))
+
+        if incremental and checkpoint.rolled_until:
+            start = checkpoint.rolled_until
+        else:
+            first = self._first_source_time(resolution)
+            if first is None:
+                return 0
+            start = bucket_start(first, resolution)
+
+        written = 0
+        while start < end:
+            window_end = min(start + PARTITION_DELTAS[resolution], end)
+            bars = aggregate_bars(self._source_rows(resolution, start, window_end), resolution)
+            with transaction.atomic():
+                self._store(resolution, bars)
+                PriceRollupCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                    rolled_until=window_end, updated_at=timezone.now()
+                )
+            written += len(bars)
+            start = window_end
+
+        return written
+
+    def _rolled_until(self, resolution: str) -> Optional[datetime]:
+        return PriceRollupCheckpoint.objects.filter(
+            resolution=resolution
+        ).values_list('rolled_until', flat=True).first()
+
+    def _first_source_time(self, resolution: str) -> Optional[datetime]:
+        source = SOURCE_RESOLUTION[resolution]
+        if source is None:
+            return StockPrice.objects.order_by('timestamp').values_list('timestamp', flat=True).first()
+        return PriceBar.objects.filter(resolution=source).order_by('start').values_list('start', flat=True).first()
+
+    def _source_rows(self, resolution: str, start: datetime, end: datetime,
+                     stock_id: Optional[int] = None) -> Iterable[BarRow]:
+        """Kaynak katmanın [start, end) aralığındaki satırları (zaman sıralı)"""
+        source = SOURCE_RESOLUTION[resolution]
+        if source is None:
+            return self._tick_rows(start, end, stock_id)
+
+        bars = PriceBar.objects.filter(resolution=source, start__gte=start, start__lt=end)
+        if stock_id is not None:
+            bars = bars.filter(stock_id=stock_id)
+        return bars.order_by('start', 'id').values_list(
+            'stock_id', 'start', 'open', 'high', 'low', 'close', 'volume', 'tick_count'
+        ).iterator(chunk_size=2000)
+
+    def _tick_rows(self, start: datetime, end: Optional[datetime], stock_id: Optional[int] = None):
+        ticks = StockPrice.objects.filter(timestamp__gte=start)
+        if end is not None:
+            ticks = ticks.filter(timestamp__lt=end)
+        if stock_id is not None:
+            ticks = ticks.filter(stock_id=stock_id)
+        rows = ticks.order_by('timestamp', 'id').values_list(
+            'stock_id', 'timestamp', 'current_price', 'volume'
+        ).iterator(chunk_size=2000)
+        for tick_stock_id, timestamp, price, volume in rows:
+            price = float(price)
+            yield (tick_stock_id, timestamp, price, price, price, price, volume, 1)
+
+    def _store(self, resolution: str, bars: Dict[Tuple[int, datetime], list]):
+        PriceBar.objects.bulk_create(
+            [
+                PriceBar(
+                    stock_id=stock_id, resolution=resolution, start=start,
+                    open=bar[0], high=bar[1], low=bar[2], close=bar[3],
+                    volume=bar[4], tick_count=bar[5]
+                )
+                for (stock_id, start), bar in bars.items()
+            ],
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['stock', 'resolution', 'start'],
+            update_fields=['open', 'high', 'low', 'close', 'volume', 'tick_count'],
+        )
+
+    # --- Saklama ---
+
+    def prune(self) -> dict:
+        """Üst katmana toplanmış ve saklama süresi dolmuş satırları sil"""
+        pruned = {}
+
+        cutoff = self._prune_cutoff(timedelta(hours=settings.STOCK_TICK_RETENTION_HOURS), '1m')
+        pruned['ticks'] = self._prune_ticks(cutoff) if cutoff else 0
+
+        for resolution, retention_days, consumer in (
+            ('1m', settings.STOCK_BAR_1M_RETENTION_DAYS, '1h'),
+            ('1h', settings.STOCK_BAR_1H_RETENTION_DAYS, '1d'),
+            ('1d', settings.STOCK_BAR_1D_RETENTION_DAYS, None),
+        ):
+            if retention_days <= 0:
+                # 0: süresiz sakla
+                pruned[resolution] = 0
+                continue
+            cutoff = self._prune_cutoff(timedelta(days=retention_days), consumer)
+            pruned[resolution] = (
+                PriceBar.objects.filter(resolution=resolution, start__lt=cutoff).delete()[0]
+                if cutoff else 0
+            )
+
+        return pruned
+
+    def _prune_cutoff(self, retention: timedelta, consumer: Optional[str]) -> Optional[datetime]:
+        """Silme sınırı: saklama süresi ve tüketen katmanın ilerlemesinden erken olanı
+
+        Sınır tüketen katmanın aralık başına hizalanır; böylece kalan satırlar
+        tam bir aralıktan başlar ve --full yeniden toplama eksik bar üretmez.
+        """
+        cutoff = self.now - retention
+        if consumer is None:
+            return cutoff
+        rolled_until = self._rolled_until(consumer)
+        if rolled_until is None:
+            return None
+        return bucket_start(min(cutoff, rolled_until), consumer)
+
+    def _prune_ticks(self, cutoff: datetime) -> int:
+        """Ham tikleri parça parça sil (güncel fiyatın işaret ettiği tikler korunur)"""
+        protected = LatestStockQuote.objects.exclude(price=None).values('price_id')
+        expired = StockPrice.objects.filter(timestamp__lt=cutoff).exclude(id__in=protected).order_by()
+
+        deleted = 0
+        batch_size = settings.STOCK_ROLLUP_DELETE_BATCH_SIZE
+        while True:
+            ids = list(expired.values_list('id', flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += StockPrice.objects.filter(id__in=ids).delete()[0]
+        return deleted
+
+    # --- Okuma ---
+
+    def load_bars(self, symbol: str, resolution: str, since: datetime) -> pd.DataFrame:
+        """Sembolün barlarını PriceHistoryStore.load() biçiminde döndür
+
+        Depolanmış barlar kontrol noktasına kadar okunur; sonrası (henüz
+        toplanmamış veya açık aralık) alt katmanlardan anlık toplanır.
+        """
+        stock_id = StockSymbol.objects.filter(symbol=symbol).values_list('id', flat=True).first()
+        rows = self._series(stock_id, resolution, bucket_start(since, resolution)) if stock_id else []
+
+        frame = pd.DataFrame.from_records(
+            [row[1:7] for row in rows], columns=['Date'] + BAR_COLUMNS
+        )
+        frame.index = pd.DatetimeIndex(pd.to_datetime(frame.pop('Date'), utc=True), name='Date')
+        return frame
+
+    def _series(self, stock_id: int, resolution: Optional[str], since: datetime) -> List[BarRow]:
+        if resolution is None:
+            return list(self._tick_rows(since, None, stock_id))
+
+        rows = []
+        tail_start = since
+        rolled_until = self._rolled_until(resolution)
+        if rolled_until and rolled_until > since:
+            rows = list(PriceBar.objects.filter(
+                stock_id=stock_id, resolution=resolution, start__gte=since, start__lt=rolled_until
+            ).order_by('start').values_list(
+                'stock_id', 'start', 'open', 'high', 'low', 'close', 'volume', 'tick_count'
+            ))
+            tail_start = rolled_until
+
+        tail = aggregate_bars(self._series(stock_id, SOURCE_RESOLUTION[resolution], tail_start), resolution)
+        rows.extend((sid, start, *bar) for (sid, start), bar in tail.items())
+        return rows
@@ -0,0 +1,214 @@
+"""
+Finobai - Vektörel Risk Metrikleri
+Hizalanmış günlük getiri matrisi (T gün x N hisse) ve endeks (BIST 100)
+getirileri üzerinden tüm hisseler için tek geçişte volatilite, tarihsel ve
+parametrik VaR/CVaR, maksimum düşüş, Sharpe/Sortino ve (kayan) beta hesaplar.
+Eksik günler NaN olarak kalır; her hisse kendi geçerli gözlemleriyle ölçülür.
+"""
+
+import warnings
+from dataclasses import dataclass, field
+from datetime import timedelta
+from statistics import NormalDist
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.utils import timezone
+
+from .history_store import PriceHistoryStore
+from .models import DailyPriceBar
+
+
+METRIC_NAMES = (
+    'volatility', 'var_95', 'cvar_95', 'var_95_parametric', 'cvar_95_parametric',
+    'max_drawdown', 'sharpe_ratio', 'sortino_ratio', 'beta', 'rolling_beta'
+)
+
+
+@dataclass
+class RiskMetricsResult:
+    """Hisse başına risk metrikleri (yüzdeler yüzde cinsinden, yıllık)"""
+    symbols: List[str]
+    metrics: Dict[str, np.ndarray]
+    rolling_beta: np.ndarray = field(default_factory=lambda: np.empty((0, 0)))  # T x N
+    dates: List = field(default_factory=list)
+
+    def for_symbol(self, symbol: str) -> Dict[str, Optional[float]]:
+        """Tek hissenin metrikleri (hesaplanamayanlar None)"""
+        index = self.symbols.index(symbol)
+        result = {}
+        for name, values in self.metrics.items():
+            value = float(values[index])
+            result[name] = round(value, 4) if np.isfinite(value) else None
+        return result
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.metrics, index=pd.Index(self.symbols, name='symbol'))
+
+
+def _window_sums(values: np.ndarray, window: int) -> np.ndarray:
+    """Eksen 0 boyunca kayan pencere toplamları (ilk window-1 satır NaN)"""
+    cumulative = np.cumsum(values, axis=0)
+    sums = np.full(values.shape, np.nan)
+    sums[window - 1] = cumulative[window - 1]
+    sums[window:] = cumulative[window:] - cumulative[:-window]
+    return sums
+
+
+class RiskMetricsEngine:
+    """Çok hisseli risk metrik motoru"""
+
+    def __init__(self, risk_free_rate: float = 0.12, trading_days: int = 252,
+                 confidence: Optional[float] = None, beta_window: Optional[int] = None,
+                 min_observations: int = 20):
+        self.risk_free_rate = risk_free_rate  # Türkiye 10 yıllık tahvil faizi
+        self.trading_days = trading_days
+        self.confidence = confidence or settings.STOCK_RISK_CONFIDENCE
+        self.beta_window = beta_window or settings.STOCK_RISK_BETA_WINDOW
+        self.min_observations = min_observations
+
+    # --- Veri ---
+
+    def load_returns(self, symbols: List[str], days: int = 365):
+        """Saklanan kapanışlardan (endeks dahil) tek sorguyla getiri matrisi kur
+
+        Döndürür: (getiri DataFrame'i [tarih x sembol], endeks getiri Series'i)
+        """
+        benchmark = settings.STOCK_BENCHMARK_SYMBOL
+        # Endeks serisi yalnızca eksik kuyruk için ağdan çekilir
+        PriceHistoryStore().sync(benchmark, days)
+
+        since = timezone.localdate() - timedelta(days=days)
+        rows = DailyPriceBar.objects.filter(
+            symbol__in=list(symbols) + [benchmark],
+            date__gte=since
+        ).values_list('date', 'symbol', 'close')
+
+        frame = pd.DataFrame.from_records(list(rows), columns=['date', 'symbol', 'close'])
+        if frame.empty:
+            return pd.DataFrame(columns=list(symbols)), pd.Series(dtype=np.float64)
+
+        closes = frame.pivot(index='date', columns='symbol', values='close').sort_index()
+        # Tatil boşlukları doldurulur; listelenmeden önceki günler NaN kalır
+        returns = closes.ffill().pct_change(fill_method=None).iloc[1:]
+        benchmark_returns = returns.pop(benchmark) if benchmark in returns else pd.Series(
+            np.nan, index=returns.index
+        )
+        ordered = [symbol for symbol in symbols if symbol in returns.columns]
+        return returns[ordered], benchmark_returns
+
+    def score_universe(self, symbols: List[str], days: int = 365) -> RiskMetricsResult:
+        """Depodaki geçmişle verilen tüm hisselerin metriklerini tek çağrıda hesapla"""
+        returns, benchmark = self.load_returns(symbols, days)
+        return self.compute(returns, benchmark)
+
+    # --- Hesaplama ---
+
+    def compute(self, returns: pd.DataFrame, benchmark: Optional[pd.Series] = None) -> RiskMetricsResult:
+        """Getiri matrisi ve endeks getirilerinden tüm metrikleri hesapla"""
+        symbols = list(returns.columns)
+        r = returns.to_numpy(dtype=np.float64)
+        if benchmark is not None:
+            b = benchmark.reindex(returns.index).to_numpy(dtype=np.float64)
+        else:
+            b = np.full(len(r), np.nan)
+
+        t, n = r.shape
+        valid = ~np.isnan(r)
+        counts = valid.sum(axis=0)
+        enough = counts >= max(self.min_observations, 2)
+
+        # Tamamen boş sütunlar için nan* uyarıları beklenen durumdur
+        with np.errstate(invalid='ignore', divide='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            metrics = self._distribution_metrics(r, valid, counts)
+            metrics['max_drawdown'] = self._max_drawdown(r)
+            beta, rolling = self._beta(r, valid, b)
+            metrics['beta'] = beta
+            metrics['rolling_beta'] = self._last_valid(rolling)
+
+        for name, values in metrics.items():
+            values[~enough] = np.nan
+
+        return RiskMetricsResult(symbols=symbols, metrics=metrics, rolling_beta=rolling,
+                                 dates=list(returns.index))
+
+    def _distribution_metrics(self, r: np.ndarray, valid: np.ndarray, counts: np.ndarray) -> Dict[str, np.ndarray]:
+        periods = self.trading_days
+        rf_daily = self.risk_free_rate / periods
+        tail = 1 - self.confidence
+
+        mean = np.nanmean(r, axis=0) if len(r) else np.full(r.shape[1], np.nan)
+        std = np.nanstd(r, axis=0, ddof=1) if len(r) > 1 else np.full(r.shape[1], np.nan)
+
+        # Tarihsel VaR/CVaR: kuyruk yüzdeliği ve altında kalan getirilerin ortalaması
+        var_hist = np.nanpercentile(r, tail * 100, axis=0) if len(r) else np.full(r.shape[1], np.nan)
+        tail_returns = np.where(valid & (r <= var_hist), r, np.nan)
+        cvar_hist = np.nanmean(tail_returns, axis=0)
+
+        # Parametrik (normal) VaR/CVaR
+        z = NormalDist().inv_cdf(tail)
+        var_param = mean + z * std
+        cvar_param = mean - std * NormalDist().pdf(z) / tail
+
+        excess = mean - rf_daily
+        downside = np.sqrt(np.nanmean(np.minimum(r - rf_daily, 0) ** 2, axis=0))
+
+        return {
+            'volatility': std * np.sqrt(periods) * 100,
+            'var_95': var_hist * 100,
+            'cvar_95': cvar_hist * 100,
+            'var_95_parametric': var_param * 100,
+            'cvar_95_parametric': cvar_param * 100,
+            'sharpe_ratio': np.where(std > 0, excess / std * np.sqrt(periods), np.nan),
+            'sortino_ratio': np.where(downside > 0, excess / downside * np.sqrt(periods), np.nan),
+        }
+
+    @staticmethod
+    def _max_drawdown(r: np.ndarray) -> np.ndarray:
+        """Birikimli servetin zirvesinden en derin düşüş (eksik gün = getiri yok)"""
+        if not len(r):
+            return np.full(r.shape[1], np.nan)
+        wealth = np.cumprod(1 + np.nan_to_num(r, nan=0.0), axis=0)
+        peak = np.maximum(np.maximum.accumulate(wealth, axis=0), 1.0)
+        return (wealth / peak - 1).min(axis=0) * 100
+
+    def _beta(self, r: np.ndarray, valid: np.ndarray, b: np.ndarray):
+        """Tüm dönem betası ve kayan pencere betası (ortak geçerli günler üzerinden)"""
+        t, n = r.shape
+        paired = valid & ~np.isnan(b)[:, None]
+        x = np.where(paired, r, 0.0)
+        y = np.where(paired, b[:, None], 0.0)
+        c = paired.astype(np.float64)
+
+        count = c.sum(axis=0)
+        mean_x = x.sum(axis=0) / count
+        mean_y = y.sum(axis=0) / count
+        cov = (x * y).sum(axis=0) / count - mean_x * mean_y
+        var = (y * y).sum(axis=0) / count - mean_y ** 2
+        beta = np.where(var > 0, cov / var, np.nan)
+
+        window = self.beta_window
+        if t < window:
+            return beta, np.full((t, n), np.nan)
+
+        w_count = _window_sums(c, window)
+        w_x = _window_sums(x, window)
+        w_y = _window_sums(y, window)
+        w_cov = _window_sums(x * y, window) / w_count - (w_x / w_count) * (w_y / w_count)
+        w_var = _window_sums(y * y, window) / w_count - (w_y / w_count) ** 2
+        rolling = np.where((w_var > 0) & (w_count >= window * 0.8), w_cov / w_var, np.nan)
+        return beta, rolling
+
+    @staticmethod
+    def _last_valid(values: np.ndarray) -> np.ndarray:
+        """Her sütunun son NaN olmayan değeri"""
+        if not len(values):
+            return np.full(values.shape[1], np.nan)
+        mask = ~np.isnan(values)
+        last_index = np.where(mask.any(axis=0), len(values) - 1 - np.argmax(mask[::-1], axis=0), 0)
+        result = values[last_index, np.arange(values.shape[1])]
+        result[~mask.any(axis=0)] = np.nan
+        return result
@@ -0,0 +1,148 @@
+"""
+Finobai - Faktör Tablosu Üzerinde Hisse Tarayıcı
+Kullanıcı kriterlerini StockFactor üzerinde indeksli aralık sorgularına
+çevirir. İstek başına ağ (yfinance) veya LLM çağrısı yapılmaz.
+
+Kriterler `min_<faktör>` / `max_<faktör>` anahtarlarıyla verilir
+(ör. {"min_market_cap": 1e9, "max_pe_ratio": 15}); ayrıca `sectors`,
+`markets` ve `risk_level` desteklenir. Değeri bilinmeyen (NULL) faktörler
+aralık filtresini geçer; `exclude_missing: true` ile bu hisseler elenir.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from django.db.models import F, Q
+
+from .models import StockFactor
+
+
+# Kriter adı → StockFactor alanı
+RANGE_FACTORS = {
+    'price': 'price',
+    'market_cap': 'market_cap',
+    'pe_ratio': 'pe_ratio',
+    'pb_ratio': 'pb_ratio',
+    'dividend_yield': 'dividend_yield',
+    'roe': 'roe',
+    'profit_margin': 'profit_margin',
+    'revenue_growth': 'revenue_growth',
+    'debt_to_equity': 'debt_to_equity',
+    'volume': 'avg_volume_20',
+    'rsi': 'rsi_14',
+    'return_1m': 'return_1m',
+    'return_3m': 'return_3m',
+    'return_12m': 'return_12m',
+    'volatility': 'volatility',
+    'beta': 'beta',
+    'sharpe_ratio': 'sharpe_ratio',
+    'max_drawdown': 'max_drawdown',
+    'risk_score': 'risk_score',
+    'ai_score': 'composite_score',
+}
+
+# Risk seviyesi → risk_score aralığı (60 = yıllık %40 volatilite)
+RISK_LEVEL_RANGES = {
+    'DÜŞÜK': (None, 60), 'LOW': (None, 60),
+    'ORTA': (None, None), 'MEDIUM': (None, None),
+    'YÜKSEK': (60, None), 'HIGH': (60, None),
+}
+
+RESULT_FIELDS = [
+    'stock__symbol', 'stock__name', 'market', 'sector', 'as_of', 'price', 'market_cap',
+    'pe_ratio', 'pb_ratio', 'dividend_yield', 'roe', 'avg_volume_20', 'rsi_14', 'return_1m',
+    'return_3m', 'return_12m', 'volatility', 'beta', 'sharpe_ratio', 'max_drawdown',
+    'risk_score', 'composite_score', 'stock__latest_quote__current_price',
+]
+
+
+def recommendation_for_score(score: Optional[float]) -> str:
+    """Bileşik skordan tavsiye etiketi"""
+    if score is None:
+        return 'HOLD'
+    if score >= 80:
+        return 'STRONG_BUY'
+    if score >= 65:
+        return 'BUY'
+    if score >= 40:
+        return 'HOLD'
+    if score >= 25:
+        return 'SELL'
+    return 'STRONG_SELL'
+
+
+def risk_level_for_score(risk_score: Optional[float]) -> str:
+    """Risk skorundan seviye (37.5 = %25, 60 = %40 yıllık volatilite)"""
+    if risk_score is None:
+        return 'MEDIUM'
+    if risk_score < 37.5:
+        return 'LOW'
+    if risk_score < 60:
+        return 'MEDIUM'
+    return 'HIGH'
+
+
+class StockScreener:
+    """StockFactor tablosunu kriterlere göre tarar"""
+
+    def build_filters(self, criteria: Dict[str, Any]) -> Tuple[List[Q], List[str]]:
+        """Kriterleri ORM filtrelerine çevir; döndürür: (filtreler, tanınmayan anahtarlar)"""
+        filters = []
+        ignored = []
+        exclude_missing = bool(criteria.get('exclude_missing'))
+
+        def bound(field: str, lookup: str, value: float) -> Q:
+            condition = Q(**{f"{field}__{lookup}": value})
+            return condition if exclude_missing else condition | Q(**{f"{field}__isnull": True})
+
+        for key, value in criteria.items():
+            if value in (None, '', []) or key == 'exclude_missing':
+                continue
+            if key in ('sectors', 'markets'):
+                values = value if isinstance(value, (list, tuple)) else [value]
+                filters.append(Q(**{f"{key[:-1]}__in": list(values)}))
+            elif key == 'risk_level':
+                low, high = RISK_LEVEL_RANGES.get(str(value).upper(), (None, None))
+                if low is not None:
+                    filters.append(bound('risk_score', 'gte', low))
+                if high is not None:
+                    filters.append(bound('risk_score', 'lte', high))
+            elif key[:4] in ('min_', 'max_') and key[4:] in RANGE_FACTORS:
+                lookup = 'gte' if key.startswith('min_') else 'lte'
+                try:
+                    filters.append(bound(RANGE_FACTORS[key[4:]], lookup, float(value)))
+                except (TypeError, ValueError):
+                    ignored.append(key)
+            else:
+                ignored.append(key)
+
+        return filters, ignored
+
+    def screen(self, criteria: Dict[str, Any], order_by: Optional[str] = None,
+               limit: int = 50) -> Dict[str, Any]:
+        """Kriterlere uyan hisseleri sıralı döndür"""
+        filters, ignored = self.build_filters(criteria)
+        queryset = StockFactor.objects.filter(*filters, stock__is_active=True)
+
+        ordering = self._ordering(order_by)
+        rows = list(queryset.order_by(ordering).values(*RESULT_FIELDS)[:max(1, min(limit, 500))])
+
+        results = []
+        for row in rows:
+            live_price = row.pop('stock__latest_quote__current_price')
+            row['symbol'] = row.pop('stock__symbol')
+            row['name'] = row.pop('stock__name')
+            # Güncel fiyat varsa gecelik kapanış yerine o kullanılır
+            row['current_price'] = float(live_price) if live_price is not None else row['price']
+            row['ai_score'] = row.pop('composite_score')
+            row['volume'] = row.pop('avg_volume_20')
+            results.append(row)
+
+        return {'results': results, 'ignored_criteria': ignored}
+
+    @staticmethod
+    def _ordering(order_by: Optional[str]):
+        """İzin verilen alanlara göre sıralama; boş değerler sona"""
+        order_by = order_by or '-ai_score'
+        descending = order_by.startswith('-')
+        field = RANGE_FACTORS.get(order_by.lstrip('-'), 'composite_score')
+        return F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
@@ -1,20 +1,31 @@
 import json
 import requests
+import pandas as pd
 import yfinance as yf
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from decimal import Decimal
-import openai
 from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 
-from .models import StockSymbol, StockPrice, StockAnalysis, MarketNews, UserRiskProfile
+from ai_services.llm_gateway import get_llm_gateway
+
+from .alert_rules import alert_engine
+from .fundamentals_cache import fundamentals_cache
+from .models import (
+    StockSymbol, StockPrice, LatestStockQuote, StockAnalysis, MarketNews,
+    UserRiskProfile, UserPortfolio
+)
+from .portfolio_valuation import PortfolioValuationEngine
+from .price_bus import price_bus, quote_payload
 
 
 class StockDataService:
     """Hisse senedi verilerini çeken servis"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def get_bist_stocks(self) -> list:
         """BIST 100 hisselerinin listesini getir"""
@@ -43,60 +54,182 @@ class StockDataService:
         try:
             stock = yf.Ticker(symbol)
             hist = stock.history(period="2d")
-            info = stock.info
+            info = fundamentals_cache.get(symbol)
             
             if hist.empty:
                 return None
             
-            latest = hist.iloc[-1]
-            previous = hist.iloc[-2] if len(hist) > 1 else latest
-            
-            current_price = float(latest['Close'])
-            open_price = float(latest['Open'])
-            high_price = float(latest['High'])
-            low_price = float(latest['Low'])
-            volume = int(latest['Volume'])
-            
-            # Değişim hesapla
-            change_amount = current_price - float(previous['Close'])
-            change_percent = (change_amount / float(previous['Close'])) * 100
-            
-            return {
-                'symbol': symbol,
-                'current_price': current_price,
-                'open_price': open_price,
-                'high_price': high_price,
-                'low_price': low_price,
-                'volume': volume,
-                'change_amount': change_amount,
-                'change_percent': change_percent,
-                'market_cap': info.get('marketCap', 0),
-                'currency': 'TRY' if '.IS' in symbol else 'USD'
-            }
+            return self._build_price_data(symbol, hist, info.get('marketCap', 0))
             
         except Exception as e:
             print(f"Error fetching {symbol}: {e}")
             return None
     
-    def update_all_stock_prices(self):
-        """Tüm aktif hisselerin fiyatlarını güncelle"""
-        symbols = StockSymbol.objects.filter(is_active=True)
+    def fetch_stock_prices_bulk(self, symbols: list) -> dict:
+        """Birden çok hisse için fiyatları toplu indir (sembol -> fiyat verisi)"""
+        if not symbols:
+            return {}
+        
+        chunk_size = max(1, settings.STOCK_PRICE_BATCH_SIZE)
+        chunks = [symbols[i:i + chunk_size] for i in range(0, len(symbols), chunk_size)]
+        max_workers = max(1, min(settings.STOCK_PRICE_MAX_WORKERS, len(chunks)))
+        
+        results = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for chunk_result in executor.map(self._download_price_chunk, chunks):
+                results.update(chunk_result)
+        
+        return results
+    
+    def _download_price_chunk(self, symbols: list) -> dict:
+        """Tek bir toplu istekle sembol grubunun son iki günlük barlarını indir"""
+        try:
+            data = yf.download(
+                symbols,
+                period="2d",
+                interval="1d",
+                group_by='ticker',
+                auto_adjust=True,
+                threads=False,
+                progress=False
+            )
+        except Exception as e:
+            print(f"Bulk download error for {len(symbols)} symbols: {e}")
+            return {}
+        
+        if data is None or data.empty:
+            return {}
+        
+        results = {}
+        for symbol in symbols:
+            try:
+                if isinstance(data.columns, pd.MultiIndex):
+                    if symbol not in data.columns.get_level_values(0):
+                        continue
+                    hist = data[symbol]
+                else:
+                    # Tek sembollü isteklerde yfinance düz sütun döndürür
+                    hist = data
+                
+                hist = hist.dropna(subset=['Close'])
+                if hist.empty:
+                    continue
+                
+                results[symbol] = self._build_price_data(symbol, hist)
+            except Exception as e:
+                print(f"Error parsing bulk data for {symbol}: {e}")
+        
+        return results
+    
+    def _build_price_data(self, symbol: str, hist, market_cap=None) -> dict:
+        """Günlük bar geçmişinden fiyat verisi sözlüğü oluştur"""
+        latest = hist.iloc[-1]
+        previous = hist.iloc[-2] if len(hist) > 1 else latest
         
+        current_price = float(latest['Close'])
+        open_price = float(latest['Open'])
+        high_price = float(latest['High'])
+        low_price = float(latest['Low'])
+        volume = int(latest['Volume']) if pd.notna(latest['Volume']) else 0
+        
+        # Değişim hesapla
+        change_amount = current_price - float(previous['Close'])
+        change_percent = (change_amount / float(previous['Close'])) * 100
+        
+        return {
+            'symbol': symbol,
+            'current_price': current_price,
+            'open_price': open_price,
+            'high_price': high_price,
+            'low_price': low_price,
+            'volume': volume,
+            'change_amount': change_amount,
+            'change_percent': change_percent,
+            'market_cap': market_cap,
+            'currency': 'TRY' if '.IS' in symbol else 'USD'
+        }
+    
+    def update_all_stock_prices(self) -> list:
+        """Tüm aktif hisselerin fiyatlarını toplu indirip tek seferde kaydet"""
+        symbols = list(StockSymbol.objects.filter(is_active=True))
+        price_map = self.fetch_stock_prices_bulk([s.symbol for s in symbols])
+        
+        new_prices = []
         for stock_symbol in symbols:
-            price_data = self.fetch_stock_price(stock_symbol.symbol)
+            price_data = price_map.get(stock_symbol.symbol)
             
             if price_data:
-                StockPrice.objects.create(
+                new_prices.append(StockPrice(
                     stock=stock_symbol,
                     open_price=Decimal(str(price_data['open_price'])),
                     current_price=Decimal(str(price_data['current_price'])),
                     high_price=Decimal(str(price_data['high_price'])),
                     low_price=Decimal(str(price_data['low_price'])),
                     volume=price_data['volume'],
-                    change_percent=Decimal(str(price_data['change_percent'])),
-                    change_amount=Decimal(str(price_data['change_amount'])),
+                    change_percent=Decimal(str(round(price_data['change_percent'], 2))),
+                    change_amount=Decimal(str(round(price_data['change_amount'], 4))),
                     market_cap=price_data.get('market_cap'),
-                )
+                ))
+        
+        if new_prices:
+            # Zaman serisi ve güncel fiyat tablosu birlikte güncellenir
+            with transaction.atomic():
+                StockPrice.objects.bulk_create(new_prices, batch_size=500)
+                quotes = self._update_latest_quotes(new_prices)
+                # Yalnızca fiyatı gelen sembolleri tutan pozisyonlar yeniden değerlenir
+                PortfolioValuationEngine().revalue_symbols(price.stock_id for price in new_prices)
+                # Akış abonelerine işlem kalıcı olduktan sonra gönder
+                payloads = [quote_payload(quote) for quote in quotes]
+                transaction.on_commit(lambda: price_bus.publish_quotes(payloads))
+            
+            # Uyarı kuralları kalıcı fiyatlar üzerinden değerlendirilir
+            for user_id, alert in alert_engine.evaluate(quotes):
+                price_bus.publish_alert(alert, user_id=user_id)
+        
+        return new_prices
+    
+    def _update_latest_quotes(self, prices: list) -> list:
+        """Yeni fiyatları LatestStockQuote tablosuna yaz (sembol başına upsert)"""
+        quotes = [
+            LatestStockQuote(
+                stock=price.stock,
+                price=price if price.pk else None,
+                open_price=price.open_price,
+                current_price=price.current_price,
+                high_price=price.high_price,
+                low_price=price.low_price,
+                volume=price.volume,
+                change_percent=price.change_percent,
+                change_amount=price.change_amount,
+                market_cap=price.market_cap,
+                timestamp=price.timestamp,
+            )
+            for price in prices
+        ]
+        LatestStockQuote.objects.bulk_create(
+            quotes,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['stock'],
+            update_fields=[
+                'price', 'open_price', 'current_price', 'high_price', 'low_price', 'volume',
+                'change_percent', 'change_amount', 'market_cap', 'timestamp', 'updated_at'
+            ]
+        )
+        return quotes
+    
+    def get_latest_quotes(self, symbols: list = None):
+        """Güncel fiyatları tek sorguda getir (isteğe bağlı sembol filtresi)"""
+        quotes = LatestStockQuote.objects.select_related('stock').filter(stock__is_active=True)
+        if symbols is not None:
+            quotes = quotes.filter(stock__symbol__in=symbols)
+        return quotes.order_by('stock__symbol')
+    
+    def revalue_portfolio(self, portfolio: UserPortfolio) -> UserPortfolio:
+        """Portföy pozisyonlarını güncel fiyatlarla değerle ve toplamları güncelle"""
+        PortfolioValuationEngine().revalue_portfolios([portfolio.id])
+        portfolio.refresh_from_db()
+        return portfolio
     
     def get_trending_stocks(self) -> list:
         """Günün trend hisselerini getir"""
@@ -112,7 +245,7 @@ class StockAnalysisService:
     """AI destekli hisse analiz servisi"""
     
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.OPENAI_API_KEY)
+        self.llm = get_llm_gateway()
     
     def analyze_stock(self, symbol: str) -> dict:
         """Hisse senedi için AI analizi yap"""
@@ -150,7 +283,7 @@ class StockAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen deneyimli bir finansal analist ve yatırım uzmanısın."},
@@ -228,7 +361,7 @@ class StockAnalysisService:
             }}
             """
             
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Sen deneyimli bir portföy yöneticisisin."},
@@ -274,6 +407,9 @@ class StockAnalysisService:
 class MarketNewsService:
     """Piyasa haberlerini çeken servis"""
     
+    def __init__(self):
+        self.llm = get_llm_gateway()
+    
     def fetch_market_news(self) -> list:
         """Güncel piyasa haberlerini çek"""
         # Gerçek uygulamada Reuters/Bloomberg API kullanılacak
@@ -307,7 +443,7 @@ class MarketNewsService:
     def analyze_news_sentiment(self, news_text: str) -> str:
         """Haber metninin sentiment analizi"""
         try:
-            response = self.client.chat.completions.create(
+            response = self.llm.chat_completion(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "Finansal haber sentiment analisti"},
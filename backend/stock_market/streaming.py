@@ -0,0 +1,198 @@
+"""
+Finobai - Canlı Fiyat ve Uyarı Akışı (Server-Sent Events)
+Django'nun önünde çalışan ham ASGI uygulaması; istek başına bir thread
+tutmadan uzun ömürlü SSE bağlantılarını olay döngüsünde taşır.
+
+    GET  /api/stocks/stream/?symbols=THYAO.IS,AKBNK.IS&token=<access token>
+    POST /api/stocks/stream/<connection_id>/   {"add": [...], "remove": [...]}
+
+Bağlantı açılınca `ready` (bağlantı kimliği) ve `snapshot` (güncel fiyatlar)
+olayları, ardından price_bus'tan gelen `quotes` (delta) ve `alert` olayları
+gönderilir; POST ile eklenen semboller için yeniden `snapshot` gelir. POST
+bağlantıyı tutan worker'dan farklı bir worker'a düşebilir. EventSource başlık gönderemediği için token sorgu parametresidir.
+"""
+
+import asyncio
+import json
+from typing import Optional
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from accounts.utils import verify_token
+
+from .price_bus import load_quotes, price_bus
+
+
+STREAM_PATH = '/api/stocks/stream/'
+
+
+def _format_event(event: str, data) -> bytes:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+
+
+def _parse_symbols(value: str) -> set:
+    return {symbol.strip().upper() for symbol in value.split(',') if symbol.strip()}
+
+
+class QuoteStreamApp:
+    """STREAM_PATH altındaki istekleri karşılar, diğerlerini Django'ya bırakır"""
+
+    def __init__(self, django_app):
+        self.django_app = django_app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not scope['path'].startswith(STREAM_PATH):
+            await self.django_app(scope, receive, send)
+            return
+
+        connection_id = scope['path'][len(STREAM_PATH):].strip('/')
+        method = scope['method']
+        if method == 'OPTIONS':
+            await self._send_response(scope, send, 204, b'')
+        elif method == 'GET' and not connection_id:
+            await self._stream(scope, receive, send)
+        elif method == 'POST' and connection_id:
+            await self._update_subscription(scope, receive, send, connection_id)
+        else:
+            await self._send_json(scope, send, 405, {'error': 'Desteklenmeyen istek'})
+
+    async def _stream(self, scope, receive, send):
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        symbols = _parse_symbols(query.get('symbols', [''])[0])
+        if len(symbols) > settings.STOCK_STREAM_MAX_SYMBOLS:
+            await self._send_json(scope, send, 400, {
+                'error': f'En fazla {settings.STOCK_STREAM_MAX_SYMBOLS} sembol izlenebilir'
+            })
+            return
+
+        user_id = None
+        token = query.get('token', [None])[0]
+        if token:
+            try:
+                user_id = verify_token(token).get('user_id')
+            except ValueError as e:
+                await self._send_json(scope, send, 401, {'error': str(e)})
+                return
+
+        subscription = price_bus.subscribe(symbols, user_id=user_id)
+        try:
+            await sync_to_async(price_bus.register)(subscription)
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [
+                    (b'content-type', b'text/event-stream; charset=utf-8'),
+                    (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no'),  # nginx tamponlamasın
+                ] + self._cors_headers(scope),
+            })
+            await self._send_body(send, _format_event('ready', {
+                'connection_id': subscription.id,
+                'symbols': sorted(symbols)
+            }))
+            if symbols:
+                snapshot = await sync_to_async(load_quotes)(list(symbols))
+                await self._send_body(send, _format_event('snapshot', snapshot))
+
+            disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+            try:
+                while not disconnected.done():
+                    next_event = asyncio.ensure_future(subscription.queue.get())
+                    done, _ = await asyncio.wait(
+                        {next_event, disconnected},
+                        timeout=settings.STOCK_STREAM_HEARTBEAT_SECONDS,
+                        return_when=asyncio.FIRST_COMPLETED
+                    )
+                    if next_event in done:
+                        event = next_event.result()
+                        await self._send_body(send, _format_event(event['event'], event['data']))
+                    else:
+                        next_event.cancel()
+                        if not done:
+                            # Proxy'lerin boştaki bağlantıyı kapatmaması için
+                            await self._send_body(send, b': keep-alive\n\n')
+            finally:
+                disconnected.cancel()
+        except OSError:
+            # İstemci bağlantıyı koparmış
+            pass
+        finally:
+            price_bus.unsubscribe(subscription)
+            await sync_to_async(price_bus.unregister)(subscription)
+
+    async def _update_subscription(self, scope, receive, send, connection_id: str):
+        try:
+            payload = json.loads(await self._read_body(receive) or b'{}')
+            add = payload.get('add', [])
+            remove = payload.get('remove', [])
+            if not all(isinstance(value, list) and all(isinstance(s, str) for s in value) for value in (add, remove)):
+                raise TypeError
+        except (ValueError, AttributeError, TypeError):
+            await self._send_json(scope, send, 400, {'error': 'Geçersiz JSON gövdesi'})
+            return
+
+        try:
+            symbols = await sync_to_async(price_bus.update_symbols)(connection_id, add=add, remove=remove)
+        except ValueError as e:
+            # Sembol sınırı aşıldı; kayıt değiştirilmedi
+            await self._send_json(scope, send, 400, {'error': str(e)})
+            return
+
+        if symbols is None:
+            await self._send_json(scope, send, 404, {'error': 'Bağlantı bulunamadı'})
+            return
+
+        await self._send_json(scope, send, 200, {'connection_id': connection_id, 'symbols': sorted(symbols)})
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+
+    @staticmethod
+    async def _read_body(receive) -> bytes:
+        body = b''
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return body
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                return body
+
+    @staticmethod
+    async def _send_body(send, body: bytes):
+        await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+
+    async def _send_json(self, scope, send, status: int, data: dict):
+        await self._send_response(scope, send, status, json.dumps(data, ensure_ascii=False).encode('utf-8'),
+                                  content_type=b'application/json')
+
+    async def _send_response(self, scope, send, status: int, body: bytes, content_type: Optional[bytes] = None):
+        headers = self._cors_headers(scope)
+        if content_type:
+            headers.append((b'content-type', content_type))
+        await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': body})
+
+    @staticmethod
+    def _cors_headers(scope) -> list:
+        """Django CORS middleware'i bu uygulamadan geçmediği için aynı kurallar burada uygulanır"""
+        origin = dict(scope.get('headers', [])).get(b'origin')
+        if not origin:
+            return []
+        if not settings.CORS_ALLOW_ALL_ORIGINS and origin.decode('latin-1') not in settings.CORS_ALLOWED_ORIGINS:
+            return []
+        headers = [
+            (b'access-control-allow-origin', origin),
+            (b'access-control-allow-methods', b'GET, POST, OPTIONS'),
+            (b'access-control-allow-headers', b'content-type'),
+            (b'vary', b'Origin'),
+        ]
+        if settings.CORS_ALLOW_CREDENTIALS:
+            headers.append((b'access-control-allow-credentials', b'true'))
+        return headers
@@ -1,3 +1,46 @@
+from datetime import timedelta
+from decimal import Decimal
+
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import PriceBar, StockPrice, StockSymbol
+from .price_rollup import PriceRollupEngine
+
+
+class StockBarsRollupTests(TestCase):
+    """Toplama sonrası depolanmış barlar ile anlık kuyruk birlikte okunabilmeli"""
+
+    def setUp(self):
+        self.stock = StockSymbol.objects.create(symbol='AAA.IS', name='AAA', market='BIST')
+        now = timezone.now()
+        for minutes_ago in (300, 200, 120, 65, 30, 5):
+            self._tick(now - timedelta(minutes=minutes_ago), Decimal('10') + minutes_ago / Decimal('100'))
+
+    def _tick(self, timestamp, price):
+        tick = StockPrice.objects.create(
+            stock=self.stock, open_price=price, current_price=price,
+            high_price=price, low_price=price, volume=1000
+        )
+        # timestamp auto_now_add olduğundan sonradan yazılır
+        StockPrice.objects.filter(pk=tick.pk).update(timestamp=timestamp)
+
+    def test_bars_after_rollup(self):
+        PriceRollupEngine().run(prune=False)
+        self.assertTrue(PriceBar.objects.filter(resolution='1h').exists())
+
+        client = APIClient()
+        for resolution in ('1h', '1d'):
+            response = client.get(f'/api/stocks/prices/AAA.IS/bars/?resolution={resolution}&days=1')
+            self.assertEqual(response.status_code, 200, response.data)
+            bars = response.data['bars']
+            self.assertTrue(bars)
+            times = [bar['time'] for bar in bars]
+            self.assertEqual(times, sorted(times))
+            self.assertEqual(len(times), len(set(times)))
+            self.assertEqual(len(bars), response.data['count'])
 
-# Create your tests here.
+    def test_invalid_days(self):
+        response = APIClient().get('/api/stocks/prices/AAA.IS/bars/?resolution=1h&days=abc')
+        self.assertEqual(response.status_code, 400)
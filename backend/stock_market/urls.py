@@ -1,6 +1,7 @@
 from django.urls import path
 from .views import (
     StockPricesView,
+    StockBarsView,
     StockAnalysisView, 
     MarketOverviewView,
     UltraStockAnalysisView,
@@ -13,6 +14,7 @@ from .views import (
 urlpatterns = [
     # Temel endpoints
     path('prices/', StockPricesView.as_view(), name='stock_prices'),
+    path('prices/<str:symbol>/bars/', StockBarsView.as_view(), name='stock_bars'),
     path('analyze/', StockAnalysisView.as_view(), name='stock_analysis'), 
     path('overview/', MarketOverviewView.as_view(), name='market_overview'),
     
@@ -22,4 +24,5 @@ urlpatterns = [
     path('market-sentiment/', MarketSentimentView.as_view(), name='market_sentiment'),
     path('stock-screener/', StockScreenerView.as_view(), name='stock_screener'),
     path('alerts/', AlertsView.as_view(), name='alerts'),
+    path('alerts/<int:alert_id>/', AlertsView.as_view(), name='alert_detail'),
 ]
@@ -4,11 +4,30 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.http import HttpResponse
+from django.conf import settings
 from datetime import datetime, timedelta
 import json
 
-from .models import StockSymbol, StockPrice, StockAnalysis, UserPortfolio, UserRiskProfile
+from .models import StockSymbol, StockPrice, StockAnalysis, StockFactor, PriceAlertRule, UserPortfolio, UserRiskProfile
 from .services import StockDataService, StockAnalysisService, MarketNewsService
+from .history_store import PriceHistoryStore
+from .price_rollup import RESOLUTIONS, PriceRollupEngine
+from .price_bus import quote_payload
+from .alert_rules import alert_payload, create_alert_rule
+from .market_snapshot import market_snapshots
+from .screener import StockScreener, recommendation_for_score, risk_level_for_score
+from .portfolio_optimizer import PortfolioOptimizationEngine
+
+
+def snapshot_response(request, snapshot):
+    """Görüntü baytlarını ETag ile döndür; If-None-Match eşleşirse 304"""
+    response = HttpResponse(snapshot.body, content_type='application/json')
+    response['ETag'] = snapshot.etag
+    patch_cache_control(response, public=True, max_age=int(settings.STOCK_MARKET_SNAPSHOT_REFRESH_SECONDS))
+    return get_conditional_response(request, etag=snapshot.etag, response=response)
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -19,6 +38,17 @@ class StockPricesView(APIView):
     def get(self, request):
         """Güncel hisse fiyatlarını getir"""
         try:
+            # Güncel fiyat tablosundan tek sorgu; henüz veri yoksa mock veri
+            quotes = list(StockDataService().get_latest_quotes())
+            if quotes:
+                stocks = [quote_payload(quote) for quote in quotes]
+                return Response({
+                    'stocks': stocks,
+                    'timestamp': max(quote.timestamp for quote in quotes).isoformat(),
+                    'market_status': 'OPEN',
+                    'total_count': len(stocks)
+                })
+            
             # Mock BIST hisse verileri
             mock_stocks = [
                 {
@@ -103,6 +133,58 @@ class StockPricesView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@method_decorator(csrf_exempt, name='dispatch')
+class StockBarsView(APIView):
+    """Grafikler için OHLCV bar endpoint'i (1m / 1h / 1d katmanları)"""
+    permission_classes = [AllowAny]  # Geçici
+    
+    # Çözünürlük başına en fazla geriye gidilebilecek gün (saklama katmanlarıyla uyumlu)
+    MAX_DAYS = {'1m': 7, '1h': 180, '1d': 3650}
+    
+    def get(self, request, symbol):
+        """Sembolün barlarını getir (?resolution=1h&days=7)"""
+        try:
+            resolution = request.query_params.get('resolution', '1h')
+            if resolution not in RESOLUTIONS:
+                return Response({
+                    'error': f"Geçersiz çözünürlük, seçenekler: {', '.join(RESOLUTIONS)}"
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                days = min(int(request.query_params.get('days', 1)), self.MAX_DAYS[resolution])
+            except ValueError:
+                return Response({
+                    'error': 'days bir tam sayı olmalı'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            since = datetime.now().astimezone() - timedelta(days=max(days, 1))
+            frame = PriceRollupEngine().load_bars(symbol.upper(), resolution, since)
+            
+            bars = [
+                {
+                    'time': index.isoformat(),
+                    'open': row.Open,
+                    'high': row.High,
+                    'low': row.Low,
+                    'close': row.Close,
+                    'volume': int(row.Volume)
+                }
+                for index, row in zip(frame.index, frame.itertuples(index=False))
+            ]
+            
+            return Response({
+                'symbol': symbol.upper(),
+                'resolution': resolution,
+                'bars': bars,
+                'count': len(bars)
+            })
+            
+        except Exception as e:
+            print(f"Stock bars error: {e}")
+            return Response({
+                'error': 'Fiyat barları alınırken hata oluştu'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class StockAnalysisView(APIView):
     """Hisse analizi endpoint'i"""
@@ -305,39 +387,9 @@ class MarketOverviewView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        """Genel piyasa durumunu getir"""
+        """Genel piyasa durumunu getir (önceden serileştirilmiş görüntü)"""
         try:
-            mock_overview = {
-                'bist100': {
-                    'value': 8456.78,
-                    'change': 125.45,
-                    'change_percent': 1.51,
-                    'volume': 185000000000,
-                    'status': 'RISING'
-                },
-                'usd_try': {
-                    'value': 34.15,
-                    'change': -0.25,
-                    'change_percent': -0.73,
-                    'status': 'FALLING'
-                },
-                'trending_sectors': [
-                    {'name': 'Teknoloji', 'change_percent': 4.2},
-                    {'name': 'Savunma', 'change_percent': 3.8},
-                    {'name': 'Enerji', 'change_percent': 2.5}
-                ],
-                'top_gainers': [
-                    {'symbol': 'ASELS.IS', 'name': 'Aselsan', 'change_percent': 5.15},
-                    {'symbol': 'TUPRS.IS', 'name': 'Tüpraş', 'change_percent': 4.35},
-                    {'symbol': 'THYAO.IS', 'name': 'THY', 'change_percent': 3.25}
-                ],
-                'top_losers': [
-                    {'symbol': 'AKBNK.IS', 'name': 'Akbank', 'change_percent': -1.85},
-                    {'symbol': 'BIMAS.IS', 'name': 'BİM', 'change_percent': -0.65}
-                ]
-            }
-            
-            return Response(mock_overview)
+            return snapshot_response(request, market_snapshots.get('overview'))
             
         except Exception as e:
             print(f"Market overview error: {e}")
@@ -632,48 +684,121 @@ class PortfolioOptimizerView(APIView):
     """Portföy optimizasyonu endpoint'i"""
     permission_classes = [AllowAny]  # Geçici test için
     
+    RISK_TOLERANCE_METHODS = {
+        'conservative': 'min_variance',
+        'moderate': 'risk_parity',
+        'aggressive': 'max_sharpe',
+        'very_aggressive': 'max_sharpe',
+    }
+    
+    # Sayısal parametreler ve varsayılanları (null/boş → varsayılan)
+    NUMERIC_PARAMS = {
+        'investment_amount': 100000.0,
+        'min_weight': 0.0,
+        'max_weight': 0.25,
+        'max_sector_weight': 0.40,
+    }
+    
     def post(self, request):
         """Modern Portföy Teorisi ile portföy optimizasyonu"""
         try:
-            stocks = request.data.get('stocks', [])
-            investment_amount = request.data.get('investment_amount', 100000)
-            risk_tolerance = request.data.get('risk_tolerance', 'moderate')
+            params = {}
+            for name, default in self.NUMERIC_PARAMS.items():
+                value = request.data.get(name)
+                try:
+                    params[name] = default if value in (None, '') else float(value)
+                except (TypeError, ValueError):
+                    return Response({
+                        'error': f'{name} sayısal bir değer olmalı',
+                        'success': False
+                    }, status=status.HTTP_400_BAD_REQUEST)
+            
+            stocks = [str(s).strip().upper() for s in request.data.get('stocks', []) if str(s).strip()]
+            investment_amount = params['investment_amount']
+            risk_tolerance = str(request.data.get('risk_tolerance', 'moderate')).lower()
+            method = request.data.get('method') or self.RISK_TOLERANCE_METHODS.get(risk_tolerance, 'risk_parity')
+            current_weights = request.data.get('current_weights', {})
+            
+            if len(stocks) < 2:
+                return Response({
+                    'error': 'Optimizasyon için en az 2 hisse gerekli',
+                    'success': False
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            engine = PortfolioOptimizationEngine()
+            
+            # Depoda hiç geçmişi olmayan hisselerin barlarını çek
+            history_store = PriceHistoryStore()
+            for symbol in engine.symbols_without_history(stocks):
+                history_store.sync(symbol)
+            
+            result = engine.optimize(
+                stocks,
+                method=method,
+                min_weight=params['min_weight'],
+                max_weight=params['max_weight'],
+                max_sector_weight=params['max_sector_weight'],
+                sector_limits=request.data.get('sector_limits')
+            )
+            
+            if result is None:
+                return Response({
+                    'error': 'Optimizasyon için yeterli fiyat geçmişi bulunamadı',
+                    'success': False
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            max_sector_share = max(result.sector_weights.values()) if result.sector_weights else 0
+            if max_sector_share > 0.5:
+                concentration_risk = 'YÜKSEK'
+            elif max_sector_share > 0.3:
+                concentration_risk = 'ORTA'
+            else:
+                concentration_risk = 'DÜŞÜK'
             
-            # Mock portföy optimizasyonu
-            mock_optimization = {
+            risk_warnings = []
+            if concentration_risk == 'YÜKSEK':
+                risk_warnings.append('Tek sektöre fazla yoğunlaşma riski')
+            if result.volatility > 0.35:
+                risk_warnings.append('Yüksek volatilite - fiyat dalgalanmaları beklenebilir')
+            if result.excluded_symbols:
+                risk_warnings.append(
+                    f"Yetersiz fiyat geçmişi nedeniyle dışarıda bırakıldı: {', '.join(result.excluded_symbols)}"
+                )
+            
+            rebalancing_suggestions = []
+            for symbol, weight in result.weights.items():
+                current = float(current_weights.get(symbol, 0)) if current_weights else None
+                if current is None or abs(current - weight) < 0.01:
+                    continue
+                rebalancing_suggestions.append({
+                    'symbol': symbol,
+                    'current_weight': current,
+                    'suggested_weight': weight,
+                    'action': 'ARTIR' if weight > current else 'AZALT'
+                })
+            
+            return Response({
                 'success': True,
-                'optimized_allocation': {
-                    'THYAO.IS': 0.25,
-                    'ASELS.IS': 0.20,
-                    'AKBNK.IS': 0.15,
-                    'GARAN.IS': 0.15,
-                    'BIMAS.IS': 0.25
+                'method': result.method,
+                'optimized_allocation': result.weights,
+                'allocation_amounts': {
+                    symbol: round(weight * investment_amount, 2)
+                    for symbol, weight in result.weights.items()
                 },
-                'expected_return': 0.145,  # 14.5%
-                'expected_risk': 0.185,    # 18.5%
-                'sharpe_ratio': 0.78,
-                'risk_score': 7.2,
+                'expected_return': result.expected_return,
+                'expected_risk': result.volatility,
+                'sharpe_ratio': result.sharpe_ratio,
+                'risk_score': round(min(10.0, result.volatility * 25), 1),
+                'risk_contributions': result.risk_contributions,
+                'covariance_shrinkage': result.shrinkage,
                 'diversification_analysis': {
-                    'sector_distribution': {
-                        'Havayolu': 0.25,
-                        'Savunma': 0.20,
-                        'Bankacılık': 0.30,
-                        'Perakende': 0.25
-                    },
-                    'concentration_risk': 'DÜŞÜK',
-                    'risk_warnings': []
+                    'sector_distribution': result.sector_weights,
+                    'concentration_risk': concentration_risk,
+                    'risk_warnings': risk_warnings
                 },
-                'rebalancing_suggestions': [
-                    {
-                        'symbol': 'THYAO.IS',
-                        'current_weight': 0.30,
-                        'suggested_weight': 0.25,
-                        'action': 'AZALT'
-                    }
-                ]
-            }
-            
-            return Response(mock_optimization)
+                'rebalancing_suggestions': rebalancing_suggestions,
+                'excluded_symbols': result.excluded_symbols
+            })
             
         except Exception as e:
             print(f"Portfolio optimization error: {e}")
@@ -689,46 +814,9 @@ class MarketSentimentView(APIView):
     permission_classes = [AllowAny]
     
     def get(self, request):
-        """Piyasa sentiment analizi"""
+        """Piyasa sentiment analizi (önceden serileştirilmiş görüntü)"""
         try:
-            mock_sentiment = {
-                'success': True,
-                'overall_sentiment': {
-                    'score': 0.72,
-                    'label': 'POZİTİF',
-                    'confidence': 0.85
-                },
-                'fear_greed_index': {
-                    'value': 68,
-                    'label': 'AÇGÖZLÜLÜK',
-                    'components': {
-                        'price_momentum': 75,
-                        'volatility': 45,
-                        'volume': 65,
-                        'social_sentiment': 80
-                    }
-                },
-                'sector_sentiments': {
-                    'teknoloji': {'score': 0.78, 'trend': 'YUKSELİŞ'},
-                    'bankacılık': {'score': 0.65, 'trend': 'YAN YÖN'},
-                    'enerji': {'score': 0.82, 'trend': 'YUKSELİŞ'},
-                    'savunma': {'score': 0.88, 'trend': 'GÜÇLÜ YUKSELİŞ'},
-                    'perakende': {'score': 0.58, 'trend': 'YAN YÖN'}
-                },
-                'news_analysis': {
-                    'total_articles': 1250,
-                    'positive_ratio': 0.68,
-                    'negative_ratio': 0.22,
-                    'key_themes': ['ekonomik toparlanma', 'teknoloji yatırımları', 'ihracat artışı']
-                },
-                'market_indicators': {
-                    'vix_level': 18.5,
-                    'trend_strength': 0.75,
-                    'momentum': 'POZİTİF'
-                }
-            }
-            
-            return Response(mock_sentiment)
+            return snapshot_response(request, market_snapshots.get('sentiment'))
             
         except Exception as e:
             print(f"Market sentiment error: {e}")
@@ -747,6 +835,36 @@ class StockScreenerView(APIView):
         """AI destekli hisse tarama"""
         try:
             criteria = request.data.get('criteria', {})
+            try:
+                limit = int(request.data.get('limit', 50))
+            except (TypeError, ValueError):
+                return Response({
+                    'error': 'limit bir tam sayı olmalı',
+                    'success': False
+                }, status=status.HTTP_400_BAD_REQUEST)
+            
+            # Gecelik faktör tablosu üzerinde indeksli tarama; tablo henüz boşsa mock veri
+            if StockFactor.objects.exists():
+                screening = StockScreener().screen(
+                    criteria,
+                    order_by=request.data.get('sort_by'),
+                    limit=limit
+                )
+                recommendations = [
+                    dict(
+                        stock,
+                        recommendation=recommendation_for_score(stock['ai_score']),
+                        risk_level=risk_level_for_score(stock['risk_score'])
+                    )
+                    for stock in screening['results']
+                ]
+                return Response({
+                    'success': True,
+                    'recommendations': recommendations,
+                    'screening_criteria': criteria,
+                    'ignored_criteria': screening['ignored_criteria'],
+                    'total_found': len(recommendations)
+                })
             
             mock_screener = {
                 'success': True,
@@ -797,34 +915,18 @@ class AlertsView(APIView):
     """Uyarılar endpoint'i"""
     permission_classes = [AllowAny]  # Geçici test için
     
-    def get(self, request):
+    def get(self, request, alert_id=None):
         """Kullanıcı uyarılarını getir"""
         try:
-            mock_alerts = {
-                'success': True,
-                'alerts': [
-                    {
-                        'id': '1',
-                        'type': 'PRICE_ALERT',
-                        'symbol': 'THYAO.IS',
-                        'message': 'THY 250 TL seviyesini aştı!',
-                        'priority': 'HIGH',
-                        'created_at': datetime.now().isoformat(),
-                        'is_active': True
-                    },
-                    {
-                        'id': '2',
-                        'type': 'TECHNICAL_SIGNAL',
-                        'symbol': 'ASELS.IS',
-                        'message': 'ASELS için güçlü alım sinyali oluştu',
-                        'priority': 'MEDIUM',
-                        'created_at': (datetime.now() - timedelta(hours=2)).isoformat(),
-                        'is_active': True
-                    }
-                ]
-            }
+            if not request.user.is_authenticated:
+                return Response({'success': True, 'alerts': []})
+            
+            rules = PriceAlertRule.objects.select_related('stock').filter(user=request.user)
+            if alert_id is not None:
+                rules = rules.filter(id=alert_id)
+            alerts = [alert_payload(rule) for rule in rules.order_by('-created_at')[:200]]
             
-            return Response(mock_alerts)
+            return Response({'success': True, 'alerts': alerts})
             
         except Exception as e:
             print(f"Alerts error: {e}")
@@ -832,3 +934,37 @@ class AlertsView(APIView):
                 'error': 'Uyarılar alınırken hata oluştu',
                 'success': False
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    def post(self, request, alert_id=None):
+        """Yeni uyarı kuralı oluştur"""
+        if not request.user.is_authenticated:
+            return Response({
+                'error': 'Uyarı oluşturmak için giriş yapmalısınız',
+                'success': False
+            }, status=status.HTTP_401_UNAUTHORIZED)
+        
+        try:
+            rule = create_alert_rule(request.user, request.data)
+        except ValueError as e:
+            return Response({'error': str(e), 'success': False}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Create alert error: {e}")
+            return Response({
+                'error': 'Uyarı oluşturulurken hata oluştu',
+                'success': False
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({'success': True, 'alert': alert_payload(rule)}, status=status.HTTP_201_CREATED)
+    
+    def delete(self, request, alert_id=None):
+        """Uyarı kuralını kapat (değerlendiricinin senkronu için kayıt silinmez)"""
+        if not request.user.is_authenticated:
+            return Response({'error': 'Giriş yapmalısınız', 'success': False}, status=status.HTTP_401_UNAUTHORIZED)
+        
+        updated = PriceAlertRule.objects.filter(
+            user=request.user, id=alert_id, is_active=True
+        ).update(is_active=False, updated_at=timezone.now())
+        if not updated:
+            return Response({'error': 'Uyarı bulunamadı', 'success': False}, status=status.HTTP_404_NOT_FOUND)
+        
+        return Response({'success': True})
@@ -138,6 +138,22 @@ const ExpenseAnalysisDashboard: React.FC = () => {
     }
   };
 
+  // Ekstre işinin bitmesini bekle
+  const waitForStatementJob = async (jobId: number) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 1000));
+
+      const response = await fetch(`http://localhost:8001/api/expenses/statements/jobs/${jobId}/`);
+      const job = await response.json();
+      if (!response.ok || job.status === 'failed') {
+        throw new Error(job.error || 'Ekstre işlenemedi');
+      }
+      if (job.status === 'completed') {
+        return { analysis: job.result, transaction_count: job.processed_count };
+      }
+    }
+  };
+
   // Kredi kartı ekstresi yükle ve analiz et
   const uploadCreditCardStatement = async () => {
     if (!selectedFile) {
@@ -162,7 +178,13 @@ const ExpenseAnalysisDashboard: React.FC = () => {
         throw new Error(error.error || 'Ekstre yükleme başarısız');
       }
 
-      const data = await response.json();
+      let data = await response.json();
+
+      // Arka plan işi: tamamlanana kadar iş durumunu sorgula
+      if (response.status === 202) {
+        data = await waitForStatementJob(data.job_id);
+      }
+
       setCreditCardAnalysis(data.analysis);
       alert(`✅ ${data.transaction_count} işlem başarıyla analiz edildi!`);
       